@@ -0,0 +1,361 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 2026-10-19
+
+Module (and command-line tool) for a long-running local analysis service that answers what-if questions
+for the CINELDI MV reference system (e.g., "add 2 MW at bus 95 in year 5; what is the lowest voltage?")
+in milliseconds. The data set is read, the network is set up and the load profiles are mapped to the buses
+once when the service starts, and the load demand of each scenario year is computed the first time the
+year is asked for; these are kept in memory by each process of a pool of worker processes. The power flow
+is solved by the radial power flow (see radial_power_flow.py), for the peak load model or for a set of hours.
+
+Usage (from the folder with the code):
+    python analysis_service.py --data-path <folder with the data set> [--port 8765] [--unix-socket <path>]
+        [--workers 1]
+
+The service speaks HTTP/1.1 (with keep-alive) on a TCP port on localhost or on a Unix socket:
+    POST /query    What-if request (JSON; see run_query); the response has the results (JSON) with
+                   timing of the request in 'timing_ms'
+    GET /metrics   Number of requests and errors and latency statistics (JSON)
+    GET /health    'ok' when the service is ready
+
+Example:
+    curl -s localhost:8765/query -d '{"year": 5, "add_loads": [{"bus": 95, "p_mw": 2}]}'
+"""
+
+import argparse
+import asyncio
+import collections
+import concurrent.futures
+import copy
+import json
+import math
+import os
+import sys
+import time
+import numpy as np
+
+# State of the worker processes (or of the calling process if not using worker processes)
+_state = {}
+
+# Number of scenario years to keep the hourly load demand in memory for (in each worker process)
+n_years_cache = 8
+
+# Number of switching states (configurations given by open and close lines) to keep the power flow object in
+# memory for (in each worker process)
+n_configurations_cache = 64
+
+# Number of latencies kept for the latency statistics
+n_latencies = 10000
+
+
+def _init_worker(path_data_set, filename_scenario=None):
+    """ Read the data set and set up the network, the power flow and the load profiles (kept in memory) """
+    import cineldi_dataset as cd
+    import radial_power_flow as rpf
+
+    data = cd.cineldi_dataset(path_data_set)
+    net = data.get_net()
+    _state.clear()
+    _state['net'] = net
+    _state['pf_base'] = rpf.radial_power_flow.from_net(net)
+    _state['pf'] = collections.OrderedDict()
+    _state['profiles_mapped'] = data.load_profiles.map_rel_load_profiles(data.get_filename('mapping'), repr_days=list(range(1, 366)))
+    if filename_scenario is None:
+        filename_scenario = data.filenames['scenario']
+    _state['scenario'] = data.get_scenario(filename_scenario) if os.path.isfile(os.path.join(path_data_set, filename_scenario)) else None
+    _state['loads_peak'] = {}
+    _state['loads_hours'] = collections.OrderedDict()
+    _state['vm_min'] = rpf.get_bus_vm_min(net)
+    return os.getpid()
+
+
+def _get_net_year(year):
+    import load_scenarios as ls
+    if year == 0 or _state['scenario'] is None:
+        return _state['net']
+    return ls.apply_scenario_to_net(copy.deepcopy(_state['net']), _state['scenario'], year)
+
+
+def _get_loads(year, hours):
+    """ Load demand at the buses (hours x buses) for a scenario year, for the peak load model (hours is None)
+        or for a set of hours (computed for all hours of the year the first time and then kept in memory) """
+    import radial_power_flow as rpf
+
+    if hours is None:
+        if year not in _state['loads_peak']:
+            _state['loads_peak'][year] = rpf.get_bus_loads(_get_net_year(year))
+        return _state['loads_peak'][year]
+    cache = _state['loads_hours']
+    if year in cache:
+        cache.move_to_end(year)
+    else:
+        cache[year] = rpf.get_bus_loads_time_series(_get_net_year(year), _state['profiles_mapped'])
+        if len(cache) > n_years_cache:
+            cache.popitem(last=False)
+    P_mw, Q_mvar = cache[year]
+    if isinstance(hours, str) and hours == 'all':
+        return P_mw, Q_mvar
+    return P_mw[hours], Q_mvar[hours]
+
+
+def _get_power_flow(open_lines, close_lines):
+    """ Power flow object for the configuration with the given lines opened and closed (kept in memory for
+        the most recently used configurations) """
+    net = _state['net']
+    if not open_lines and not close_lines:
+        return _state['pf_base']
+    pos_open = net.line.index.get_indexer(list(open_lines))
+    pos_close = net.line.index.get_indexer(list(close_lines))
+    unknown = [line for line, pos in zip(list(open_lines) + list(close_lines), np.concatenate([pos_open, pos_close])) if pos < 0]
+    if unknown:
+        raise KeyError('Lines not in the network: ' + str(unknown))
+    key = (tuple(sorted(int(pos) for pos in pos_open)), tuple(sorted(int(pos) for pos in pos_close)))
+    cache = _state['pf']
+    if key in cache:
+        cache.move_to_end(key)
+    else:
+        in_service = net.line['in_service'].to_numpy(dtype=bool).copy()
+        in_service[pos_open] = False
+        in_service[pos_close] = True
+        cache[key] = _state['pf_base'].with_branch_status(in_service)
+        if len(cache) > n_configurations_cache:
+            cache.popitem(last=False)
+    return cache[key]
+
+
+def run_query(query):
+    """ Answer a what-if request by power flow (in a worker process, after _init_worker)
+
+        Inputs:
+            query: Dictionary (from the JSON request) with the entries (all optional)
+                'year': Year of the load scenario (relative to the present year) (default: 0)
+                'add_loads': List of loads to add, each a dictionary with 'bus' (bus ID), 'p_mw' and either
+                    'q_mvar' or 'power_factor' (default: 0.95); added loads are constant for all hours
+                'hours': None for the peak load model (default), 'all' for all hours of the year, or a list
+                    of hours (0-8759)
+                'open_lines', 'close_lines': Lists of indices of lines to open and close (default: none);
+                    buses that are disconnected from the source by the switching are not supplied, and their
+                    load is reported as unserved
+                'details': True to include the lowest voltage of each bus and the highest loading of
+                    each line (default: False)
+
+        Outputs:
+            result: Dictionary with 'vm_min_pu', 'bus_vm_min', 'hour_vm_min', 'loading_max_percent',
+                'line_loading_max', 'hour_loading_max', 'losses_MWh' (sum over the hours; losses in MW for
+                the peak load model), 'n_buses_undervoltage', 'n_lines_overloaded', 'buses_deenergized' (IDs
+                of the buses that are not supplied), 'unserved_MW' (highest load of these buses over the hours),
+                'unserved_MWh' (sum over the hours; MW for the peak load model), 'n_hours', 'converged' and
+                'timing_ms' (time for the load demand and the power flow); the lowest voltage and the losses are
+                for the buses that are supplied
+    """
+    if not isinstance(query, dict):
+        raise TypeError('The request must be a JSON object')
+    unknown = set(query) - {'year', 'add_loads', 'hours', 'open_lines', 'close_lines', 'details'}
+    if unknown:
+        raise ValueError('Unknown entries in the request: ' + ', '.join(sorted(unknown)))
+    net = _state['net']
+    time_start = time.perf_counter()
+    year = int(query.get('year', 0))
+    hours = query.get('hours')
+    if hours is not None and not (isinstance(hours, str) and hours == 'all'):
+        hours = np.asarray(hours, dtype=int)
+        if hours.ndim != 1 or (hours < 0).any() or (hours >= len(_state['profiles_mapped'].index)).any():
+            raise ValueError('Hours must be a list of hours from 0 to ' + str(len(_state['profiles_mapped'].index) - 1))
+    P_mw, Q_mvar = _get_loads(year, hours)
+    add_loads = query.get('add_loads', [])
+    if add_loads:
+        P_mw = P_mw.copy()
+        Q_mvar = Q_mvar.copy()
+        for load in add_loads:
+            pos = net.bus.index.get_indexer([load['bus']])[0]
+            if pos < 0:
+                raise KeyError('Bus ' + str(load['bus']) + ' not in the network')
+            p_mw = float(load['p_mw'])
+            q_mvar = float(load['q_mvar']) if 'q_mvar' in load else p_mw * math.tan(math.acos(float(load.get('power_factor', 0.95))))
+            P_mw[:, pos] += p_mw
+            Q_mvar[:, pos] += q_mvar
+    pf = _get_power_flow(query.get('open_lines', []), query.get('close_lines', []))
+    time_loads = time.perf_counter()
+
+    results = pf.solve(P_mw, Q_mvar)
+    vm = results['vm_pu']
+    vm_bus = np.where(pf.topology.energized, vm.min(axis=0), np.inf)
+    j_bus = int(np.argmin(vm_bus))
+    loading = np.nan_to_num(results['loading_percent'])
+    loading_line = loading.max(axis=0)
+    j_line = int(np.argmax(loading_line))
+    P_unserved = P_mw[:, ~pf.topology.energized].sum(axis=1)
+    result = {'vm_min_pu': float(vm_bus[j_bus]), 'bus_vm_min': int(net.bus.index[j_bus]), 'hour_vm_min': _get_hour(hours, int(np.argmin(vm[:, j_bus]))),
+        'loading_max_percent': float(loading_line[j_line]), 'line_loading_max': int(net.line.index[j_line]),
+        'hour_loading_max': _get_hour(hours, int(np.argmax(loading[:, j_line]))), 'losses_MWh': float(results['pl_mw'].sum()),
+        'n_buses_undervoltage': int(np.count_nonzero(vm_bus < _state['vm_min'])),
+        'n_lines_overloaded': int(np.count_nonzero(loading_line > 100)),
+        'buses_deenergized': net.bus.index[~pf.topology.energized].to_list(), 'unserved_MW': float(P_unserved.max()),
+        'unserved_MWh': float(P_unserved.sum()), 'n_hours': int(vm.shape[0]), 'converged': bool(results['converged'])}
+    if query.get('details', False):
+        result['vm_min_pu_bus'] = dict(zip(net.bus.index.astype(str), np.where(np.isinf(vm_bus), None, vm_bus).tolist()))
+        result['loading_max_percent_line'] = dict(zip(net.line.index.astype(str), loading_line.tolist()))
+    time_end = time.perf_counter()
+    result['timing_ms'] = {'loads': (time_loads - time_start) * 1e3, 'power_flow': (time_end - time_loads) * 1e3}
+    return result
+
+
+def _get_hour(hours, i):
+    if hours is None:
+        return None
+    return i if isinstance(hours, str) else int(hours[i])
+
+
+class analysis_service(object):
+
+    def __init__(self, path_data_set, filename_scenario=None, n_workers=1):
+        """
+        Initialization of analysis service: starts the worker processes, which read the data set
+
+        Inputs:
+            path_data_set: Folder with the (processed) data set
+            filename_scenario: File name (in the data set folder) of the load scenario (optional; default:
+                the scenario of the data set)
+            n_workers: Number of worker processes (optional; default: 1; 0 to run the requests in a
+                thread of the calling process)
+        """
+        self.n_workers = n_workers
+        if n_workers > 0:
+            self.executor = concurrent.futures.ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker,
+                initargs=(path_data_set, filename_scenario))
+        else:
+            _init_worker(path_data_set, filename_scenario)
+            self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        self.time_start = time.time()
+        self.n_requests = 0
+        self.n_errors = 0
+        self.latencies_ms = collections.deque(maxlen=n_latencies)
+
+    def warm_up(self):
+        """ Start all worker processes and wait until they have read the data set """
+        futures = [self.executor.submit(os.getpid) for _ in range(max(1, self.n_workers))]
+        concurrent.futures.wait(futures)
+
+    async def query(self, query):
+        """ Run a what-if request (see run_query; a dictionary, or the JSON text of the request) in the worker
+            pool; the result includes 'timing_ms' with the time in the worker ('loads' and 'power_flow'), waiting
+            and communication ('queue') and in total. Invalid requests (including malformed JSON) are counted
+            as errors in the metrics """
+        time_start = time.perf_counter()
+        self.n_requests += 1
+        try:
+            if isinstance(query, (bytes, str)):
+                query = json.loads(query or b'{}')
+            result = await asyncio.get_running_loop().run_in_executor(self.executor, run_query, query)
+        except Exception:
+            self.n_errors += 1
+            raise
+        total_ms = (time.perf_counter() - time_start) * 1e3
+        self.latencies_ms.append(total_ms)
+        timing = result['timing_ms']
+        timing['queue'] = max(0.0, total_ms - timing['loads'] - timing['power_flow'])
+        timing['total'] = total_ms
+        return result
+
+    def get_metrics(self):
+        """ Number of requests and errors and latency statistics (ms) for the last requests """
+        latencies = np.array(self.latencies_ms)
+        metrics = {'uptime_s': time.time() - self.time_start, 'n_requests': self.n_requests, 'n_errors': self.n_errors,
+            'n_workers': self.n_workers}
+        if len(latencies) > 0:
+            metrics['latency_ms'] = {'mean': float(latencies.mean()), 'p50': float(np.percentile(latencies, 50)),
+                'p95': float(np.percentile(latencies, 95)), 'p99': float(np.percentile(latencies, 99)), 'max': float(latencies.max())}
+        return metrics
+
+    def close(self):
+        self.executor.shutdown()
+
+    async def _respond(self, writer, status, body, keep_alive):
+        data = json.dumps(body).encode() if not isinstance(body, bytes) else body
+        reasons = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 500: 'Internal Server Error'}
+        header = ('HTTP/1.1 ' + str(status) + ' ' + reasons[status] + '\r\nContent-Type: application/json\r\nContent-Length: '
+            + str(len(data)) + '\r\nConnection: ' + ('keep-alive' if keep_alive else 'close') + '\r\n\r\n')
+        writer.write(header.encode() + data)
+        await writer.drain()
+
+    async def handle_connection(self, reader, writer):
+        """ Handle the HTTP requests of a connection (until it is closed) """
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, path, version = request_line.decode('latin-1').split()
+                except ValueError:
+                    await self._respond(writer, 400, {'error': 'Invalid request line'}, False)
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get('content-length', 0)))
+                keep_alive = headers.get('connection', '').lower() != 'close' and version == 'HTTP/1.1'
+
+                if method == 'POST' and path == '/query':
+                    try:
+                        result = await self.query(body)
+                        status = 200
+                    except (ValueError, KeyError, TypeError) as error:
+                        status, result = 400, {'error': type(error).__name__ + ': ' + str(error)}
+                    except Exception as error:
+                        status, result = 500, {'error': type(error).__name__ + ': ' + str(error)}
+                elif method == 'GET' and path == '/metrics':
+                    status, result = 200, self.get_metrics()
+                elif method == 'GET' and path == '/health':
+                    status, result = 200, 'ok'
+                else:
+                    status, result = 404, {'error': 'Unknown path ' + path}
+                await self._respond(writer, status, result, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host='127.0.0.1', port=8765, unix_socket=None):
+        """ Serve requests on a TCP port (on localhost by default) or on a Unix socket until cancelled """
+        if unix_socket is not None:
+            server = await asyncio.start_unix_server(self.handle_connection, path=unix_socket)
+        else:
+            server = await asyncio.start_server(self.handle_connection, host=host, port=port)
+        async with server:
+            await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Local analysis service for what-if requests for the CINELDI MV reference system')
+    parser.add_argument('--data-path', default=os.environ.get('CINELDI_DATA_PATH'), help='Folder with the data set (default: CINELDI_DATA_PATH)')
+    parser.add_argument('--scenario', default=None, help='File name of the load scenario in the data folder (default: that of the data set)')
+    parser.add_argument('--host', default='127.0.0.1', help='Host to listen on (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8765, help='TCP port to listen on (default: 8765)')
+    parser.add_argument('--unix-socket', default=None, help='Unix socket to listen on instead of a TCP port')
+    parser.add_argument('--workers', type=int, default=1, help='Number of worker processes (default: 1; 0 for none)')
+    args = parser.parse_args(argv)
+    if args.data_path is None:
+        parser.error('The data folder must be given by --data-path or the environment variable CINELDI_DATA_PATH')
+
+    service = analysis_service(args.data_path, args.scenario, args.workers)
+    try:
+        service.warm_up()
+        print('Listening on ' + (args.unix_socket if args.unix_socket else args.host + ':' + str(args.port)), flush=True)
+        asyncio.run(service.serve(args.host, args.port, args.unix_socket))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 2026-10-19
+
+Benchmarks for reading the grid and load data, mapping load profiles, applying load scenarios,
+calculating investment costs, preparing reliability data and running power flow for all hours of a year,
+for the CINELDI MV reference system scaled up by different factors (see conftest.py).
+
+The results are saved for each run (in .benchmarks) and compared with the previous run, and the run
+fails if the median time of a benchmark has increased by more than 25 % (see pytest.ini; the first run is
+only saved, since there is nothing to compare with).
+"""
+
+import copy
+import os
+import runpy
+import numpy as np
+import pandapower as pp
+import pytest
+
+from pandapower_read_csv import read_net_from_csv
+import load_profiles as lp
+import load_scenarios as ls
+import grid_dev_plan as gdp
+
+filename_load_data = 'load_data_CINELDI_MV_reference_system.csv'
+filename_load_mapping = 'mapping_loads_to_CINELDI_MV_reference_grid.csv'
+filename_scenario = 'scenario_LEC_only.csv'
+filename_std_cable_types = 'standard_underground_cable_types.csv'
+filename_reinf_strategy = 'grid_reinforcement_strategy.csv'
+
+path_repo = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Number of hours of the year to run power flow for (can be reduced for quick runs)
+n_hours_power_flow = int(os.environ.get('CINELDI_BENCHMARK_HOURS', 8760))
+
+
+def run_benchmark(benchmark, group, scale, func, *args, setup=None):
+    """ Run a benchmark with fewer rounds for the larger data sets """
+    benchmark.group = group
+    benchmark.extra_info['scale'] = scale
+    rounds = max(1, 10 // scale)
+    if setup is not None:
+        return benchmark.pedantic(func, setup=setup, rounds=rounds)
+    return benchmark.pedantic(func, args=args, rounds=rounds)
+
+
+_cache = {}
+
+def get_net(path_data_set):
+    if ('net', path_data_set) not in _cache:
+        _cache[('net', path_data_set)] = read_net_from_csv(path_data_set, baseMVA=10, DiB_version=True)
+    return _cache[('net', path_data_set)]
+
+
+def get_profiles(path_data_set):
+    if ('profiles', path_data_set) not in _cache:
+        _cache[('profiles', path_data_set)] = lp.load_profiles(os.path.join(path_data_set, filename_load_data))
+    return _cache[('profiles', path_data_set)]
+
+
+def bench_read_net_from_csv(benchmark, data_set):
+    path_data_set, scale = data_set
+    net = run_benchmark(benchmark, 'read_net_from_csv', scale, read_net_from_csv, path_data_set, 10, True)
+    benchmark.extra_info['n_bus'] = len(net.bus.index)
+
+
+def bench_load_profiles_init(benchmark, data_set):
+    path_data_set, scale = data_set
+    run_benchmark(benchmark, 'load_profiles', scale, lp.load_profiles, os.path.join(path_data_set, filename_load_data))
+
+
+def bench_get_profile_days(benchmark, data_set):
+    path_data_set, scale = data_set
+    profiles = get_profiles(path_data_set)
+    run_benchmark(benchmark, 'get_profile_days', scale, profiles.get_profile_days, range(1, 366))
+
+
+def bench_map_rel_load_profiles(benchmark, data_set):
+    path_data_set, scale = data_set
+    profiles = get_profiles(path_data_set)
+    run_benchmark(benchmark, 'map_rel_load_profiles', scale, profiles.map_rel_load_profiles,
+        os.path.join(path_data_set, filename_load_mapping), list(range(1, 366)))
+
+
+def bench_apply_scenario_to_net(benchmark, data_set):
+    path_data_set, scale = data_set
+    net = get_net(path_data_set)
+    scenario_data = ls.read_scenario_from_csv(path_data_set, filename_scenario)
+    year = scenario_data['point_loads']['year_rel'].max()
+
+    def setup():
+        return (copy.deepcopy(net), scenario_data, year), {}
+
+    run_benchmark(benchmark, 'apply_scenario_to_net', scale, ls.apply_scenario_to_net, setup=setup)
+
+
+def bench_calc_inv_cost_branch(benchmark, data_set):
+    path_data_set, scale = data_set
+    net = get_net(path_data_set)
+    grid_inv_data = gdp.grid_investment(os.path.join(path_data_set, filename_std_cable_types),
+        os.path.join(path_repo, filename_reinf_strategy))
+
+    def calc_inv_costs():
+        inv_costs = np.zeros(len(net.line.index))
+        for i, branch_id in enumerate(net.line.index):
+            type_new = grid_inv_data.select_reinforcement(branch_id, net)
+            inv_costs[i] = grid_inv_data.calc_inv_cost_branch(net, branch_id, type_new)
+        return inv_costs
+
+    run_benchmark(benchmark, 'calc_inv_cost_branch', scale, calc_inv_costs)
+
+
+def bench_prepare_reldata(benchmark, data_set, monkeypatch):
+    path_data_set, scale = data_set
+    monkeypatch.setenv('CINELDI_DATA_PATH', path_data_set)
+    run_benchmark(benchmark, 'prepare_reldata', scale, runpy.run_path, os.path.join(path_repo, 'prepare_reldata.py'))
+
+
+def bench_power_flow_year(benchmark, data_set):
+    path_data_set, scale = data_set
+    if scale > 1:
+        pytest.skip('Power flow for a full year is only benchmarked for the original size of the grid')
+    net = copy.deepcopy(get_net(path_data_set))
+    profiles = get_profiles(path_data_set)
+    profiles_mapped = profiles.map_rel_load_profiles(os.path.join(path_data_set, filename_load_mapping), list(range(1, 366)))
+
+    # Scaling factors for the loads in net.load (indexed by bus ID) for all hours
+    bus_IDs_load = [bus_ID for bus_ID in net.load.index if bus_ID in profiles_mapped.columns]
+    scale_load = profiles_mapped.loc[:n_hours_power_flow - 1, bus_IDs_load].to_numpy()
+    P_peak = net.load.loc[bus_IDs_load, 'p_mw'].to_numpy()
+    Q_peak = net.load.loc[bus_IDs_load, 'q_mvar'].to_numpy()
+
+    def run_power_flow_year():
+        v_min = np.zeros(scale_load.shape[0])
+        for i_hour in range(scale_load.shape[0]):
+            net.load.loc[bus_IDs_load, 'p_mw'] = P_peak * scale_load[i_hour, :]
+            net.load.loc[bus_IDs_load, 'q_mvar'] = Q_peak * scale_load[i_hour, :]
+            pp.runpp(net)
+            v_min[i_hour] = net.res_bus['vm_pu'].min()
+        return v_min
+
+    benchmark.group = 'power_flow_year'
+    benchmark.extra_info['scale'] = scale
+    benchmark.extra_info['n_hours'] = scale_load.shape[0]
+    benchmark.pedantic(run_power_flow_year, rounds=1)
@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 2026-10-19
+
+Benchmarks of the time to import the modules in a new Python process (as in short-lived batch workers),
+which also check that pandapower, plotting libraries and Excel engines are not imported by modules that
+only need them for some functions (they should be imported lazily when a network is built, a plot is
+drawn or a workbook is read). These benchmarks do not need the data set.
+"""
+
+import os
+import subprocess
+import sys
+import pytest
+
+path_repo = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+modules = ['load_profiles', 'load_scenarios', 'pandapower_read_csv', 'grid_snapshots', 'grid_dev_plan',
+    'reliability_analysis', 'reliability_monte_carlo', 'interruption_costs', 'customer_types', 'load_screening',
+    'load_mapping', 'line_types', 'radial_topology', 'synthetic_data', 'instrumentation', 'pipeline', 'cineldi_dataset', 'results_store', 'hosting_capacity',
+    'radial_power_flow', 'contingency_analysis', 'network_reconfiguration',
+    'energy_losses', 'branch_loading', 'analysis_service',
+    'pf_cache', 'horizon_simulation', 'network_reduction', 'load_profile_compression']
+
+# Packages that should only be imported when they are used
+packages_lazy = ['pandapower', 'matplotlib', 'plotly', 'openpyxl', 'xlrd', 'numba']
+
+
+def import_in_new_process(module):
+    """ Import a module in a new Python process and return the lazily imported packages that were imported """
+    code = 'import sys, ' + module + '; print(",".join(p for p in ' + repr(packages_lazy) + ' if p in sys.modules))'
+    result = subprocess.run([sys.executable, '-c', code], cwd=path_repo, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, check=True)
+    return result.stdout.strip()
+
+
+@pytest.mark.parametrize('module', modules)
+def bench_import_time(benchmark, module):
+    benchmark.group = 'import_time'
+    packages_imported = benchmark.pedantic(import_in_new_process, args=(module,), rounds=5)
+    assert packages_imported == '', module + ' imports ' + packages_imported + ' at import time'
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 2026-10-19
+
+Fixtures for the benchmarks: scaled-up versions of the CINELDI MV reference data set are generated
+(once, and reused in later runs) from the data set in the folder given by the environment variable
+CINELDI_DATA_PATH, for the scaling factors given by CINELDI_BENCHMARK_SCALES (default: '1,10,100').
+
+Each run is compared with the previous saved run (see pytest.ini); the comparison is turned off for the
+first run, when there is no saved run to compare with.
+"""
+
+import glob
+import os
+import sys
+import tempfile
+import pytest
+
+# The modules of the repository are not installed as a package
+path_repo = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if path_repo not in sys.path:
+    sys.path.insert(0, path_repo)
+
+import synthetic_data as sd
+
+scales = [int(scale) for scale in os.environ.get('CINELDI_BENCHMARK_SCALES', '1,10,100').split(',')]
+
+# Folder for the generated data sets (one subfolder per scaling factor)
+path_benchmark_data = os.environ.get('CINELDI_BENCHMARK_DATA_PATH',
+    os.path.join(tempfile.gettempdir(), 'cineldi_benchmark_data'))
+
+
+@pytest.fixture(scope='session', params=scales, ids=lambda scale: str(scale) + 'x')
+def data_set(request):
+    """ Path of the data set scaled up by the scaling factor of the benchmark, and the scaling factor """
+    path_data_set = os.environ.get('CINELDI_DATA_PATH')
+    if path_data_set is None:
+        pytest.skip('Set CINELDI_DATA_PATH to the folder with the CINELDI MV reference data set')
+
+    scale = request.param
+    path_scaled = os.path.join(path_benchmark_data, 'scale_' + str(scale))
+    filename_done = os.path.join(path_scaled, '.complete')
+    if not os.path.isfile(filename_done):
+        sd.replicate_data_set(path_data_set, path_scaled, scale)
+        open(filename_done, 'w').close()
+
+    return path_scaled, scale
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_configure(config):
+    """ Turn off the comparison with the previous run if no run has been saved on this machine (before
+        pytest-benchmark loads the saved runs, which fails if there is nothing to compare with) """
+    if config.getoption('benchmark_compare', default=None) is not True:
+        return
+    from pytest_benchmark.utils import get_machine_id
+
+    storage = config.getoption('benchmark_storage')
+    if '://' not in storage:
+        storage = 'file://' + storage
+    if not storage.startswith('file://'):
+        return
+    if len(glob.glob(os.path.join(storage[len('file://'):], get_machine_id(), '*.json'))) == 0:
+        config.option.benchmark_compare = []
+        config.option.benchmark_compare_fail = None
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 2026-10-19
+
+Module for screening the thermal loading of the lines of a radial distribution grid for all hours of a
+year, as a pre-filter before AC power flow analyses. The power flow through each line is approximated by
+the sum of the load demand downstream of the line (neglecting losses and voltage drops), which is found
+for all lines and hours by one product of a sparse matrix (lines x loads, with element (k, l) equal to 1
+if load l is downstream of line k) and the hourly load demand of the loads. From the approximate loading
+relative to the current rating of the lines (max_i_ka), the loading duration curves, the number of hours
+over the limit and the loading in the hour of the coincident peak load of the grid are found.
+"""
+
+import math
+import numpy as np
+import pandas as pd
+import radial_power_flow as rpf
+from radial_topology import radial_topology
+import instrumentation as instr
+
+
+def get_line_load_matrix(net, topology=None):
+    """ Set up the sparse matrix (lines x in-service loads) with element (k, l) equal to 1 if load l is
+        downstream of line k
+
+        Inputs:
+            net: pandapower network of a radial grid
+            topology: radial_topology object for the network (optional; default: set up from net)
+
+        Outputs:
+            line_load_matrix: Sparse matrix (CSR) with rows in the order of net.line and columns in the
+                order of the in-service loads of net.load
+    """
+    if topology is None:
+        topology = radial_topology.from_net(net)
+    load = net.load.loc[net.load['in_service'].astype(bool)]
+    return topology.path_matrix[:, topology.get_bus_positions(load['bus'])].tocsr()
+
+
+@instr.instrumented('calc_line_loading', rows=len)
+def calc_line_loading(net, profiles_mapped, hours=None, vm_pu=1.0, line_load_matrix=None):
+    """ Calculate the approximate loading of each line for each hour from the downstream load demand
+
+        Inputs:
+            net: pandapower network of a radial grid with the peak load of each load (not modified)
+            profiles_mapped: DataFrame with relative load profiles mapped to buses (e.g., from
+                load_profiles.map_rel_load_profiles for all days of the year); rows are hours and
+                columns are bus IDs (see radial_power_flow.get_load_time_series)
+            hours: List of hours (row indices of profiles_mapped) (optional; default: all hours)
+            vm_pu: Voltage (p.u.) used for converting the apparent power to current (optional; default: 1.0)
+            line_load_matrix: Matrix from get_line_load_matrix, if already set up (optional)
+
+        Outputs:
+            loading: DataFrame with the approximate loading (% of max_i_ka) of each line for each hour;
+                rows are hours and columns are line indices
+    """
+    if hours is None:
+        hours = profiles_mapped.index
+    if line_load_matrix is None:
+        line_load_matrix = get_line_load_matrix(net)
+    P_mw, Q_mvar = rpf.get_load_time_series(net, profiles_mapped, hours)
+    return _calc_line_loading(net, P_mw, Q_mvar, hours, vm_pu, line_load_matrix)
+
+
+def _calc_line_loading(net, P_mw, Q_mvar, hours, vm_pu, line_load_matrix):
+    with instr.stage('branch_loading.flows', rows=len(hours)):
+        # Apparent power flow (MVA) of each line (lines x hours)
+        S_mva = np.abs(line_load_matrix @ np.ascontiguousarray((P_mw + 1j * Q_mvar).T))
+        vn_kv = net.bus.loc[net.line['from_bus'], 'vn_kv'].to_numpy(dtype=float)
+        n_parallel = net.line['parallel'].to_numpy(dtype=float) if 'parallel' in net.line.columns else 1.0
+        s_max_mva = math.sqrt(3) * vn_kv * vm_pu * net.line['max_i_ka'].to_numpy(dtype=float) * n_parallel
+        loading = S_mva.T / s_max_mva * 100
+    return pd.DataFrame(loading, index=pd.Index(hours), columns=net.line.index)
+
+
+def get_duration_curves(loading):
+    """ Loading duration curves, i.e. the loading of each line sorted in descending order
+
+        Inputs:
+            loading: DataFrame with the loading of each line for each hour (from calc_line_loading)
+
+        Outputs:
+            duration_curves: DataFrame with the sorted loading of each line; rows are the number of hours
+                (1, 2, ...) with at least this loading and columns are line indices
+    """
+    sorted_loading = -np.sort(-loading.to_numpy(), axis=0)
+    return pd.DataFrame(sorted_loading, index=pd.RangeIndex(1, len(loading.index) + 1, name='hours'), columns=loading.columns)
+
+
+@instr.instrumented('summarize_line_loading', rows=len)
+def summarize_line_loading(loading, P_total_mw=None, max_loading_percent=100.0):
+    """ Summarize the loading of each line over the hours
+
+        Inputs:
+            loading: DataFrame with the loading of each line for each hour (from calc_line_loading)
+            P_total_mw: Array-like with the total load demand of the grid for each hour, for identifying the
+                hour with the coincident peak load (optional; default: the hour with the highest mean loading
+                of the lines)
+            max_loading_percent: Upper limit for the line loading (% of max_i_ka) (optional; default: 100)
+
+        Outputs:
+            summary: DataFrame indexed by line index with columns 'loading_max_percent', 'hour_max' (hour
+                of the highest loading), 'hours_over_limit', 'loading_coincident_percent' (loading in the
+                hour of the coincident peak load) and 'coincidence_factor' (the loading in the hour of
+                the coincident peak relative to the highest loading of the line); the hour of the
+                coincident peak load is given in summary.attrs['hour_coincident_peak']
+    """
+    values = loading.to_numpy()
+    if P_total_mw is None:
+        P_total_mw = values.mean(axis=1)
+    i_peak = int(np.argmax(np.asarray(P_total_mw))) if len(values) > 0 else 0
+    i_max = np.argmax(values, axis=0)
+    loading_max = values[i_max, np.arange(values.shape[1])]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        coincidence_factor = np.where(loading_max > 0, values[i_peak] / loading_max, np.nan)
+    summary = pd.DataFrame({'loading_max_percent': loading_max, 'hour_max': loading.index[i_max],
+        'hours_over_limit': (values > max_loading_percent).sum(axis=0), 'loading_coincident_percent': values[i_peak],
+        'coincidence_factor': coincidence_factor}, index=loading.columns)
+    summary.index.name = 'line'
+    summary.attrs['hour_coincident_peak'] = loading.index[i_peak]
+    return summary
+
+
+@instr.instrumented('screen_line_loading')
+def screen_line_loading(net, profiles_mapped, hours=None, max_loading_percent=100.0, vm_pu=1.0):
+    """ Screen the loading of all lines for all hours (see calc_line_loading and summarize_line_loading)
+
+        Inputs:
+            net, profiles_mapped, hours, vm_pu: see calc_line_loading
+            max_loading_percent: see summarize_line_loading
+
+        Outputs:
+            loading: DataFrame with the approximate loading of each line for each hour (see calc_line_loading)
+            summary: DataFrame with the summary for each line (see summarize_line_loading), with the hour of
+                the coincident peak of the total load demand of the grid
+            duration_curves: DataFrame with the loading duration curves (see get_duration_curves)
+    """
+    if hours is None:
+        hours = profiles_mapped.index
+    P_mw, Q_mvar = rpf.get_load_time_series(net, profiles_mapped, hours)
+    loading = _calc_line_loading(net, P_mw, Q_mvar, hours, vm_pu, get_line_load_matrix(net))
+    summary = summarize_line_loading(loading, P_mw.sum(axis=1), max_loading_percent)
+    return loading, summary, get_duration_curves(loading)
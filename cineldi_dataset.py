@@ -0,0 +1,239 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 2026-10-19
+
+Module for accessing the files of the (processed) data set for the CINELDI MV reference system through
+one object, so that each file is read at most once in a process, and only if it is used. Each file
+is a property of the object that is read the first time it is accessed; files that are known to be needed
+can be read concurrently in a thread pool by prefetch().
+
+Example:
+    data = cineldi_dataset(path_data_set).prefetch('bus', 'branch', 'branch_extra', 'mapping', 'load_data')
+    net = data.get_net()
+    bus = data.bus.set_index('bus_i')
+
+NB: The DataFrames are shared between all users of the object, and they should therefore not be
+modified in place (copy them first, or use methods that return new DataFrames, as set_index without inplace).
+"""
+
+import os
+import threading
+import concurrent.futures
+import pandas as pd
+import pandapower_read_csv as ppcsv
+import load_profiles as lp
+import instrumentation as instr
+
+# File names of the data set other than the grid data files (see pandapower_read_csv.get_filenames_grid_data)
+filenames = {'mapping': 'mapping_loads_to_CINELDI_MV_reference_grid.csv',
+    'share_load': 'share_load_per_customer_type.csv',
+    'reldata': 'CINELDI_MV_reference_system_reldata.csv',
+    'reldata_input': 'reldata_for_component_types.csv',
+    'load_points': 'CINELDI_MV_reference_system_load_point.csv',
+    'customer_type_data': 'customer_interruption_cost_data.csv',
+    'line_types': 'distribution_line_types_in_reference_grid.csv',
+    'cable_types': 'standard_underground_cable_types.csv',
+    'load_data': 'load_data_CINELDI_MV_reference_system.csv',
+    'load_IDs_irregular': 'time_series_IDs_irregular.csv',
+    'load_IDs_residential': 'time_series_IDs_primarily_residential.csv',
+    'scenario': 'scenario_LEC_only.csv'}
+
+# Number of threads used by prefetch() by default
+n_threads_prefetch = 8
+
+
+def _read_csv(filename):
+    return pd.read_csv(filename, sep=';')
+
+
+def _read_IDs(filename):
+    return pd.read_csv(filename, sep=';')['time_series_ID'].to_list()
+
+
+class cineldi_dataset(object):
+
+    def __init__(self, root:str, DiB_version=True, filenames=filenames):
+        """
+        Initialization of data set object (no files are read until they are used)
+
+        Inputs:
+            root: Path of the folder with the (processed) data set
+            DiB_version: True if assuming grid data files and file names as for data set published
+                in connection with Data in Brief (DiB) manuscript; False if assuming
+                previous version (until around August 2022) (optional; default: True)
+            filenames: Dictionary with file names for the other files than the grid data files
+                (optional; default: the file names of the published data set)
+        """
+        self.root = root
+        self.filenames = {**ppcsv.get_filenames_grid_data(DiB_version), **filenames}
+        self._cache = {}
+        self._lock = threading.Lock()
+        self._locks_file = {}
+
+    def get_filename(self, name:str):
+        """ Full path of the file with the given name (e.g., 'bus' or 'load_data') """
+        if self.filenames.get(name) is None:
+            raise KeyError('No file ' + name + ' in the data set')
+        return os.path.join(self.root, self.filenames[name])
+
+    def exists(self, name:str):
+        """ True if the file with the given name exists in the data set folder """
+        return self.filenames.get(name) is not None and os.path.isfile(self.get_filename(name))
+
+    def _get(self, name, reader=_read_csv, key=None, filename=None):
+        """ Get the data of a file, reading it by reader(filename) if it has not been read before
+            (threads that need the same file wait for the one reading it) """
+        if key is None:
+            key = name
+        if key in self._cache:
+            return self._cache[key]
+        with self._lock:
+            lock_file = self._locks_file.setdefault(key, threading.Lock())
+        with lock_file:
+            if key not in self._cache:
+                if filename is None:
+                    filename = self.get_filename(name)
+                with instr.stage('cineldi_dataset.' + (key if isinstance(key, str) else name)) as st:
+                    data = reader(filename)
+                    if hasattr(data, '__len__'):
+                        st.set_rows(len(data))
+                self._cache[key] = data
+        return self._cache[key]
+
+    def prefetch(self, *names, n_threads=n_threads_prefetch):
+        """ Read files concurrently in a thread pool (so that the reading of the files overlaps)
+
+            Inputs:
+                names: Names of the properties to read (e.g., 'bus', 'branch', 'load_data');
+                    default: all files of the data set that exist
+                n_threads: Number of threads (optional)
+
+            Outputs:
+                self (for chaining)
+        """
+        if len(names) == 0:
+            names = [name for name in self.filenames if self.exists(name)]
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, min(n_threads, len(names)))) as executor:
+            # Exceptions (e.g., missing files) are raised here
+            list(executor.map(lambda name: getattr(self, name), names))
+        return self
+
+    def clear(self):
+        """ Forget all data that have been read (e.g., after the files have been changed) """
+        with self._lock:
+            self._cache.clear()
+
+    # Grid data
+
+    @property
+    def bus(self) -> pd.DataFrame:
+        """ Bus data (one row per bus, with the default integer index) """
+        return self._get('bus')
+
+    @property
+    def branch(self) -> pd.DataFrame:
+        """ Branch data (one row per branch, in the same order as net.line) """
+        return self._get('branch')
+
+    @property
+    def branch_extra(self) -> pd.DataFrame:
+        """ Extra branch data (line type, length, installation year and location type) """
+        return self._get('branch_extra')
+
+    @property
+    def bus_extra(self) -> pd.DataFrame:
+        """ Extra bus data (e.g., geographical coordinates) """
+        return self._get('bus_extra')
+
+    @property
+    def line_types(self) -> pd.DataFrame:
+        """ Data for the distribution line types in the reference grid, indexed by line type """
+        return self._get('line_types', lambda filename: _read_csv(filename).set_index('type'))
+
+    @property
+    def cable_types(self) -> pd.DataFrame:
+        """ Data for standard underground cable types (for grid reinforcements) """
+        return self._get('cable_types')
+
+    def get_net(self, baseMVA=10):
+        """ Set up a new pandapower network from the grid data (see pandapower_read_csv.create_net_from_data)
+
+            Inputs:
+                baseMVA: Base apparent power value to use in the per-unit conversion
+                    (optional; default: 10 MVA)
+
+            Outputs:
+                net: pandapower network (a new object for each call, which may be modified)
+        """
+        branch_extra = self.branch_extra.copy() if self.exists('branch_extra') else None
+        return ppcsv.create_net_from_data(self.bus, self.branch, branch_extra, baseMVA)
+
+    # Load data
+
+    @property
+    def mapping(self) -> pd.DataFrame:
+        """ Mapping between load time series and buses, indexed by bus ID """
+        return self._get('mapping', lambda filename: _read_csv(filename).set_index('bus_i', drop=False))
+
+    @property
+    def share_load(self) -> pd.DataFrame:
+        """ Share of load per customer type for each load time series """
+        return self._get('share_load')
+
+    @property
+    def load_data(self) -> pd.DataFrame:
+        """ Load time series (one column per time series ID, with the column names as strings, and
+            the time stamps in column 'Time') """
+        return self._get('load_data')
+
+    @property
+    def load_profiles(self) -> lp.load_profiles:
+        """ Load profiles object for the load time series (see load_profiles.py) """
+        return self._get('load_data', lambda filename: lp.load_profiles(filename, loaddata=self.load_data.set_index('Time')),
+            key='load_profiles')
+
+    @property
+    def load_IDs_irregular(self) -> list:
+        """ IDs of load time series with irregular load behaviour """
+        return self._get('load_IDs_irregular', _read_IDs)
+
+    @property
+    def load_IDs_residential(self) -> list:
+        """ IDs of load time series with primarily residential load """
+        return self._get('load_IDs_residential', _read_IDs)
+
+    # Scenarios
+
+    @property
+    def scenario(self) -> dict:
+        """ Scenario data for long-term load development (see load_scenarios.read_scenario_from_csv) """
+        return self.get_scenario(self.filenames['scenario'])
+
+    def get_scenario(self, filename_point_load:str) -> dict:
+        """ Scenario data for long-term load development from the given file in the data set folder
+            (see load_scenarios.read_scenario_from_csv) """
+        point_loads = self._get('scenario', _read_csv, key=('scenario', filename_point_load),
+            filename=os.path.join(self.root, filename_point_load))
+        return {'base_load': None, 'point_loads': point_loads}
+
+    # Reliability data
+
+    @property
+    def reldata(self) -> pd.DataFrame:
+        """ Reliability data for each branch """
+        return self._get('reldata')
+
+    @property
+    def reldata_input(self) -> pd.DataFrame:
+        """ Reliability data for each main type of component, indexed by main type """
+        return self._get('reldata_input', lambda filename: _read_csv(filename).set_index('main_type'))
+
+    @property
+    def load_points(self) -> pd.DataFrame:
+        """ Load point data for reliability analysis """
+        return self._get('load_points')
+
+    @property
+    def customer_type_data(self) -> pd.DataFrame:
+        """ Customer interruption cost data for each customer type, indexed by customer type """
+        return self._get('customer_type_data', lambda filename: _read_csv(filename).set_index('customer_type'))
@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 2026-10-19
+
+Module for N-1 contingency analysis of radially operated distribution grids with restoration through the
+normally open branches (tie branches, with br_status = 0 in the branch data), which are the reserve
+connections between feeders (or within a feeder).
+
+For each outage of an in-service branch, the area downstream of the branch is isolated (found from the path
+matrix of the radial topology; see radial_topology.py). The tie branches with one end bus in the isolated
+area and the other end bus in the energized part of the grid are candidates for resupplying the area. For
+each candidate, the power flow is solved by the backward/forward sweep method (see radial_power_flow.py)
+only for the feeders that are modified, i.e. the feeder of the disconnected branch and the feeder the tie
+branch connects to; the other feeders are not affected by the switching. The candidate without violations
+of the voltage and line loading limits and with the lowest maximum line loading is selected; if all
+candidates give violations, the area is counted as not restored (unserved load), or, optionally, it is
+restored through the candidate with the smallest violations. The area is either restored completely or
+not at all (partial restoration by sectioning the area is not considered).
+
+The contingencies are analysed in the calling process: each restoration is a small power flow for one or two
+feeders, so distributing them over worker processes costs more (starting the processes and sending the
+power flow object and the load demand to them) than it saves, even for grids ten times the size of the
+CINELDI MV reference grid.
+"""
+
+import numpy as np
+import pandas as pd
+import radial_power_flow as rpf
+import instrumentation as instr
+
+
+def _solve_restoration(state, k, tie, pos_other):
+    """ Solve the power flow for the modified feeders after the outage of branch k and closing tie branch tie,
+        which connects the isolated area to the bus at position pos_other (state: dictionary with the power
+        flow object of the base case, the load demand and the settings of the analysis)
+
+        Outputs:
+            Tuple with the lowest voltage (p.u.), the position of the bus with the lowest voltage, the highest
+            line loading (%), the index of the branch with the highest line loading, the number of buses with
+            undervoltage and the number of overloaded branches (in any of the operating states), and
+            the violation (sum of the largest voltage deficit and overload in %, 0 if no violations)
+    """
+    pf = state['pf']
+    topology = pf.topology
+    feeders = [topology.branch_feeder[k], topology.feeder[pos_other]]
+    feeders = [feeder for feeder in feeders if feeder >= 0]
+    branches = np.flatnonzero(np.isin(topology.branch_feeder, feeders))
+    branches = np.append(branches[branches != k], tie)
+    pf_sub = pf.get_subgrid(branches, in_service=np.ones(len(branches), dtype=bool))
+    results = pf_sub.solve(state['P_mw'][:, pf_sub.pos_buses], state['Q_mvar'][:, pf_sub.pos_buses])
+
+    vm_min_bus = results['vm_pu'].min(axis=0)
+    vm_min_bus[pf_sub.pos_buses == topology.pos_source] = np.inf
+    loading_max_branch = results['loading_percent'].max(axis=0) if 'loading_percent' in results else np.zeros(len(branches))
+    if not results['converged']:
+        vm_min_bus[:] = 0.0
+    j_bus = int(np.argmin(vm_min_bus))
+    j_branch = int(np.argmax(loading_max_branch))
+    vm_min = state['vm_min'][pf_sub.pos_buses]
+    undervoltage = vm_min_bus < vm_min
+    overloaded = loading_max_branch > state['max_loading_percent']
+    violation = max(0.0, np.nanmax(vm_min - vm_min_bus) * 100) + max(0.0, loading_max_branch[j_branch] - state['max_loading_percent'])
+    return (float(vm_min_bus[j_bus]), int(pf_sub.pos_buses[j_bus]), float(loading_max_branch[j_branch]), int(branches[j_branch]),
+        int(np.count_nonzero(undervoltage)), int(np.count_nonzero(overloaded)), float(violation))
+
+
+def _calc_contingencies(state, branches):
+    """ Analyse the outage of each of the given branches (see calc_contingencies) """
+    pf = state['pf']
+    topology = pf.topology
+    ties = topology.tie_branches
+    results = []
+    for k in branches:
+        area = topology.path_matrix[k].indices
+        in_area = np.zeros(len(topology.bus_IDs), dtype=bool)
+        in_area[area] = True
+        P_area = state['P_mw'][:, area].sum(axis=1)
+
+        # Candidate tie branches have one end bus in the isolated area and the other in the energized part of the grid
+        f_in = in_area[topology.f_pos[ties]]
+        t_in = in_area[topology.t_pos[ties]]
+        f_ok = topology.energized[topology.f_pos[ties]] & ~f_in
+        t_ok = topology.energized[topology.t_pos[ties]] & ~t_in
+        is_candidate = (f_in & t_ok) | (t_in & f_ok)
+        candidates = ties[is_candidate]
+        pos_other = np.where(f_in, topology.t_pos[ties], topology.f_pos[ties])[is_candidate]
+
+        best = None
+        for tie, pos in zip(candidates, pos_other):
+            result = _solve_restoration(state, k, tie, pos)
+            # Rank by violation first and then by highest line loading
+            if best is None or (result[6], result[2]) < (best[1][6], best[1][2]):
+                best = (tie, result)
+
+        if best is None:
+            tie, vm_min, bus_vm_min, loading_max, line_loading_max, n_uv, n_ol, violation = -1, np.nan, -1, np.nan, -1, 0, 0, np.nan
+        else:
+            tie, (vm_min, bus_vm_min, loading_max, line_loading_max, n_uv, n_ol, violation) = best
+        restored = best is not None and (violation == 0 or state['restore_with_violations'])
+        results.append((k, len(area), float(P_area.max()), int(tie), len(candidates), vm_min, bus_vm_min, loading_max,
+            line_loading_max, n_uv, n_ol, 0.0 if restored else float(P_area.max()), 0.0 if restored else float(P_area.sum()), restored))
+    return results
+
+
+@instr.instrumented('calc_contingencies', rows=len)
+def calc_contingencies(net, P_mw=None, Q_mvar=None, line_IDs=None, max_loading_percent=100.0, restore_with_violations=False,
+        pf=None):
+    """ N-1 contingency analysis with restoration through the tie branches for outages of the in-service lines
+
+        Inputs:
+            net: pandapower network of a radial grid (e.g., as set up by pandapower_read_csv.read_net_from_csv),
+                with lower voltage limits in net.bus.min_vm_pu (not modified)
+            P_mw, Q_mvar: Arrays (operating states x buses, in the order of net.bus.index) with the load demand
+                (e.g., from radial_power_flow.get_bus_loads_time_series for a time series, preferably
+                for a limited number of high-load hours) (optional; default: the loads of the network, as
+                from radial_power_flow.get_bus_loads)
+            line_IDs: List of line indices of the outages (optional; default: all in-service lines)
+            max_loading_percent: Upper limit for the line loading (% of max_i_ka) (optional; default: 100)
+            restore_with_violations: True if restoring through the candidate tie branch with the smallest
+                violations when all candidates give violations (optional; default: False)
+            pf: radial_power_flow object for the network, if already set up (optional)
+
+        Outputs:
+            results: DataFrame indexed by line index of the outage with columns 'f_bus' and 't_bus' (bus IDs),
+                'n_buses_isolated', 'P_isolated_MW' (peak load of the isolated area), 'tie_branch' (index
+                of the tie branch that is closed; -1 if none), 'n_tie_candidates', 'vm_min_pu' (lowest
+                voltage of the modified feeders after restoration), 'bus_vm_min', 'loading_max_percent'
+                (highest line loading of the modified feeders), 'line_loading_max', 'n_buses_undervoltage',
+                'n_lines_overloaded', 'unserved_MW' (peak load that is not restored), 'unserved_MWh' (sum over
+                the operating states, e.g. energy for hourly states) and 'restored'
+    """
+    if pf is None:
+        pf = rpf.radial_power_flow.from_net(net)
+    topology = pf.topology
+    if P_mw is None:
+        P_mw, Q_mvar = rpf.get_bus_loads(net)
+    P_mw = np.atleast_2d(np.asarray(P_mw, dtype=float))
+    Q_mvar = np.atleast_2d(np.asarray(Q_mvar, dtype=float))
+    if line_IDs is None:
+        branches = np.flatnonzero(topology.branch_child >= 0)
+    else:
+        branches = net.line.index.get_indexer(line_IDs)
+        if (branches < 0).any() or (topology.branch_child[branches] < 0).any():
+            raise KeyError('Lines not in service in the network: ' + str(list(pd.Index(line_IDs)[(branches < 0) | (topology.branch_child[branches] < 0)])))
+    vm_min = rpf.get_bus_vm_min(net)
+    state = {'pf': pf, 'P_mw': P_mw, 'Q_mvar': Q_mvar, 'vm_min': vm_min, 'max_loading_percent': max_loading_percent,
+        'restore_with_violations': restore_with_violations}
+
+    with instr.stage('contingency_analysis.contingencies', rows=len(branches)):
+        results = _calc_contingencies(state, [int(k) for k in branches])
+
+    results = pd.DataFrame(sorted(results), columns=['line', 'n_buses_isolated', 'P_isolated_MW', 'tie_branch', 'n_tie_candidates',
+        'vm_min_pu', 'bus_vm_min', 'loading_max_percent', 'line_loading_max', 'n_buses_undervoltage', 'n_lines_overloaded',
+        'unserved_MW', 'unserved_MWh', 'restored'])
+    pos = results['bus_vm_min'].to_numpy()
+    results['bus_vm_min'] = np.where(pos >= 0, net.bus.index[np.maximum(pos, 0)], -1)
+    pos = results['line_loading_max'].to_numpy()
+    results['line_loading_max'] = np.where(pos >= 0, net.line.index[np.maximum(pos, 0)], -1)
+    pos = results['tie_branch'].to_numpy()
+    results['tie_branch'] = np.where(pos >= 0, net.line.index[np.maximum(pos, 0)], -1)
+    results = results.set_index(net.line.index[results['line'].to_numpy()]).drop(columns=['line'])
+    results.index.name = 'line'
+    results.insert(0, 'f_bus', net.line.loc[results.index, 'from_bus'].to_numpy())
+    results.insert(1, 't_bus', net.line.loc[results.index, 'to_bus'].to_numpy())
+    return results
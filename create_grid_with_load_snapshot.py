@@ -14,13 +14,15 @@ import pandapower as pp
 import pandas as pd
 import os
 import load_profiles as lp
+import load_scenarios as ls
 import pandapower_read_csv as ppcsv
+import grid_snapshots as gs
 
 # %% Define input data
 
 # Location of (processed) data set for CINELDI MV reference system
-# (to be replaced by your own local data folder)
-path_data_set         = 'C:/Users/ivespe/Data_sets/CINELDI_MV_reference_system/'
+# (to be replaced by your own local data folder, or given by the environment variable CINELDI_DATA_PATH)
+path_data_set         = os.environ.get('CINELDI_DATA_PATH', 'C:/Users/ivespe/Data_sets/CINELDI_MV_reference_system/')
 
 # Filename of bus matrix on the MATPOWER format with load demand values for a given snapshot 
 # (day and hour of the year) from the load demand data set; this output file will be saved to 
@@ -38,6 +40,13 @@ filename_load_data_fullpath = os.path.join(path_data_set,'load_data_CINELDI_MV_r
 filename_load_mapping_fullpath = os.path.join(path_data_set,'mapping_loads_to_CINELDI_MV_reference_grid.csv')
 filename_scenario_fullpath = os.path.join(path_data_set,filename_scenario)
 
+# Set to True to also create snapshots for every hour of the year for a set of years in the load scenario, 
+# written to a single HDF5 file (and optionally to one bus matrix .csv file per snapshot)
+export_all_hours = False
+years_export = [0, 5, 10]
+filename_snapshots_hdf = 'CINELDI_MV_reference_grid_snapshots_bus.h5'
+export_csv_per_hour = False
+
 # %% Read bus data for the base reference grid model
 
 bus = pd.read_csv(filename_bus_fullpath, sep=';', decimal='.')
@@ -60,11 +69,32 @@ profiles_mapped = load_profiles.map_rel_load_profiles(filename_load_mapping_full
 
 # %% Scale the load in the grid by the value of the normalized load time series
 
-for bus_ID in profiles_mapped.columns:
-    bus.loc[bus_ID,'Pd'] = bus.loc[bus_ID,'Pd'] * profiles_mapped.loc[hour,bus_ID]
-    bus.loc[bus_ID,'Qd'] = bus.loc[bus_ID,'Qd'] * profiles_mapped.loc[hour,bus_ID]
+Pd, Qd = gs.calc_bus_snapshots(bus, profiles_mapped, [hour])
+bus['Pd'] = Pd[0,0,:]
+bus['Qd'] = Qd[0,0,:]
 
 # %% Write updated bus matrix to file
 
 bus.to_csv(filename_bus_snapshot, sep = ';', decimal = '.', index = True)
+
+# %% Create snapshots for all hours of the year for a set of scenario years
+
+if export_all_hours:
+    bus_base = pd.read_csv(filename_bus_fullpath, sep=';', decimal='.')
+    bus_base.set_index('bus_i',inplace=True,drop=True)
+
+    # Peak load at each bus for each of the scenario years
+    net = ppcsv.read_net_from_csv(path_data_set, baseMVA=10)
+    scen = ls.read_scenario_from_csv(path_data_set,filename_point_load = filename_scenario)
+    Pd_years, Qd_years = gs.get_bus_load_scenario_years(net, scen, years_export, bus_base.index)
+
+    # Relative load profiles for all days of the year; the row index is the hour of the year (0-indexed)
+    hours_all = list(range(365*24))
+    profiles_mapped_all = load_profiles.map_rel_load_profiles(filename_load_mapping_fullpath,list(range(1,366)))
+    Pd_all, Qd_all = gs.calc_bus_snapshots(bus_base, profiles_mapped_all, hours_all, Pd_years, Qd_years)
+
+    gs.write_bus_snapshots_hdf(filename_snapshots_hdf, bus_base, Pd_all, Qd_all, hours_all, years_export)
+    if export_csv_per_hour:
+        gs.write_bus_snapshots_csv('.', bus_base, Pd_all, Qd_all, hours_all, years_export)
+
 # %%
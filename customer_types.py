@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 2026-10-19
+
+Module for calculating the share of load per customer type for each load time series (distribution
+substation) from the original (restricted) load data set with one column per meter.
+"""
+
+import os
+import numpy as np
+import pandas as pd
+
+# Translation of customer types from Norwegian to English
+cat_translate = {'Husholdning': 'residential', 'Jordbruk': 'agriculture', 'Offentlig virksomhet':'public',
+    'Industri':'industry', 'Handel og tjenester':'commercial', 'Industri med eldrevne prosesser': 'energy-intensive industries'}
+
+# Layout of the original load data set (row indices after the header row, and the first column being time stamps)
+irow_trafonr = 0            # Row with transformer (i.e., distribution substation) numbers (load time series IDs)
+irow_customer_types = 1     # Row with load/customer types ("Husholdning, ...")
+irow_data_start = 3         # Row where load data starts
+
+# Number of rows of load data to read and sum at a time
+n_rows_chunk = 1000
+
+
+def _iter_rows_xlsx(filename_in):
+    """ Iterate over the rows (after the header row) of an original load data workbook (.xlsx), without
+        keeping more than one row in memory at a time
+    """
+    # Excel engine only needed (and imported) when reading workbooks
+    import openpyxl
+    workbook = openpyxl.load_workbook(filename_in, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(min_row=2, values_only=True)
+        for row in rows:
+            yield row
+    finally:
+        workbook.close()
+
+
+def _to_float_array(chunk):
+    """ Convert a list of rows to a float array; empty cells become NaN (and non-numeric cells as well) """
+    try:
+        return np.array(chunk, dtype=float)
+    except (ValueError, TypeError):
+        return pd.DataFrame(chunk).apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+
+
+def _sum_data_rows(rows, n_cols):
+    """ Sum the load data over all rows (hours), reading a chunk of rows at a time """
+    data_sum = np.zeros(n_cols)
+    chunk = []
+    for row in rows:
+        chunk.append(row[1:])
+        if len(chunk) == n_rows_chunk:
+            data_sum += np.nansum(_to_float_array(chunk), axis=0)
+            chunk = []
+    if len(chunk) > 0:
+        data_sum += np.nansum(_to_float_array(chunk), axis=0)
+    return data_sum
+
+
+def _read_xlsx(filename_in):
+    """ Header rows (lists of values of the meters) and the sum of the load data of each meter of a workbook """
+    rows = _iter_rows_xlsx(filename_in)
+    header_rows = [list(next(rows)[1:]) for i in range(irow_data_start)]
+    return header_rows, _sum_data_rows(rows, len(header_rows[0]))
+
+
+def _read_csv(filename_in):
+    """ Header rows (lists of values of the meters) and the sum of the load data of each meter of a .csv file;
+        the header rows (IDs and customer types) are read as text and the load data as numbers, a chunk of
+        rows at a time
+    """
+    header = pd.read_csv(filename_in, sep=';', header=0, dtype=object, nrows=irow_data_start)
+    header_rows = [header.iloc[i, 1:].to_list() for i in range(irow_data_start)]
+    n_cols = header.shape[1]
+    data_sum = np.zeros(n_cols - 1)
+    chunks = pd.read_csv(filename_in, sep=';', header=None, skiprows=irow_data_start + 1, usecols=range(1, n_cols),
+        chunksize=n_rows_chunk)
+    for chunk in chunks:
+        # Columns with non-numeric (text) cells are read as text; those cells become NaN
+        if (chunk.dtypes == object).any():
+            chunk = chunk.apply(pd.to_numeric, errors='coerce')
+        data_sum += np.nansum(chunk.to_numpy(dtype=float), axis=0)
+    return header_rows, data_sum
+
+
+def calc_share_customer_type(filename_in, translate=True):
+    """ Calculate the share of annual energy demand per customer type for each distribution substation
+        (load time series) in the original load data set
+
+        Inputs:
+            filename_in: Full path of original load data file (.xlsx or .csv), with a header row, a row with
+                transformer numbers, a row with customer types, one more row before the hourly load data,
+                and the time stamps in the first column
+            translate: True if customer types are to be translated from Norwegian to English
+                (optional; default: True)
+
+        Outputs:
+            share_load: DataFrame with column 'time_series_ID' (1-indexed, in the order the transformers
+                first appear in the data) and one column per customer type with the share of annual energy demand
+    """
+    filename, ext = os.path.splitext(filename_in)
+    if ext == '.xlsx':
+        header_rows, data_sum = _read_xlsx(filename_in)
+    elif ext == '.csv':
+        header_rows, data_sum = _read_csv(filename_in)
+    else:
+        raise ValueError('Only .csv and .xlsx load data files supported')
+    trafonrs = [0 if v is None or pd.isna(v) else v for v in header_rows[irow_trafonr]]
+    cats = [0 if v is None or pd.isna(v) else v for v in header_rows[irow_customer_types]]
+    if translate:
+        cats = [cat_translate.get(cat, cat) for cat in cats]
+
+    # Total annual energy demand for each meter (column), labelled by transformer and customer type
+    columns = pd.MultiIndex.from_arrays([trafonrs, cats], names=['trafonr', 'customer_type'])
+    data_sum = pd.Series(data_sum, index=columns)
+
+    # Annual energy demand per customer type for each transformer, and the share of the total
+    energy = data_sum.groupby(level=['trafonr', 'customer_type'], sort=False).sum().unstack('customer_type', fill_value=0)
+    energy = energy.reindex(index=pd.unique(np.asarray(trafonrs, dtype=object)), columns=pd.unique(np.asarray(cats, dtype=object)), fill_value=0)
+    energy_total = energy.sum(axis=1)
+    share_load = energy.divide(energy_total.where(energy_total > 0), axis=0).fillna(0)
+
+    share_load.columns = share_load.columns.to_list()
+    share_load.reset_index(drop=True, inplace=True)
+    share_load.insert(0, 'time_series_ID', np.arange(1, len(share_load.index) + 1))
+
+    return share_load
@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 2026-10-19
+
+Module for calculating the annual energy losses of each branch of a radial distribution grid from hourly
+load profiles, for the years of a long-term load scenario (see load_scenarios.py), e.g. for the costs of
+losses in grid planning or tariff studies. The losses are calculated for all hours of a year at once, either
+
+- exactly, by the backward/forward sweep power flow solved for all hours at once (see radial_power_flow.py),
+  with results that agree with the AC power flow of pandapower, or
+- approximately, as R x I^2 with the branch currents given by the sum of the load demand downstream of each
+  branch at the source voltage (i.e., neglecting the voltage drops and the losses themselves), which only
+  needs one sparse matrix product for all hours. An upper bound for the error is found from the estimated
+  voltage drops and the losses: the currents are at most a factor (1 + losses / load) x vm_source / vm_min
+  larger than the approximation, where vm_min is the lowest voltage estimated by a linearized power flow.
+  The line charging is neglected in the approximation and in the error bound.
+"""
+
+import copy
+import numpy as np
+import pandas as pd
+import radial_power_flow as rpf
+import instrumentation as instr
+
+# Number of hours to solve the power flow for at once for the exact losses (to limit the memory use)
+n_hours_block = 2190
+
+
+def calc_losses_exact(pf, P_mw, Q_mvar):
+    """ Calculate the energy losses of each branch by power flow for all operating states
+
+        Inputs:
+            pf: radial_power_flow object
+            P_mw, Q_mvar: Arrays (hours x buses) with the load demand (see radial_power_flow.solve)
+
+        Outputs:
+            losses_MWh: Array with the energy losses of each branch (MWh), summed over the hours
+            losses_hour_MW: Array with the total losses of each hour (MW)
+    """
+    losses_MWh = np.zeros(len(pf.r_pu))
+    losses_hour_MW = np.zeros(P_mw.shape[0])
+    for start in range(0, P_mw.shape[0], n_hours_block):
+        rows = slice(start, start + n_hours_block)
+        results = pf.solve(P_mw[rows], Q_mvar[rows])
+        if not results['converged']:
+            raise RuntimeError('The power flow did not converge for hours ' + str(start) + '-' + str(start + P_mw[rows].shape[0] - 1))
+        losses_MWh += results['pl_mw'].sum(axis=0)
+        losses_hour_MW[rows] = results['pl_mw'].sum(axis=1)
+    return losses_MWh, losses_hour_MW
+
+
+def calc_losses_approx(pf, P_mw, Q_mvar):
+    """ Calculate the energy losses of each branch as R x I^2 with currents from the downstream load demand
+        for all operating states, with an upper bound for the error (see the description of the module)
+
+        Inputs:
+            pf: radial_power_flow object
+            P_mw, Q_mvar: Arrays (hours x buses) with the load demand
+
+        Outputs:
+            losses_MWh: Array with the approximate energy losses of each branch (MWh), summed over the hours
+            losses_hour_MW: Array with the approximate total losses of each hour (MW)
+            error_bound_MWh: Upper bound for the error of the total energy losses (MWh) (the exact losses
+                are estimated to be between losses_MWh.sum() and losses_MWh.sum() + error_bound_MWh)
+    """
+    topology = pf.topology
+    S_load = (np.asarray(P_mw, dtype=float) + 1j * np.asarray(Q_mvar, dtype=float)) / pf.sn_mva
+    S_load[:, ~topology.energized] = 0.0
+    S_load[:, topology.pos_source] = 0.0
+    # Power flow through each branch (branches x hours) as the sum of the downstream load demand
+    S_branch = pf.path_matrix @ S_load.T
+    losses_branch = pf.r_pu[:, np.newaxis] * np.abs(S_branch)**2 / pf.vm_source**2 * pf.sn_mva
+    losses_hour_MW = losses_branch.sum(axis=0)
+
+    # Linearized voltage drops for the error bound
+    drop = pf.path_matrix_T @ (pf.r_pu[:, np.newaxis] * S_branch.real + pf.x_pu[:, np.newaxis] * S_branch.imag)
+    vm_min = pf.vm_source - drop.max(axis=0) / pf.vm_source
+    with np.errstate(divide='ignore', invalid='ignore'):
+        loss_fraction = np.where(S_load.real.sum(axis=1) > 0, losses_hour_MW / (np.abs(S_load.sum(axis=1)) * pf.sn_mva), 0.0)
+    factor = ((1 + loss_fraction) * pf.vm_source / np.maximum(vm_min, 1e-3))**2
+    error_bound_MWh = float(((factor - 1) * losses_hour_MW).sum())
+    return losses_branch.sum(axis=1), losses_hour_MW, error_bound_MWh
+
+
+@instr.instrumented('calc_energy_losses', rows=len)
+def calc_energy_losses(net, profiles_mapped, hours=None, method='exact', pf=None):
+    """ Calculate the energy losses of each line for the time series of operating states given by load profiles
+
+        Inputs:
+            net: pandapower network of a radial grid with the peak load of each load (e.g., after applying a
+                load scenario by load_scenarios.apply_scenario_to_net) (not modified)
+            profiles_mapped: DataFrame with relative load profiles mapped to buses (e.g., from
+                load_profiles.map_rel_load_profiles for all days of the year); rows are hours and
+                columns are bus IDs (see radial_power_flow.get_bus_loads_time_series)
+            hours: List of hours (row indices of profiles_mapped) (optional; default: all hours)
+            method: 'exact' (power flow) or 'approx' (R x I^2 with error bound) (optional; default: 'exact')
+            pf: radial_power_flow object for the network, if already set up (optional)
+
+        Outputs:
+            losses: DataFrame indexed by line index with column 'losses_MWh' (energy losses of each line)
+            summary: Dictionary with 'losses_MWh' (total), 'load_MWh' (total load demand), 'loss_percent'
+                (losses in % of the load demand), 'losses_peak_MW' (losses in the hour with the highest
+                losses) and 'error_bound_MWh' (upper bound for the error of the losses; 0 for the exact losses)
+    """
+    if pf is None:
+        pf = rpf.radial_power_flow.from_net(net)
+    P_mw, Q_mvar = rpf.get_bus_loads_time_series(net, profiles_mapped, hours)
+    if method == 'exact':
+        losses_MWh, losses_hour_MW = calc_losses_exact(pf, P_mw, Q_mvar)
+        error_bound_MWh = 0.0
+    elif method == 'approx':
+        losses_MWh, losses_hour_MW, error_bound_MWh = calc_losses_approx(pf, P_mw, Q_mvar)
+    else:
+        raise ValueError('Unknown method ' + str(method) + " (use 'exact' or 'approx')")
+
+    load_MWh = float(P_mw.sum())
+    losses = pd.DataFrame({'losses_MWh': losses_MWh}, index=net.line.index)
+    summary = {'losses_MWh': float(losses_MWh.sum()), 'load_MWh': load_MWh,
+        'loss_percent': float(losses_MWh.sum()) / load_MWh * 100 if load_MWh > 0 else np.nan,
+        'losses_peak_MW': float(losses_hour_MW.max()) if len(losses_hour_MW) > 0 else 0.0, 'error_bound_MWh': error_bound_MWh}
+    return losses, summary
+
+
+@instr.instrumented('calc_energy_losses_scenario')
+def calc_energy_losses_scenario(net, scenario_data, years, profiles_mapped, hours=None, method='exact', load_scale=1.0, power_factor=0.95):
+    """ Calculate the annual energy losses of each line for the years of a long-term load scenario
+
+        Inputs:
+            net: pandapower network of a radial grid with the peak load of each load for the present year
+                (not modified)
+            scenario_data: Dictionary with scenario data (see load_scenarios.apply_scenario_to_net)
+            years: List of years (relative to the present year) to calculate the losses for
+            profiles_mapped, hours, method: see calc_energy_losses (new loads that have no load profile in
+                profiles_mapped are assumed constant)
+            load_scale, power_factor: see load_scenarios.apply_scenario_to_net
+
+        Outputs:
+            losses: DataFrame with the annual energy losses (MWh) of each line (rows are line indices and
+                columns are years)
+            summary: DataFrame indexed by year with the totals (see calc_energy_losses)
+    """
+    import load_scenarios as ls
+
+    # The topology and the line data are the same for all years
+    pf = rpf.radial_power_flow.from_net(net)
+    losses = {}
+    summary = {}
+    for year in years:
+        with instr.stage('energy_losses.year'):
+            net_year = ls.apply_scenario_to_net(copy.deepcopy(net), scenario_data, year, load_scale, power_factor)
+            losses_year, summary[year] = calc_energy_losses(net_year, profiles_mapped, hours, method, pf)
+            losses[year] = losses_year['losses_MWh']
+    losses = pd.DataFrame(losses)
+    losses.columns.name = 'year'
+    summary = pd.DataFrame.from_dict(summary, orient='index')
+    summary.index.name = 'year'
+    return losses, summary
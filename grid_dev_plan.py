@@ -8,9 +8,11 @@ Module for implementing grid investments and evaluating their costs.
 """
 
 import pandas as pd
+import instrumentation as instr
 
 class grid_investment(object):
     
+    @instr.instrumented('grid_investment.__init__')
     def __init__(self, cable_data_filename_fullpath:str, reinf_strategy_filename_fullpath:str):
         """
         Initialization of object for managing grid investment costs.
@@ -45,6 +47,7 @@ class grid_investment(object):
         self.reinf_strategy = reinf_strategy
 
 
+    @instr.instrumented('grid_investment.calc_inv_cost_branch')
     def calc_inv_cost_branch(self,net,branch_id,type_new,replace=True):
         """ Calculate investment costs (or rather installation costs) for a new branch
 
@@ -95,6 +98,7 @@ class grid_investment(object):
         return inv_cost
 
 
+    @instr.instrumented('grid_investment.select_reinforcement')
     def select_reinforcement(self,branch_id,net):
         """ Select branch type for grid reinforcement based on reinforcement strategy
 
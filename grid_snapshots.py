@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 2026-10-19
+
+Module for creating versions of the bus data (on the MATPOWER format) for many operating states at once,
+i.e. "snapshots" for a set of hours of the year (and years of a load scenario), and for writing them to
+file for use with external tools.
+"""
+
+import copy
+import os
+import numpy as np
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+import load_scenarios as ls
+
+
+def get_bus_load_scenario_years(net, scenario_data, years, bus_IDs, load_scale=1.0, power_factor=0.95):
+    """ Get the peak load at each bus for a set of years of a load scenario
+
+        Inputs:
+            net: pandapower network object for the base year (not modified)
+            scenario_data: Dictionary with scenario data (see load_scenarios.read_scenario_from_csv)
+            years: List of years relative to the reference year
+            bus_IDs: List of bus IDs to return peak loads for
+            load_scale, power_factor: see load_scenarios.apply_scenario_to_net
+
+        Outputs:
+            Pd_years: Array (years x buses) with active power peak load (MW)
+            Qd_years: Array (years x buses) with reactive power peak load (Mvar)
+    """
+    Pd_years = np.zeros((len(years), len(bus_IDs)))
+    Qd_years = np.zeros((len(years), len(bus_IDs)))
+    for i_year, year in enumerate(years):
+        net_year = copy.deepcopy(net)
+        ls.apply_scenario_to_net(net_year, scenario_data, year, load_scale=load_scale, power_factor=power_factor)
+        load_bus = net_year.load.groupby('bus')[['p_mw', 'q_mvar']].sum()
+        load_bus = load_bus.reindex(bus_IDs, fill_value=0)
+        Pd_years[i_year, :] = load_bus['p_mw'].to_numpy()
+        Qd_years[i_year, :] = load_bus['q_mvar'].to_numpy()
+    return Pd_years, Qd_years
+
+
+def calc_bus_snapshots(bus, profiles_mapped, hours, Pd_years=None, Qd_years=None):
+    """ Calculate the load demand at all buses for a set of snapshots by scaling the peak load at each bus
+        by the value of the normalized load time series mapped to the bus, for all snapshots at once
+
+        Inputs:
+            bus: DataFrame with bus data indexed by bus ID (columns 'Pd' and 'Qd')
+            profiles_mapped: DataFrame with relative load profiles mapped to buses (from
+                load_profiles.map_rel_load_profiles); columns are bus IDs and rows are hours
+            hours: List of hours (row indices of profiles_mapped) to create snapshots for
+            Pd_years: Array (years x buses, in the order of bus.index) with the peak load for each year
+                of a scenario (optional; default: None, i.e. only the base year given by bus)
+            Qd_years: Array (years x buses) with reactive peak load (optional; see Pd_years)
+
+        Outputs:
+            Pd: Array (years x hours x buses) with active power load demand (MW)
+            Qd: Array (years x hours x buses) with reactive power load demand (Mvar)
+    """
+    if Pd_years is None:
+        Pd_years = bus['Pd'].to_numpy(dtype=float)[np.newaxis, :]
+        Qd_years = bus['Qd'].to_numpy(dtype=float)[np.newaxis, :]
+
+    # Scaling factors for all hours and buses; buses without a mapped load profile are not scaled
+    pos_mapped = bus.index.get_indexer(profiles_mapped.columns)
+    scale = np.ones((len(hours), len(bus.index)))
+    scale[:, pos_mapped[pos_mapped >= 0]] = profiles_mapped.loc[hours, pos_mapped >= 0].to_numpy(dtype=float)
+
+    Pd = Pd_years[:, np.newaxis, :] * scale[np.newaxis, :, :]
+    Qd = Qd_years[:, np.newaxis, :] * scale[np.newaxis, :, :]
+    return Pd, Qd
+
+
+def write_bus_snapshots_hdf(filename, bus, Pd, Qd, hours, years=None, key='bus_snapshots', n_snapshots_chunk=168):
+    """ Write snapshots to a single HDF5 file (requires PyTables) as a table with one row per snapshot and
+        bus, which is appended in chunks of snapshots and can be queried by year and hour, e.g.
+        pd.read_hdf(filename, key, where='hour == 19')
+
+        Inputs:
+            filename: Full path of the HDF5 file (overwritten if it exists)
+            bus: DataFrame with bus data indexed by bus ID
+            Pd, Qd: Arrays (years x hours x buses) with load demand from calc_bus_snapshots
+            hours: List of hours of the snapshots
+            years: List of years of the snapshots (optional; default: None, i.e. year 0 only)
+            key: Key of the table in the HDF5 file (optional; default: 'bus_snapshots')
+            n_snapshots_chunk: Number of snapshots to write at a time (optional; default: 168, i.e. one week)
+    """
+    if years is None:
+        years = [0]
+    if os.path.isfile(filename):
+        os.remove(filename)
+
+    n_bus = len(bus.index)
+    year_hour = pd.MultiIndex.from_product([years, hours], names=['year', 'hour']).to_frame(index=False)
+    Pd_flat = Pd.reshape(-1, n_bus)
+    Qd_flat = Qd.reshape(-1, n_bus)
+
+    with pd.HDFStore(filename, mode='w', complevel=5, complib='blosc') as store:
+        for i_start in range(0, len(year_hour.index), n_snapshots_chunk):
+            sl = slice(i_start, i_start + n_snapshots_chunk)
+            n_chunk = len(year_hour.index[sl])
+            chunk = pd.DataFrame({'year': np.repeat(year_hour['year'].to_numpy()[sl], n_bus),
+                'hour': np.repeat(year_hour['hour'].to_numpy()[sl], n_bus),
+                'bus_i': np.tile(bus.index.to_numpy(), n_chunk),
+                'Pd': Pd_flat[sl].ravel(), 'Qd': Qd_flat[sl].ravel()})
+            store.append(key, chunk, format='table', data_columns=['year', 'hour', 'bus_i'], index=False)
+        store.create_table_index(key, columns=['year', 'hour'], optlevel=9, kind='full')
+
+
+def write_bus_snapshots_csv(folder, bus, Pd, Qd, hours, years=None, n_threads=8,
+        filename_prefix='CINELDI_MV_reference_grid_snapshot_bus'):
+    """ Write one bus data file (on the MATPOWER format) per snapshot, with the files written in a thread pool
+
+        Inputs:
+            folder: Folder to write files to
+            bus: DataFrame with bus data indexed by bus ID
+            Pd, Qd: Arrays (years x hours x buses) with load demand from calc_bus_snapshots
+            hours: List of hours of the snapshots
+            years: List of years of the snapshots (optional; default: None, i.e. year 0 only, and
+                the year is not included in the file names)
+            n_threads: Number of threads writing files (optional; default: 8)
+            filename_prefix: Start of the file names (followed by '_year<year>_hour<hour>.csv')
+
+        Outputs:
+            filenames: List of full paths of the files written
+    """
+    include_year = years is not None
+    if years is None:
+        years = [0]
+
+    def write_snapshot(i_year, i_hour):
+        bus_snapshot = bus.copy()
+        bus_snapshot['Pd'] = Pd[i_year, i_hour, :]
+        bus_snapshot['Qd'] = Qd[i_year, i_hour, :]
+        label_year = '_year' + str(years[i_year]) if include_year else ''
+        filename = os.path.join(folder, filename_prefix + label_year + '_hour' + str(hours[i_hour]) + '.csv')
+        bus_snapshot.to_csv(filename, sep = ';', decimal = '.', index = True)
+        return filename
+
+    with ThreadPoolExecutor(max_workers=n_threads) as executor:
+        futures = [executor.submit(write_snapshot, i_year, i_hour) for i_year in range(len(years)) for i_hour in range(len(hours))]
+        filenames = [future.result() for future in futures]
+
+    return filenames
@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 2026-10-19
+
+Module (and command-line tool) for simulating the operation of the grid for every hour of every year of
+a planning horizon: the peak load model is scaled by the load profiles for the hours of the year (time
+variation) after applying the load scenario for the year (long-term load growth). The hours are processed
+in blocks (e.g., one month of one year), the power flow is solved for all hours of a block at once by the
+radial power flow (see radial_power_flow.py), and the results of each block are written to a results store
+(see results_store.py) before the next block is processed, so that the memory use does not depend on the
+length of the horizon.
+
+After each completed block, a checkpoint file in the results folder is updated, so that a simulation that
+is stopped (e.g., if the job is killed) continues with the first block that was not completed when it is
+started again. A block that was partly written is written again (the chunk files of each block have names
+given by the year and the first hour of the block and are replaced). When a simulation is started from the
+beginning (no checkpoint, or restart), the results of earlier simulations are removed from the results
+store. Progress and throughput (hours simulated per second) are reported for each block.
+
+Usage (from the folder with the code):
+    python horizon_simulation.py --data-path <folder with the data set> --results-path <folder for the results>
+        [--years 0-30] [--hours-block 744] [--restart]
+"""
+
+import argparse
+import copy
+import hashlib
+import json
+import os
+import sys
+import time
+import uuid
+import numpy as np
+import pandas as pd
+import radial_power_flow as rpf
+import results_store as rs
+import instrumentation as instr
+
+# Name of the checkpoint file (in the results folder)
+filename_checkpoint = 'checkpoint.json'
+
+# Quantities that are stored by default (see results_store.quantities)
+quantities_default = ['vm_pu', 'loading_percent', 'i_ka', 'pl_mw']
+
+# Quantities that can be stored, with the corresponding results of radial_power_flow.solve
+quantities_power_flow = {'vm_pu': 'vm_pu', 'va_degree': 'va_degree', 'loading_percent': 'loading_percent', 'i_ka': 'i_ka', 'pl_mw': 'pl_mw'}
+
+
+def get_blocks(years, hours, n_hours_block):
+    """ Blocks (year, position of the first hour, hours) of the simulation, in the order they are simulated """
+    return [(year, start, hours[start:start + n_hours_block]) for year in years for start in range(0, len(hours), n_hours_block)]
+
+
+def _get_config(net, scenario_data, years, hours, n_hours_block, quantities_sim):
+    """ Settings that must be the same for the simulation to be continued from a checkpoint """
+    import pf_cache
+
+    h = hashlib.blake2b(digest_size=16)
+    if scenario_data is not None and scenario_data.get('point_loads') is not None:
+        h.update(pd.util.hash_pandas_object(scenario_data['point_loads'], index=True).to_numpy().tobytes())
+    return {'years': [int(year) for year in years], 'hours': [int(hour) for hour in hours], 'n_hours_block': int(n_hours_block),
+        'quantities': list(quantities_sim), 'net': pf_cache.fingerprint(net), 'scenario': h.hexdigest()}
+
+
+def read_checkpoint(path_results):
+    """ Read the checkpoint of a simulation (None if there is none)
+
+        Outputs:
+            checkpoint: Dictionary with 'config' (settings of the simulation) and 'completed' (list of
+                [year, position of first hour] of the completed blocks)
+    """
+    filename = os.path.join(path_results, filename_checkpoint)
+    if not os.path.isfile(filename):
+        return None
+    with open(filename) as f:
+        return json.load(f)
+
+
+def _write_checkpoint(path_results, checkpoint):
+    # Write to a temporary file that is renamed, so that the checkpoint is never partly written
+    filename = os.path.join(path_results, filename_checkpoint)
+    filename_tmp = filename + '.' + uuid.uuid4().hex + '.tmp'
+    with open(filename_tmp, 'w') as f:
+        json.dump(checkpoint, f)
+    os.replace(filename_tmp, filename)
+
+
+def _report_progress(progress):
+    print('Year {year}, hours {hour_first}-{hour_last}: {n_blocks_done}/{n_blocks} blocks, {hours_per_second_block:.0f} hours/s '
+        '(average {hours_per_second:.0f} hours/s), remaining {time_remaining_s:.0f} s'.format(**progress), flush=True)
+
+
+@instr.instrumented('simulate_horizon')
+def simulate_horizon(net, scenario_data, years, profiles_mapped, path_results, hours=None, n_hours_block=744,
+        quantities_sim=quantities_default, restart=False, progress=True, load_scale=1.0, power_factor=0.95):
+    """ Simulate the operation of the grid for all hours of all years of a planning horizon, writing the
+        results to a results store block by block and continuing from the checkpoint if there is one
+
+        Inputs:
+            net: pandapower network of a radial grid with the peak load of each load for the present year
+                (not modified)
+            scenario_data: Dictionary with scenario data (see load_scenarios.apply_scenario_to_net), or None
+                for no load growth
+            years: List of years (relative to the present year)
+            profiles_mapped: DataFrame with relative load profiles mapped to buses (e.g., from
+                load_profiles.map_rel_load_profiles for all days of the year); rows are hours and columns are
+                bus IDs (see radial_power_flow.get_bus_loads_time_series)
+            path_results: Folder of the results store (see results_store.py) and the checkpoint
+            hours: List of hours (row indices of profiles_mapped) (optional; default: all hours)
+            n_hours_block: Number of hours per block (optional; default: 744, i.e. one month)
+            quantities_sim: List of quantities to store (see quantities_power_flow) (optional)
+            restart: True to start from the beginning even if there is a checkpoint (optional; default: False);
+                when a simulation is started from the beginning, all results in the results store are removed
+            progress: True to print the progress after each block, False for no reporting, or a function
+                that is called with a dictionary with the progress after each block (optional; default: True)
+            load_scale, power_factor: see load_scenarios.apply_scenario_to_net
+
+        Outputs:
+            summary: Dictionary with 'n_blocks', 'n_blocks_skipped' (completed before, according to the
+                checkpoint), 'n_hours_simulated', 'time_s' and 'hours_per_second'
+    """
+    import load_scenarios as ls
+
+    if hours is None:
+        hours = profiles_mapped.index
+    hours = list(hours)
+    unknown = [quantity for quantity in quantities_sim if quantity not in quantities_power_flow]
+    if unknown:
+        raise ValueError('Quantities not available from the power flow: ' + ', '.join(unknown))
+    if progress is True:
+        progress = _report_progress
+
+    store = rs.results_store(path_results, elements=rs.get_elements_from_net(net))
+    config = _get_config(net, scenario_data, years, hours, n_hours_block, quantities_sim)
+    checkpoint = None if restart else read_checkpoint(path_results)
+    if checkpoint is not None and checkpoint['config'] != config:
+        raise ValueError('The checkpoint in ' + path_results + ' is for a simulation with other settings (use restart=True to start again)')
+    if checkpoint is None:
+        # Results of an earlier simulation in the store would be mixed with the new results
+        store.clear()
+        checkpoint = {'config': config, 'completed': []}
+        _write_checkpoint(path_results, checkpoint)
+    completed = set(tuple(block) for block in checkpoint['completed'])
+
+    blocks = get_blocks(years, hours, n_hours_block)
+    n_blocks_skipped = sum((year, start) in completed for year, start, _ in blocks)
+    n_hours_todo = sum(len(hours_block) for year, start, hours_block in blocks if (year, start) not in completed)
+    pf = rpf.radial_power_flow.from_net(net)
+    time_start = time.perf_counter()
+    n_hours_simulated = 0
+    year_net = None
+    for i_block, (year, start, hours_block) in enumerate(blocks):
+        if (year, start) in completed:
+            continue
+        time_block = time.perf_counter()
+        with instr.stage('horizon_simulation.block', rows=len(hours_block)):
+            # The network with the load for the year (only the network of the present year is kept)
+            if year_net != year:
+                net_year = net if scenario_data is None else ls.apply_scenario_to_net(copy.deepcopy(net), scenario_data, year, load_scale, power_factor)
+                year_net = year
+            P_mw, Q_mvar = rpf.get_bus_loads_time_series(net_year, profiles_mapped, hours_block)
+            results = pf.solve(P_mw, Q_mvar)
+            if not results['converged']:
+                raise RuntimeError('The power flow did not converge for year ' + str(year) + ', hours ' + str(hours_block[0]) + '-' + str(hours_block[-1]))
+            # The chunk files of the block have names given by the block, so that they are replaced if the block is run again
+            with store.get_writer(writer_id='y%d_block%05d' % (year, start), n_rows_chunk=len(hours_block)) as writer:
+                writer.append(year, hours_block, {quantity: results[quantities_power_flow[quantity]] for quantity in quantities_sim})
+
+        checkpoint['completed'].append([year, start])
+        _write_checkpoint(path_results, checkpoint)
+        n_hours_simulated += len(hours_block)
+        if progress:
+            time_now = time.perf_counter()
+            hours_per_second = n_hours_simulated / (time_now - time_start)
+            progress({'year': year, 'hour_first': hours_block[0], 'hour_last': hours_block[-1], 'n_blocks_done': i_block + 1,
+                'n_blocks': len(blocks), 'n_hours_simulated': n_hours_simulated,
+                'hours_per_second_block': len(hours_block) / (time_now - time_block), 'hours_per_second': hours_per_second,
+                'time_remaining_s': (n_hours_todo - n_hours_simulated) / hours_per_second})
+
+    time_total = time.perf_counter() - time_start
+    return {'n_blocks': len(blocks), 'n_blocks_skipped': n_blocks_skipped, 'n_hours_simulated': n_hours_simulated,
+        'time_s': time_total, 'hours_per_second': n_hours_simulated / time_total if time_total > 0 else np.nan}
+
+
+def _parse_years(text):
+    years = []
+    for part in text.split(','):
+        first, _, last = part.partition('-')
+        years.extend(range(int(first), int(last if last else first) + 1))
+    return years
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Simulate all hours of all years of a planning horizon for the CINELDI MV reference system')
+    parser.add_argument('--data-path', default=os.environ.get('CINELDI_DATA_PATH'), help='Folder with the data set (default: CINELDI_DATA_PATH)')
+    parser.add_argument('--results-path', required=True, help='Folder for the results store and the checkpoint')
+    parser.add_argument('--scenario', default=None, help='File name of the load scenario in the data folder (default: that of the data set)')
+    parser.add_argument('--years', default='0-30', help='Years relative to the present year, e.g. 0-30 or 0,5,10 (default: 0-30)')
+    parser.add_argument('--hours-block', type=int, default=744, help='Number of hours per block (default: 744)')
+    parser.add_argument('--restart', action='store_true', help='Start from the beginning even if there is a checkpoint')
+    args = parser.parse_args(argv)
+    if args.data_path is None:
+        parser.error('The data folder must be given by --data-path or the environment variable CINELDI_DATA_PATH')
+
+    import cineldi_dataset as cd
+    data = cd.cineldi_dataset(args.data_path).prefetch('bus', 'branch', 'branch_extra', 'mapping', 'load_data')
+    net = data.get_net()
+    scenario_data = data.scenario if args.scenario is None else data.get_scenario(args.scenario)
+    profiles_mapped = data.load_profiles.map_rel_load_profiles(data.get_filename('mapping'), repr_days=list(range(1, 366)))
+    summary = simulate_horizon(net, scenario_data, _parse_years(args.years), profiles_mapped, args.results_path,
+        n_hours_block=args.hours_block, restart=args.restart)
+    print('Simulated {n_hours_simulated} hours in {time_s:.1f} s ({hours_per_second:.0f} hours/s); '
+        '{n_blocks_skipped} of {n_blocks} blocks were completed before'.format(**summary))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
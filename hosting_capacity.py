@@ -0,0 +1,477 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 2026-10-19
+
+Module for calculating the hosting capacity for new load (e.g., local energy communities or charging
+stations) at each bus of a radial distribution grid, i.e. how much load (MW) can be added at the bus
+before the voltage at any bus falls below its lower limit (min_vm_pu) or the current of any line exceeds
+its rating (max_i_ka).
+
+The hosting capacity is first estimated for all buses at once from linear sensitivities of the bus
+voltages and line flows to the load at each bus (using the path matrix of the radial topology; see
+radial_topology.py), and the estimates are then refined by a bracketing search (bisection with linear
+interpolation of the constraint margins) with AC power flow calculations (pandapower) that are initialized
+by the previous solution. The buses are processed in parallel by a pool of worker processes.
+
+The hosting capacity can be calculated either for a single operating state (e.g., the peak load
+model with all loads at their peak load) or for a time series of operating states (e.g., all hours of a
+year), where the hosting capacity is the largest load that can be added without violating the
+constraints in any hour.
+"""
+
+import copy
+import math
+import os
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from radial_topology import radial_topology
+import radial_power_flow as rpf
+import instrumentation as instr
+
+# Name of the load added to the network for the hosting capacity calculations
+name_load_hc = 'hosting_capacity'
+
+# Maximum number of elements in the intermediate arrays of the estimates (hours x buses x buses)
+n_elements_block = 2e7
+
+
+def calc_branch_flows(topology, net):
+    """ Get the power flows of the in-service lines in the direction away from the source bus and the
+        voltage at the upstream end, from the power flow results of a pandapower network
+
+        Inputs:
+            topology: radial_topology object for the lines of the network
+            net: pandapower network with power flow results
+
+        Outputs:
+            p_branch: Array with active power flow (MW) into each line at its upstream end (0 for tie lines)
+            q_branch: Array with reactive power flow (Mvar) into each line at its upstream end
+            vm_branch: Array with voltage (p.u.) at the upstream end of each line (1 for tie lines)
+    """
+    p_from = net.res_line['p_from_mw'].to_numpy(dtype=float)
+    q_from = net.res_line['q_from_mvar'].to_numpy(dtype=float)
+    p_to = net.res_line['p_to_mw'].to_numpy(dtype=float)
+    q_to = net.res_line['q_to_mvar'].to_numpy(dtype=float)
+    vm = net.res_bus['vm_pu'].to_numpy(dtype=float)
+
+    # The upstream end of a line is the from bus unless the to bus is upstream
+    upstream_is_from = topology.branch_child == topology.t_pos
+    tie = topology.branch_child < 0
+    p_branch = np.where(upstream_is_from, p_from, p_to)
+    q_branch = np.where(upstream_is_from, q_from, q_to)
+    vm_branch = vm[np.where(upstream_is_from, topology.f_pos, topology.t_pos)]
+    p_branch[tie] = 0.0
+    q_branch[tie] = 0.0
+    vm_branch[tie] = 1.0
+    return p_branch, q_branch, vm_branch
+
+
+def estimate_hosting_capacity(topology, r_pu, x_pu, s_max_MVA, vm, vm_min, p_branch, q_branch, vm_branch,
+        sn_mva=1.0, power_factor=0.95):
+    """ Estimate the hosting capacity for new load at all buses from linear sensitivities (voltage drops
+        by the linearized DistFlow equations and the line flows with the new load added to the flows of
+        the lines on the path from the source), for one or more operating states at once. Losses are
+        neglected, so the estimates are typically somewhat too high.
+
+        Inputs:
+            topology: radial_topology object
+            r_pu, x_pu: Arrays with the resistance and reactance (p.u. on base sn_mva) of each branch
+            s_max_MVA: Array with the apparent power rating of each branch at nominal voltage (MVA)
+            vm: Array (states x buses) with bus voltages (p.u.) in the operating states
+            vm_min: Array with the lower voltage limit of each bus (p.u.; NaN for no limit)
+            p_branch, q_branch, vm_branch: Arrays (states x branches) with flows and upstream voltages
+                as given by calc_branch_flows
+            sn_mva: Base power of r_pu and x_pu (MVA) (optional; default: 1)
+            power_factor: Power factor (lagging) of the new load (optional; default: 0.95)
+
+        Outputs:
+            est_MW: Array (states x buses) with estimated hosting capacity (MW)
+            est_voltage_MW: Array (states x buses) with the estimate limited by voltage only
+            est_loading_MW: Array (states x buses) with the estimate limited by line loading only
+    """
+    vm = np.atleast_2d(vm)
+    p_branch = np.atleast_2d(p_branch)
+    q_branch = np.atleast_2d(q_branch)
+    vm_branch = np.atleast_2d(vm_branch)
+    n_states, n_bus = vm.shape
+    tan_phi = math.tan(math.acos(power_factor))
+    A = topology.path_matrix.tocsc()
+
+    # Voltage headroom of each bus (infinite for buses without a limit)
+    headroom = vm - np.where(np.isnan(vm_min), -np.inf, vm_min)[np.newaxis, :]
+    headroom = np.maximum(headroom, 0.0)
+
+    # Voltage drop (p.u.) at bus i per MW of new load at bus j is the sum of (r + x tan(phi)) / sn_mva
+    # over the branches on the common part of the paths from the source to bus i and bus j
+    z_eff = (r_pu + x_pu * tan_phi) / sn_mva
+    est_voltage = np.full((n_states, n_bus), np.inf)
+    n_block_bus = max(1, int(n_elements_block // max(1, n_bus * n_states)))
+    n_block_states = max(1, int(n_elements_block // n_bus))
+    for j_start in range(0, n_bus, n_block_bus):
+        cols = slice(j_start, min(n_bus, j_start + n_block_bus))
+        sens = (A.T @ A[:, cols].multiply(z_eff[:, np.newaxis])).toarray()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for t_start in range(0, n_states, n_block_states):
+                rows = slice(t_start, t_start + n_block_states)
+                ratio = np.where(sens[np.newaxis, :, :] > 0, headroom[rows, :, np.newaxis] / sens[np.newaxis, :, :], np.inf)
+                est_voltage[rows, cols] = ratio.min(axis=1)
+
+    # Largest new load each branch can carry in addition to its present flow, from
+    # (P + x)^2 + (Q + x tan(phi))^2 = S_max^2, and the smallest of these on the path to each bus
+    s_max = s_max_MVA[np.newaxis, :] * vm_branch
+    a = 1.0 + tan_phi**2
+    b = 2.0 * (p_branch + q_branch * tan_phi)
+    c = p_branch**2 + q_branch**2 - s_max**2
+    with np.errstate(invalid='ignore'):
+        root = np.where(c < 0, (-b + np.sqrt(np.maximum(b**2 - 4 * a * c, 0.0))) / (2 * a), 0.0)
+    root[:, topology.branch_child < 0] = np.inf
+
+    est_loading = np.full((n_states, n_bus), np.inf)
+    for depth in range(1, topology.depth.max() + 1 if n_bus > 0 else 1):
+        buses = np.flatnonzero((topology.depth == depth) & (topology.parent_branch >= 0))
+        parents = topology.parent_bus[buses]
+        est_loading[:, buses] = np.minimum(root[:, topology.parent_branch[buses]], est_loading[:, parents])
+
+    est = np.minimum(est_voltage, est_loading)
+    not_energized = ~topology.energized
+    est[:, not_energized] = 0.0
+    return est, est_voltage, est_loading
+
+
+def get_line_data_pu(net):
+    """ Resistance, reactance (p.u. on base net.sn_mva) and rating (MVA at nominal voltage) of the lines of a
+        pandapower network """
+    vn_kv = net.bus.loc[net.line['from_bus'], 'vn_kv'].to_numpy(dtype=float)
+    z_base = vn_kv**2 / net.sn_mva
+    n_parallel = net.line['parallel'].to_numpy(dtype=float) if 'parallel' in net.line.columns else 1.0
+    length = net.line['length_km'].to_numpy(dtype=float)
+    r_pu = net.line['r_ohm_per_km'].to_numpy(dtype=float) * length / n_parallel / z_base
+    x_pu = net.line['x_ohm_per_km'].to_numpy(dtype=float) * length / n_parallel / z_base
+    s_max_MVA = math.sqrt(3) * vn_kv * net.line['max_i_ka'].to_numpy(dtype=float) * n_parallel
+    return r_pu, x_pu, s_max_MVA
+
+
+# State of each worker process (or of the main process when running without workers)
+_state = {}
+
+
+def _init_worker(net, settings, scaling=None):
+    """ Set up the network with the load for the hosting capacity calculations in a worker process """
+    import pandapower as pp
+    net = copy.deepcopy(net)
+    pp.create_load(net, bus=net.bus.index[0], p_mw=0.0, q_mvar=0.0, name=name_load_hc)
+    _state.clear()
+    _state.update(settings)
+    _state['net'] = net
+    _state['idx_load'] = net.load.index[-1]
+    _state['pos_base'] = np.flatnonzero(net.load['name'].astype(str) != name_load_hc)
+    _state['scaling'] = scaling
+    _state['init'] = 'auto'
+    _state['vm_min'] = rpf.get_bus_vm_min(net)
+
+
+def _set_hour(i_hour):
+    """ Scale the base loads (and the new load) to the values of an hour of the time series """
+    if _state['scaling'] is None:
+        return
+    net = _state['net']
+    scaling_base, scaling_new = _state['scaling']
+    scaling = net.load['scaling'].to_numpy(dtype=float)
+    scaling[_state['pos_base']] = scaling_base[i_hour]
+    net.load['scaling'] = scaling
+    net.load.at[_state['idx_load'], 'scaling'] = scaling_new[i_hour]
+
+
+def _check_constraints(net):
+    """ Margins of the constraints for the power flow results of a network: the voltage below the lower
+        limit of each bus (p.u.) followed by the loading above the limit of each line (as a fraction of
+        the rating); a constraint is violated if its margin is positive (-inf for elements without limits) """
+    violation_v = _state['vm_min'] - net.res_bus['vm_pu'].to_numpy(dtype=float)
+    loading = net.res_line['loading_percent'].to_numpy(dtype=float)
+    violation_i = (loading - _state['max_loading_percent']) / 100
+    margins = np.concatenate([violation_v, violation_i]) - _state['tol_vm']
+    return np.where(np.isnan(margins), -np.inf, margins)
+
+
+def _get_constraint(margins):
+    """ The constraint ('voltage', 'line_loading' or 'convergence') and element (bus ID or line ID) with the
+        largest margin """
+    if margins is None:
+        return 'convergence', None
+    net = _state['net']
+    k = np.argmax(margins)
+    if k < len(net.bus.index):
+        return 'voltage', net.bus.index[k]
+    return 'line_loading', net.line.index[k - len(net.bus.index)]
+
+
+def _run_power_flow(bus_pos, p_mw):
+    """ Run power flow with new load p_mw at a bus and return the margins of the constraints (see
+        _check_constraints), or None if the power flow does not converge """
+    import pandapower as pp
+    net = _state['net']
+    idx = _state['idx_load']
+    net.load.at[idx, 'bus'] = net.bus.index[bus_pos]
+    net.load.at[idx, 'p_mw'] = p_mw
+    net.load.at[idx, 'q_mvar'] = p_mw * _state['tan_phi']
+    _state['n_power_flows'] += 1
+    try:
+        pp.runpp(net, init=_state['init'], numba=False)
+    except pp.LoadflowNotConverged:
+        _state['init'] = 'auto'
+        return None
+    _state['init'] = 'results'
+    return _check_constraints(net)
+
+
+def _is_feasible(margins):
+    return margins is not None and margins.max() <= 0
+
+
+def _interpolate(x_1, margins_1, x_2, margins_2):
+    """ Smallest load where the margin of any constraint becomes zero when the margin of each constraint is
+        interpolated (or extrapolated) linearly between two loads (inf if none) """
+    slope = (margins_2 - margins_1) / (x_2 - x_1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        x_zero = np.where(slope > 0, x_2 - margins_2 / slope, np.inf)
+    return np.nanmin(np.where(x_zero >= min(x_1, x_2), x_zero, np.inf))
+
+
+def _search(bus_pos, est_mw, p_max_mw, margins_base, infeasible=None):
+    """ Find the hosting capacity at a bus by a bracketing search, where the next load to try is found by
+        linear interpolation of the margin of each constraint (see _check_constraints) between the largest
+        feasible and the smallest infeasible load found, offset by a fraction of the tolerance so that the
+        bracket is closed from both sides, and by bisection when the interpolation does not shrink the bracket
+
+        Inputs:
+            bus_pos: Position of the bus
+            est_mw: Estimated hosting capacity (MW)
+            p_max_mw: Largest load to consider (MW)
+            margins_base: Margins of the constraints for the base state without new load
+            infeasible: Load known to be infeasible and its margins (optional)
+
+        Outputs:
+            hc_mw: Largest load found to be feasible (MW)
+            constraint, element: Binding constraint (at the smallest load found to be infeasible)
+    """
+    tol = _state['tol_mw']
+    lo, margins_lo = 0.0, margins_base
+    if not _is_feasible(margins_lo):
+        # The constraints are violated already without new load
+        return (0.0,) + _get_constraint(margins_lo)
+
+    if infeasible is not None:
+        hi, margins_hi = infeasible
+    else:
+        # Extrapolate from the feasible loads until an infeasible load is found
+        x = min(max(est_mw, tol), p_max_mw)
+        while True:
+            margins = _run_power_flow(bus_pos, x)
+            if not _is_feasible(margins):
+                hi, margins_hi = x, margins
+                break
+            if x >= p_max_mw:
+                return p_max_mw, 'none', None
+            x_pred = _interpolate(lo, margins_lo, x, margins)
+            lo, margins_lo = x, margins
+            x = min(max(x_pred + 0.25 * tol, lo + tol), p_max_mw) if np.isfinite(x_pred) else min(2 * lo + tol, p_max_mw)
+
+    offset = -0.25 * tol
+    n_slow = 0
+    while hi - lo > tol:
+        width = hi - lo
+        if margins_hi is None or n_slow >= 2:
+            x = 0.5 * (lo + hi)
+            n_slow = 0
+        else:
+            x = _interpolate(lo, margins_lo, hi, margins_hi) + offset
+            x = min(max(x, lo + 0.25 * tol), hi - 0.25 * tol)
+        margins = _run_power_flow(bus_pos, x)
+        if _is_feasible(margins):
+            lo, margins_lo = x, margins
+            offset = 0.25 * tol
+        else:
+            hi, margins_hi = x, margins
+            offset = -0.25 * tol
+        n_slow = n_slow + 1 if hi - lo > 0.5 * width else 0
+    return (lo,) + _get_constraint(margins_hi)
+
+
+def _calc_buses(tasks):
+    """ Calculate the hosting capacity for a list of buses, each given by its position and a list of
+        (hour, estimate, margins) for the hours to check, in order of increasing estimate, where margins
+        are the margins of the constraints of the base state of the hour """
+    results = []
+    for bus_pos, hours_est in tasks:
+        _state['n_power_flows'] = 0
+        for k, (i_hour, est_mw, margins_base) in enumerate(hours_est):
+            _set_hour(i_hour)
+            if k == 0:
+                hc_mw, constraint, element = _search(bus_pos, est_mw, _state['p_max_mw'], margins_base)
+                hour_binding = i_hour
+                continue
+            # The hosting capacity can only be reduced by the following hours
+            margins = _run_power_flow(bus_pos, hc_mw)
+            if not _is_feasible(margins):
+                hc_mw, constraint, element = _search(bus_pos, min(est_mw, hc_mw), hc_mw, margins_base, infeasible=(hc_mw, margins))
+                hour_binding = i_hour
+        results.append((bus_pos, hc_mw, constraint, element, hour_binding, _state['n_power_flows']))
+    return results
+
+
+def _calc_base_states(i_hours):
+    """ Run power flow for the base operating states (without new load) for a list of hours """
+    import pandapower as pp
+    net = _state['net']
+    topology = _state['topology']
+    n_bus = len(net.bus.index)
+    n_branch = len(net.line.index)
+    vm = np.zeros((len(i_hours), n_bus))
+    p_branch = np.zeros((len(i_hours), n_branch))
+    q_branch = np.zeros((len(i_hours), n_branch))
+    vm_branch = np.zeros((len(i_hours), n_branch))
+    base = []
+    net.load.at[_state['idx_load'], 'p_mw'] = 0.0
+    net.load.at[_state['idx_load'], 'q_mvar'] = 0.0
+    for i, i_hour in enumerate(i_hours):
+        _set_hour(i_hour)
+        pp.runpp(net, init=_state['init'], numba=False)
+        _state['init'] = 'results'
+        vm[i, :] = net.res_bus['vm_pu'].to_numpy(dtype=float)
+        p_branch[i, :], q_branch[i, :], vm_branch[i, :] = calc_branch_flows(topology, net)
+        base.append(_check_constraints(net))
+    return vm, p_branch, q_branch, vm_branch, base
+
+
+def _run(net, bus_IDs, scaling, n_hours, n_hours_check, power_factor, p_max_mw, tol_mw, max_loading_percent, n_workers):
+    """ Run the hosting capacity calculations (see calc_hosting_capacity and calc_hosting_capacity_time_series) """
+    topology = radial_topology.from_net(net)
+    settings = {'tan_phi': math.tan(math.acos(power_factor)), 'p_max_mw': p_max_mw, 'tol_mw': tol_mw,
+        'max_loading_percent': max_loading_percent, 'tol_vm': 1e-6, 'topology': topology, 'n_power_flows': 0}
+    if n_workers is None:
+        n_workers = min(os.cpu_count() or 1, 8)
+    if bus_IDs is None:
+        bus_IDs = net.bus.index[topology.energized & (np.arange(len(net.bus.index)) != topology.pos_source)]
+    bus_pos = net.bus.index.get_indexer(bus_IDs)
+    if (bus_pos < 0).any():
+        raise KeyError('Buses not in the network: ' + str(list(pd.Index(bus_IDs)[bus_pos < 0])))
+
+    executor = ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker, initargs=(net, settings, scaling)) if n_workers > 1 else None
+    if executor is None:
+        _init_worker(net, settings, scaling)
+    try:
+        # Base operating states (without new load)
+        with instr.stage('hosting_capacity.base_power_flow', rows=n_hours):
+            hour_blocks = rpf.split_tasks(list(range(n_hours)), n_workers)
+            if executor is None:
+                base = [_calc_base_states(block) for block in hour_blocks]
+            else:
+                base = list(executor.map(_calc_base_states, hour_blocks))
+            order = np.argsort(np.concatenate(hour_blocks))
+            vm, p_branch, q_branch, vm_branch = [np.concatenate([b[k] for b in base])[order] for k in range(4)]
+            base_hours = [base_hour for b in base for base_hour in b[4]]
+            base_hours = [base_hours[i] for i in order]
+
+        # Estimates for all buses and hours from the sensitivities; for a time series, the estimate for
+        # an hour is scaled by the value of the load profile of the new load in that hour
+        with instr.stage('hosting_capacity.estimate', rows=len(bus_pos)):
+            r_pu, x_pu, s_max_MVA = get_line_data_pu(net)
+            vm_min = rpf.get_bus_vm_min(net)
+            est, est_voltage, est_loading = estimate_hosting_capacity(topology, r_pu, x_pu, s_max_MVA * max_loading_percent / 100,
+                vm, vm_min, p_branch, q_branch, vm_branch, sn_mva=net.sn_mva, power_factor=power_factor)
+            if scaling is not None:
+                with np.errstate(divide='ignore'):
+                    est = est / np.asarray(scaling[1], dtype=float)[:n_hours, np.newaxis]
+            est = est[:, bus_pos]
+            hours_check = np.argsort(est, axis=0, kind='stable')[:n_hours_check, :]
+            tasks = [(pos, [(int(i_hour), float(min(est[i_hour, j], p_max_mw)), base_hours[i_hour]) for i_hour in hours_check[:, j]])
+                for j, pos in enumerate(bus_pos)]
+
+        # Search by power flow for each bus
+        with instr.stage('hosting_capacity.search', rows=len(bus_pos)):
+            blocks = rpf.split_tasks(tasks, 4 * n_workers)
+            if executor is None:
+                results = [result for block in blocks for result in _calc_buses(block)]
+            else:
+                results = [result for results_block in executor.map(_calc_buses, blocks) for result in results_block]
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    results = pd.DataFrame(results, columns=['bus_pos', 'hosting_capacity_MW', 'binding_constraint', 'binding_element', 'hour', 'n_power_flows'])
+    results = results.set_index(net.bus.index[results['bus_pos'].to_numpy()]).drop(columns=['bus_pos']).reindex(bus_IDs)
+    results.index.name = 'bus_i'
+    est_bus = pd.Series(est.min(axis=0), index=bus_IDs)
+    results.insert(1, 'estimate_MW', est_bus.clip(upper=p_max_mw))
+    return results
+
+
+@instr.instrumented('calc_hosting_capacity', rows=len)
+def calc_hosting_capacity(net, bus_IDs=None, power_factor=0.95, p_max_mw=20.0, tol_mw=0.01, max_loading_percent=100.0, n_workers=None):
+    """ Calculate the hosting capacity for new load at each bus for the operating state given by the loads of
+        the network (e.g., the peak load model, possibly after applying a load scenario by
+        load_scenarios.apply_scenario_to_net)
+
+        Inputs:
+            net: pandapower network of a radial grid (not modified)
+            bus_IDs: List of bus IDs to calculate the hosting capacity for (optional; default: all
+                energized buses except the source bus)
+            power_factor: Power factor (lagging) of the new load (optional; default: 0.95; e.g. 1.0
+                for charging stations)
+            p_max_mw: Largest load to consider (MW); buses where this can be added without violating any
+                constraints get this hosting capacity and binding constraint 'none' (optional; default: 20 MW)
+            tol_mw: Tolerance of the hosting capacity (MW) (optional; default: 0.01 MW)
+            max_loading_percent: Upper limit for the line loading (% of max_i_ka) (optional; default: 100)
+            n_workers: Number of worker processes (optional; default: number of CPUs, at most 8;
+                1 to run in the calling process)
+
+        Outputs:
+            results: DataFrame indexed by bus ID with columns 'hosting_capacity_MW', 'estimate_MW' (from
+                the sensitivities), 'binding_constraint' ('voltage', 'line_loading', 'convergence' or
+                'none'), 'binding_element' (bus ID or line ID), 'hour' (always 0) and 'n_power_flows'
+    """
+    return _run(net, bus_IDs, None, 1, 1, power_factor, p_max_mw, tol_mw, max_loading_percent, n_workers)
+
+
+@instr.instrumented('calc_hosting_capacity_time_series', rows=len)
+def calc_hosting_capacity_time_series(net, profiles_mapped, hours=None, profile_new=None, bus_IDs=None, n_hours_check=3,
+        power_factor=0.95, p_max_mw=20.0, tol_mw=0.01, max_loading_percent=100.0, n_workers=None):
+    """ Calculate the hosting capacity for new load at each bus for a time series of operating states, i.e.
+        the largest (peak) load that can be added without violating the constraints in any hour. Power flow
+        is run for the base operating state of each hour, and the hosting capacity is estimated from
+        the sensitivities for each hour; the search by power flow is then only run for the hours with the
+        lowest estimates for each bus.
+
+        Inputs:
+            net: pandapower network of a radial grid with the peak load of each load (not modified)
+            profiles_mapped: DataFrame with relative load profiles mapped to buses (e.g., from
+                load_profiles.map_rel_load_profiles or map_cs_load_profiles); rows are hours and columns
+                are bus IDs (the names of the loads of net.load); loads without a profile are not scaled
+            hours: List of hours (row indices of profiles_mapped) (optional; default: all hours)
+            profile_new: Array-like with the relative load profile of the new load for the hours (e.g.,
+                a charging station profile) (optional; default: constant load)
+            bus_IDs: see calc_hosting_capacity
+            n_hours_check: Number of hours with the lowest estimates to run the search for for each bus
+                (optional; default: 3)
+            power_factor, p_max_mw, tol_mw, max_loading_percent, n_workers: see calc_hosting_capacity
+
+        Outputs:
+            results: DataFrame indexed by bus ID as for calc_hosting_capacity, where the hosting capacity
+                refers to the peak of the new load and 'hour' is the hour with the binding constraint
+    """
+    if hours is None:
+        hours = profiles_mapped.index
+    hours = pd.Index(hours)
+    names_load = net.load['name'].to_numpy()
+    scaling_base = np.ones((len(hours), len(names_load)))
+    has_profile = pd.Index(names_load).isin(profiles_mapped.columns)
+    scaling_base[:, has_profile] = profiles_mapped.loc[hours, names_load[has_profile]].to_numpy(dtype=float)
+    scaling_new = np.ones(len(hours)) if profile_new is None else np.asarray(profile_new, dtype=float)
+    if len(scaling_new) != len(hours):
+        raise ValueError('The load profile of the new load must have one value per hour')
+
+    results = _run(net, bus_IDs, (scaling_base, scaling_new), len(hours), n_hours_check, power_factor, p_max_mw, tol_mw,
+        max_loading_percent, n_workers)
+    results['hour'] = hours[results['hour'].to_numpy(dtype=int)]
+    return results
@@ -0,0 +1,306 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 2026-10-19
+
+Module for opt-in instrumentation of the analysis pipeline (reading grid and load data, applying load
+scenarios, power flow, etc.), recording the wall time, number of calls, memory use and number of rows
+processed for each stage, for finding out where the time goes in a run.
+
+Instrumentation is disabled by default, and the instrumented functions then only check a flag. It is
+enabled by calling enable() or by setting the environment variable CINELDI_INSTRUMENTATION=1 (and
+CINELDI_INSTRUMENTATION_MEMORY=1 to also trace memory allocations by tracemalloc); if the environment
+variable CINELDI_INSTRUMENTATION_REPORT is set to a file name (.json or .csv), a report is written to
+this file at exit, and if CINELDI_INSTRUMENTATION_TRACE is set, a trace is written at exit (see write_trace).
+
+Example:
+    import instrumentation as instr
+    instr.enable()
+    with instr.stage('my_analysis') as st:
+        ...
+        st.set_rows(len(df.index))
+    instr.write_report('report.csv')
+    instr.write_trace('trace.json')  # Open in chrome://tracing, https://ui.perfetto.dev or speedscope
+"""
+
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+import pandas as pd
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows; peak RSS is then not recorded
+    resource = None
+
+_enabled = False
+_trace_memory = False
+_t0 = time.perf_counter()
+_events = []
+_local = threading.local()
+
+
+def enable(trace_memory=False):
+    """ Enable instrumentation
+
+        Inputs:
+            trace_memory: True to trace memory allocations by tracemalloc for each stage (this slows
+                down the code considerably) (optional; default: False)
+    """
+    global _enabled, _trace_memory
+    _enabled = True
+    _trace_memory = trace_memory
+    if trace_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+def disable():
+    """ Disable instrumentation (recorded events are kept until reset() is called) """
+    global _enabled, _trace_memory
+    _enabled = False
+    if _trace_memory and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    _trace_memory = False
+
+
+def is_enabled():
+    return _enabled
+
+
+def reset():
+    """ Remove all recorded events """
+    global _t0
+    _events.clear()
+    _t0 = time.perf_counter()
+
+
+def _get_stack():
+    if not hasattr(_local, 'stack'):
+        _local.stack = []
+    return _local.stack
+
+
+def _get_peak_rss_MB():
+    if resource is None:
+        return float('nan')
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss / 1024**2 if os.uname().sysname == 'Darwin' else maxrss / 1024
+
+
+class _null_stage(object):
+    """ Stage object used when instrumentation is disabled (does nothing) """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+    def start(self):
+        return self
+
+    def stop(self, rows=None):
+        pass
+
+    def set_rows(self, rows):
+        pass
+
+
+_null = _null_stage()
+
+
+class _stage(object):
+    """ Stage object recording an event when the stage is stopped (or the with block is exited) """
+
+    def __init__(self, name, rows=None):
+        self.name = name
+        self.rows = rows
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+        return False
+
+    def start(self):
+        stack = _get_stack()
+        self.path = tuple(stage.name for stage in stack) + (self.name,)
+        self.child_time = 0.0
+        self.child_mem_peak = 0
+        if _trace_memory:
+            self.mem_start = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        stack.append(self)
+        self.t_start = time.perf_counter()
+        return self
+
+    def set_rows(self, rows):
+        self.rows = rows
+
+    def stop(self, rows=None):
+        t_end = time.perf_counter()
+        if rows is not None:
+            self.rows = rows
+        stack = _get_stack()
+        if self not in stack:
+            return
+        # Stages left open (e.g., by an exception between start() and stop()) are discarded
+        while stack.pop() is not self:
+            pass
+        duration = t_end - self.t_start
+
+        event = {'name': self.name, 'path': self.path, 'start_s': self.t_start - _t0, 'duration_s': duration,
+            'self_s': duration - self.child_time, 'rows': self.rows, 'thread': threading.get_ident(),
+            'peak_rss_MB': _get_peak_rss_MB(), 'mem_delta_MB': float('nan'), 'mem_peak_MB': float('nan')}
+        if _trace_memory and hasattr(self, 'mem_start'):
+            # The peak is reset when a stage is started, so the peak of a stage is the largest of the peak
+            # since the last child stage ended and the peaks of the child stages
+            current, peak = tracemalloc.get_traced_memory()
+            peak_abs = max(peak, self.child_mem_peak)
+            event['mem_delta_MB'] = (current - self.mem_start) / 1024**2
+            event['mem_peak_MB'] = (peak_abs - self.mem_start) / 1024**2
+            if len(stack) > 0:
+                stack[-1].child_mem_peak = max(stack[-1].child_mem_peak, peak_abs)
+        if len(stack) > 0:
+            stack[-1].child_time += duration
+        _events.append(event)
+
+
+def stage(name, rows=None):
+    """ Return a stage to be used as a context manager (with instr.stage('name') as st: ...) or started and
+        stopped explicitly (st = instr.stage('name').start(); ...; st.stop()); stages can be nested
+
+        Inputs:
+            name: Name of the stage
+            rows: Number of rows (e.g., time steps, buses or branches) processed in the stage; can also be
+                set later by st.set_rows() or st.stop(rows) (optional)
+
+        Outputs:
+            stage: Stage object (does nothing if instrumentation is disabled)
+    """
+    if not _enabled:
+        return _null
+    return _stage(name, rows)
+
+
+def instrumented(name=None, rows=None):
+    """ Decorator recording each call of a function as a stage
+
+        Inputs:
+            name: Name of the stage (optional; default: the qualified name of the function)
+            rows: Function returning the number of rows processed given the return value of the
+                function (optional; default: None)
+    """
+    def decorator(func):
+        name_stage = name if name is not None else func.__module__ + '.' + func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            st = _stage(name_stage).start()
+            try:
+                result = func(*args, **kwargs)
+                if rows is not None:
+                    st.set_rows(rows(result))
+                return result
+            finally:
+                st.stop()
+        return wrapper
+    return decorator
+
+
+def wrap_function(owner, attribute, name=None, rows=None):
+    """ Replace a function of a module or class (e.g., pandapower.runpp) by an instrumented version
+
+        Inputs:
+            owner: Module or class with the function
+            attribute: Name of the function
+            name: Name of the stage (optional; default: owner name and function name)
+            rows: see instrumented (optional)
+
+        Outputs:
+            func: The original function (for restoring it with setattr(owner, attribute, func))
+    """
+    func = getattr(owner, attribute)
+    if name is None:
+        name = getattr(owner, '__name__', type(owner).__name__) + '.' + attribute
+    setattr(owner, attribute, instrumented(name, rows)(func))
+    return func
+
+
+def get_events():
+    """ Return all recorded events (one row per call of a stage) as a DataFrame """
+    columns = ['name', 'path', 'start_s', 'duration_s', 'self_s', 'rows', 'thread', 'peak_rss_MB', 'mem_delta_MB', 'mem_peak_MB']
+    events = pd.DataFrame(list(_events), columns=columns)
+    events['path'] = events['path'].map(';'.join)
+    events['rows'] = pd.to_numeric(events['rows'])
+    return events
+
+
+def get_report():
+    """ Return a summary of the recorded events
+
+        Outputs:
+            report: DataFrame indexed by stage name with columns 'count', 'total_s', 'self_s' (time not
+                spent in nested stages), 'mean_s', 'max_s', 'share_total' (share of the total time of the
+                top-level stages), 'rows', 'peak_rss_MB', 'mem_delta_MB' and 'mem_peak_MB'
+    """
+    events = get_events()
+    grouped = events.groupby('name', sort=False)
+    report = pd.DataFrame({'count': grouped.size(), 'total_s': grouped['duration_s'].sum(),
+        'self_s': grouped['self_s'].sum(), 'mean_s': grouped['duration_s'].mean(), 'max_s': grouped['duration_s'].max(),
+        'rows': grouped['rows'].sum(min_count=1), 'peak_rss_MB': grouped['peak_rss_MB'].max(),
+        'mem_delta_MB': grouped['mem_delta_MB'].sum(min_count=1), 'mem_peak_MB': grouped['mem_peak_MB'].max()})
+    total_top = events.loc[~events['path'].str.contains(';'), 'duration_s'].sum()
+    report.insert(5, 'share_total', report['self_s'] / total_top if total_top > 0 else float('nan'))
+    report.index.name = 'stage'
+    return report.sort_values('total_s', ascending=False)
+
+
+def write_report(filename):
+    """ Write the summary of the recorded events (see get_report) to a .json or .csv file """
+    report = get_report()
+    if os.path.splitext(filename)[1] == '.json':
+        report.reset_index().to_json(filename, orient='records', indent=1)
+    else:
+        report.to_csv(filename, sep=';')
+
+
+def write_trace(filename):
+    """ Write the recorded events as a trace that can be viewed as a flame graph, either on the Chrome
+        trace event format (.json; for chrome://tracing, Perfetto or speedscope) or otherwise on the
+        "collapsed stacks" format of flamegraph.pl (one line per stack with the self time in microseconds)
+    """
+    events = get_events()
+    if os.path.splitext(filename)[1] == '.json':
+        pid = os.getpid()
+        trace = [{'name': event.name, 'ph': 'X', 'ts': event.start_s * 1e6, 'dur': event.duration_s * 1e6,
+            'pid': pid, 'tid': int(event.thread), 'args': {} if pd.isna(event.rows) else {'rows': int(event.rows)}}
+            for event in events.itertuples()]
+        with open(filename, 'w') as f:
+            json.dump({'traceEvents': trace, 'displayTimeUnit': 'ms'}, f)
+    else:
+        self_us = (events.groupby('path', sort=False)['self_s'].sum() * 1e6).round().astype(int)
+        with open(filename, 'w') as f:
+            f.writelines(path + ' ' + str(value) + '\n' for path, value in self_us.items())
+
+
+def _write_at_exit():
+    if len(_events) == 0:
+        return
+    if os.environ.get('CINELDI_INSTRUMENTATION_REPORT'):
+        write_report(os.environ['CINELDI_INSTRUMENTATION_REPORT'])
+    if os.environ.get('CINELDI_INSTRUMENTATION_TRACE'):
+        write_trace(os.environ['CINELDI_INSTRUMENTATION_TRACE'])
+
+
+if os.environ.get('CINELDI_INSTRUMENTATION', '0') not in ('', '0'):
+    enable(trace_memory=os.environ.get('CINELDI_INSTRUMENTATION_MEMORY', '0') not in ('', '0'))
+atexit.register(_write_at_exit)
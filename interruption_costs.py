@@ -0,0 +1,233 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 2026-10-19
+
+Module for evaluating customer interruption costs (the cost functions of the Norwegian KILE
+regulation) for arbitrary interruption durations and customer types, and for calculating expected
+interruption costs for each load point and each hour of the year.
+"""
+
+import numpy as np
+import pandas as pd
+from functools import lru_cache
+
+# Average consumer price index for the year that the customer cost functions are defined for (2017)
+# and for the reference year for the data set (2021)
+# (Source: https://www.ssb.no/priser-og-prisindekser/konsumpriser/statistikk/konsumprisindeksen)
+KPI_2017 = 105.5
+KPI_2021 = 116.1
+
+# Customer types in the load data that use the cost function of another customer type
+customer_type_aliases = {'energy-intensive industries': 'industry'}
+
+# Piecewise linear specific interruption cost functions (NOK/kW at cost level 2017) for the reference time,
+# c_ref(r) = a + b * (r - r_offset_h) for r_start_h <= r < (start of next segment)
+# (Source: https://lovdata.no/forskrift/1999-03-11-302/§9-2)
+# NB: Only the segments used for interruptions of 1 hour and longer are included here; the first segment
+# is extrapolated for shorter interruptions. A full table can be given as a .csv file with the same columns.
+cost_function_segments_2017 = [
+    ('residential', 0, 8.8, 14.7, 0),
+    ('residential', 2, 38.4, 21.9, 2),
+    ('agriculture', 0, 21.4, 17.5, 1),
+    ('agriculture', 4, 74.2, 16.1, 4),
+    ('public', 0, 194.5, 31.4, 1),
+    ('public', 4, 288.9, 58.2, 4),
+    ('industry', 0, 132.6, 92.5, 1),
+    ('industry', 4, 410.3, 62.5, 4),
+    ('commercial', 0, 220.3, 102.4, 1),
+    ('commercial', 4, 527.2, 158.8, 4)]
+
+
+@lru_cache(maxsize=None)
+def read_cost_function_table(filename_cost_functions=None):
+    """ Read table with segments of the piecewise linear cost functions (cached, so that the
+        file is only read once per process)
+
+        Inputs:
+            filename_cost_functions: Full path of .csv file with columns 'customer_type', 'r_start_h',
+                'a', 'b' and 'r_offset_h' (optional; default: None, i.e. use cost_function_segments_2017)
+
+        Outputs:
+            table: DataFrame with one row per segment
+    """
+    if filename_cost_functions is None:
+        table = pd.DataFrame(cost_function_segments_2017, columns=['customer_type', 'r_start_h', 'a', 'b', 'r_offset_h'])
+    else:
+        table = pd.read_csv(filename_cost_functions, sep=';')
+    return table.sort_values(['customer_type', 'r_start_h'], kind='stable').reset_index(drop=True)
+
+
+class interruption_cost_functions(object):
+
+    def __init__(self, filename_cost_functions=None, cost_level_factor=KPI_2021/KPI_2017):
+        """
+        Initialization of interruption cost function object. The coefficient table is converted once to
+        arrays (customer types x segments), so that the cost functions can be evaluated for arrays of
+        interruption durations and customer types without any loops.
+
+        Inputs:
+            filename_cost_functions: Full path of .csv file with cost function segments
+                (optional; see read_cost_function_table)
+            cost_level_factor: Factor for converting from the cost level of the cost functions to the
+                cost level to use (optional; default: from 2017 to 2021 by the consumer price index)
+        """
+        table = read_cost_function_table(filename_cost_functions)
+        customer_types = pd.Index(table['customer_type'].unique(), name='customer_type')
+        n_segments = table.groupby('customer_type').size().max()
+
+        # Pad segments with start time infinity for customer types with fewer segments
+        r_start = np.full((len(customer_types), n_segments), np.inf)
+        coeffs = np.zeros((3, len(customer_types), n_segments))
+        i_type = customer_types.get_indexer(table['customer_type'])
+        i_segment = table.groupby('customer_type').cumcount().to_numpy()
+        r_start[i_type, i_segment] = table['r_start_h'].to_numpy(dtype=float)
+        r_start[:, 0] = -np.inf
+        coeffs[:, i_type, i_segment] = table[['a', 'b', 'r_offset_h']].to_numpy(dtype=float).T
+
+        # Store variables to object
+        self.customer_types = customer_types
+        self.r_start = r_start
+        self.coeffs = coeffs
+        self.cost_level_factor = cost_level_factor
+
+
+    def get_type_indices(self, customer_types):
+        """ Return the row indices in the coefficient arrays for an array of customer type names """
+        customer_types = np.asarray(customer_types, dtype=object)
+        customer_types_mapped = np.vectorize(lambda c: customer_type_aliases.get(c, c), otypes=[object])(customer_types)
+        i_type = self.customer_types.get_indexer(customer_types_mapped.ravel()).reshape(customer_types.shape)
+        if (i_type < 0).any():
+            raise ValueError('No cost function defined for customer types: ' + str(set(customer_types[i_type < 0].ravel())))
+        return i_type
+
+
+    def calc_c_ref(self, r, customer_types):
+        """ Evaluate the specific interruption cost for the reference time; with the default cost functions
+            (cost_function_segments_2017), the costs for durations below 1 hour are extrapolated from the
+            first segment
+
+            Inputs:
+                r: Interruption duration(s) in hours (scalar or array)
+                customer_types: Customer type name(s) (scalar or array broadcastable with r)
+
+            Outputs:
+                c_ref: Array of specific interruption costs (NOK/kW) with the broadcast shape of the inputs
+        """
+        r, i_type = np.broadcast_arrays(np.asarray(r, dtype=float), self.get_type_indices(customer_types))
+
+        # Index of the segment of each duration is the number of segment start times below it, minus one
+        i_segment = (self.r_start[i_type] <= r[..., np.newaxis]).sum(axis=-1) - 1
+        a, b, r_offset = self.coeffs[:, i_type, i_segment]
+        return (a + b * (r - r_offset)) * self.cost_level_factor
+
+
+    def calc_c_ref_all_types(self, r):
+        """ Evaluate the specific interruption cost for the reference time for all customer types
+
+            Inputs:
+                r: Array of interruption durations in hours
+
+            Outputs:
+                c_ref: Array (durations... x customer types) of specific interruption costs (NOK/kW)
+        """
+        r = np.asarray(r, dtype=float)
+        return self.calc_c_ref(r[..., np.newaxis], self.customer_types.to_numpy())
+
+
+    def calc_expected_cost_hourly(self, analysis, load_lp, shares, correction_factors=None):
+        """ Calculate expected interruption costs for each load point and each hour of the year, letting the
+            interrupted load be the load demand in the hour of the failure
+
+            Inputs:
+                analysis: reliability_analysis object (see reliability_analysis.py) defining the failure
+                    frequencies and durations and which load points are affected by each failure
+                load_lp: Array (hours x load points) with load demand in MW for the load points
+                    (in the same order as analysis.load_points)
+                shares: DataFrame (load points x customer types) with the share of the load per customer type,
+                    e.g. from get_shares_load_points
+                correction_factors: Correction factors for the time dependence of the specific costs relative to
+                    the reference time, either an array (hours) for all customer types, a DataFrame (hours x
+                    customer types) or dictionary with an array (hours) per customer type, with customer type
+                    names as column labels or keys (all customer types of shares must be included), or an
+                    array (hours x customer types) with the customer types in the order of self.customer_types
+                    (alphabetical for the default cost functions) (optional; default: None, i.e. no correction)
+
+            Outputs:
+                cost_hourly: Array (hours x load points) with expected interruption costs (NOK)
+                    for failures occurring in each hour
+
+            NB: With the default cost functions, the costs for durations below 1 hour, including the costs
+            until sectioning (analysis.sectioning_time, e.g. 0.5 hours), are extrapolated from the first
+            segment of the cost functions (see cost_function_segments_2017).
+        """
+        load_lp = np.asarray(load_lp, dtype=float)
+        n_hours = load_lp.shape[0]
+
+        # Expected cost per kW interrupted for each load point and customer type, summed over all
+        # failures affecting the load point (with durations until repair or until sectioning)
+        r_sec_perm = np.minimum(analysis.sectioning_time, analysis.r_perm)
+        r_sec_temp = np.minimum(analysis.sectioning_time, analysis.r_temp)
+        cost_repair = analysis.lambda_perm[:, np.newaxis] * self.calc_c_ref_all_types(analysis.r_perm) \
+            + analysis.lambda_temp[:, np.newaxis] * self.calc_c_ref_all_types(analysis.r_temp)
+        cost_sectioning = analysis.lambda_perm[:, np.newaxis] * self.calc_c_ref_all_types(r_sec_perm) \
+            + analysis.lambda_temp[:, np.newaxis] * self.calc_c_ref_all_types(r_sec_temp)
+        cost_per_kW = analysis.sum_over_affected(cost_repair, cost_sectioning)
+
+        # Weight the costs by the share of the load for each customer type
+        i_type = self.get_type_indices(shares.columns)
+        cost_per_kW_types = np.zeros((len(shares.index), len(self.customer_types)))
+        np.add.at(cost_per_kW_types.T, i_type, (cost_per_kW[:, i_type] * shares.to_numpy(dtype=float)).T)
+
+        if correction_factors is None:
+            correction_factors = np.ones((n_hours, 1))
+            cost_per_kW_types = cost_per_kW_types.sum(axis=1, keepdims=True)
+        elif isinstance(correction_factors, (pd.DataFrame, dict)):
+            correction_factors = self._arrange_correction_factors(correction_factors, n_hours, i_type)
+        else:
+            correction_factors = np.asarray(correction_factors, dtype=float)
+            if correction_factors.ndim == 1:
+                correction_factors = correction_factors[:, np.newaxis]
+                cost_per_kW_types = cost_per_kW_types.sum(axis=1, keepdims=True)
+            elif correction_factors.shape[1] != len(self.customer_types):
+                raise ValueError('Correction factors must have one column per customer type, in the order '
+                    + str(self.customer_types.to_list()) + ' (or be given as a DataFrame or dictionary by customer type)')
+
+        # Failure rates are per year, so the expected cost for failures in a given hour is 1/8760 of the annual rate
+        cost_hourly = load_lp * 1000 * (correction_factors @ cost_per_kW_types.T) / n_hours
+        return cost_hourly
+
+
+    def _arrange_correction_factors(self, correction_factors, n_hours, i_type_required):
+        """ Arrange correction factors given by customer type name (DataFrame or dictionary) as an array
+            (hours x customer types, in the order of self.customer_types); the factors are 1 for customer types
+            that are not given, which must not be any of the customer types with indices i_type_required """
+        names = list(correction_factors.keys())
+        i_type = self.get_type_indices(names)
+        if len(set(i_type)) < len(i_type):
+            raise ValueError('Correction factors given more than once for the same cost function: ' + str(names))
+        missing = sorted(set(i_type_required) - set(i_type))
+        if missing:
+            raise ValueError('No correction factors for customer types: ' + str(self.customer_types[missing].to_list()))
+        arranged = np.ones((n_hours, len(self.customer_types)))
+        for i, name in zip(i_type, names):
+            arranged[:, i] = np.asarray(correction_factors[name], dtype=float)
+        return arranged
+
+
+def get_shares_load_points(share_load, mapping_load, bus_IDs_load_points):
+    """ Get the share of the load per customer type for load points in the grid
+
+        Inputs:
+            share_load: DataFrame with the share of load per customer type for each load time series, as in
+                share_load_per_customer_type.csv (column 'time_series_ID' and one column per customer type)
+            mapping_load: DataFrame with mapping between load time series and buses (columns 'bus_i'
+                and 'time_series_ID')
+            bus_IDs_load_points: List of bus IDs of the load points
+
+        Outputs:
+            shares: DataFrame (load point bus IDs x customer types) with the share of load per customer type
+    """
+    time_series_IDs = mapping_load.set_index('bus_i').loc[bus_IDs_load_points, 'time_series_ID']
+    shares = share_load.set_index('time_series_ID').loc[time_series_IDs]
+    shares.index = pd.Index(bus_IDs_load_points, name='bus_i')
+    return shares
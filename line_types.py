@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 2026-10-19
+
+Module for matching the branches of a grid model to standard line types (e.g., from Planleggingsbok
+for kraftnett) and for calculating branch data (charging susceptance and line length) from the
+line type data, for all branches at once.
+"""
+
+import math
+import numpy as np
+import pandas as pd
+
+
+def match_line_types(branch, bus, line_type_data, baseMVA=10, decimals_R_over_X=2):
+    """ Match each branch to a standard line type with the same current rating, using the R/X ratio
+        to choose between line types with the same rating
+
+        Inputs:
+            branch: DataFrame with branch data on the (original) MATPOWER format, with columns 'f_bus',
+                'r', 'x' and 'rateA' (rating in p.u.)
+            bus: DataFrame with bus data, with column 'baseKV', indexed such that bus.loc[f_bus] gives the
+                from bus of a branch
+            line_type_data: DataFrame with standard line type data (columns 'type', 'Imax_A',
+                'R_ohm_per_km' and 'X_ohm_per_km'); the last row is assumed to be a fictitious line type
+                that is used for branches with a rating that does not match any line type
+            baseMVA: Base apparent power value of the per-unit values (optional; default: 10 MVA)
+            decimals_R_over_X: Number of decimals of the R/X ratios to compare (optional; default: 2)
+
+        Outputs:
+            id_line_type: Series (indexed as branch) with the index in line_type_data of the matched
+                line type (NaN if no line type with the same rating has the same R/X ratio)
+            report: DataFrame with one row per branch that was not uniquely matched, with columns
+                'branch', 'Imax_A', 'n_same_rating', 'n_same_R_over_X' and 'status' ('ambiguous' if
+                choosing the first of several matching line types, 'unmatched' if no line type has the
+                same rating and R/X ratio, and 'fictitious' if no line type has the same rating)
+    """
+    # Converting line ratings to units A from p.u. (in units of baseMVA)
+    baseKV = bus.loc[branch['f_bus'], 'baseKV'].to_numpy(dtype=float)
+    I_max = np.round(branch['rateA'].to_numpy(dtype=float) * baseMVA / baseKV / math.sqrt(3) * 1000)
+    R_over_X = np.round(branch['r'].to_numpy(dtype=float) / branch['x'].to_numpy(dtype=float), decimals_R_over_X)
+
+    branches = pd.DataFrame({'branch': branch.index, 'Imax_A': I_max, 'R_over_X': R_over_X})
+    types = pd.DataFrame({'id_line_type': line_type_data.index, 'Imax_A': line_type_data['Imax_A'].to_numpy(dtype=float),
+        'R_over_X_type': np.round(line_type_data['R_ohm_per_km'] / line_type_data['X_ohm_per_km'], decimals_R_over_X).to_numpy()})
+
+    # All candidate (branch, line type) pairs with the same rating
+    candidates = branches.merge(types, on='Imax_A', how='inner')
+    n_same_rating = candidates.groupby('branch').size().reindex(branch.index, fill_value=0)
+
+    # Among several line types with the same rating, keep those with the same R/X ratio
+    candidates = candidates.loc[(candidates['branch'].map(n_same_rating) == 1) | (candidates['R_over_X'] == candidates['R_over_X_type'])]
+    n_same_R_over_X = candidates.groupby('branch').size().reindex(branch.index, fill_value=0)
+    id_line_type = candidates.groupby('branch')['id_line_type'].first().reindex(branch.index)
+
+    # If the line type is not defined (according to the given mapping), assume it to be a fictitious
+    # line of negligible length (corresponding to the last entry in line_type_data)
+    is_fictitious = (n_same_rating == 0)
+    id_line_type[is_fictitious] = line_type_data.index[-1]
+
+    status = pd.Series('', index=branch.index)
+    status[(n_same_rating > 1) & (n_same_R_over_X > 1)] = 'ambiguous'
+    status[(n_same_rating > 1) & (n_same_R_over_X == 0)] = 'unmatched'
+    status[is_fictitious] = 'fictitious'
+    report = pd.DataFrame({'branch': branch.index, 'Imax_A': I_max, 'n_same_rating': n_same_rating.to_numpy(),
+        'n_same_R_over_X': n_same_R_over_X.to_numpy(), 'status': status.to_numpy()})
+    report = report.loc[report['status'] != ''].reset_index(drop=True)
+
+    return id_line_type, report
+
+
+def calc_branch_data_from_line_types(branch, bus, line_type_data, id_line_type, baseMVA=10, f_hz=50.0):
+    """ Calculate line lengths and charging susceptances of the branches from the matched standard line types
+
+        Inputs:
+            branch: DataFrame with branch data on the (original) MATPOWER format (columns 'f_bus' and 'r')
+            bus: DataFrame with bus data (column 'baseKV'; see match_line_types)
+            line_type_data: DataFrame with standard line type data (columns 'type', 'R_ohm_per_km'
+                and 'Cd_nF_per_km' (operating capacitance, "driftskapasitet"))
+            id_line_type: Series with the index in line_type_data of the line type of each branch
+                (from match_line_types)
+            baseMVA: Base apparent power value of the per-unit values (optional; default: 10 MVA)
+            f_hz: Frequency of the grid (optional; default: 50 Hz)
+
+        Outputs:
+            b: Array with charging susceptance (p.u.) of each branch
+            type_line: Array with the identifier/name of the line type of each branch
+            length_km: Array with the estimated length (km) of each branch
+    """
+    omega = math.pi * f_hz  # 1/s
+
+    # Base impedance values (ohm)
+    baseKV = bus.loc[branch['f_bus'], 'baseKV'].to_numpy(dtype=float)
+    Zni = baseKV**2/baseMVA
+    r_ohm = branch['r'].to_numpy(dtype=float) * Zni
+
+    line_type_branch = line_type_data.loc[id_line_type.to_numpy()]
+    type_line = line_type_branch['type'].to_numpy()
+
+    # Calculating length of the lines from the resistance per km of the line type
+    length_km = r_ohm / line_type_branch['R_ohm_per_km'].to_numpy(dtype=float)
+
+    # Converting charging susceptance from μF (per km) to p.u.
+    c_μf = line_type_branch['Cd_nF_per_km'].to_numpy(dtype=float) / 1000 * length_km
+    b = 2*omega*Zni*c_μf/1e6
+
+    return b, type_line, length_km
+
+
+def create_bus_extra(bus):
+    """ Create additional bus data (with parameters for ZIP load model), specifying as default data
+        a constant power load at each bus with a load point
+
+        Inputs:
+            bus: DataFrame with bus data (columns 'bus_i' and 'Pd')
+
+        Outputs:
+            bus_extra: DataFrame with columns 'bus_i', 'constant_impedance', 'constant_current'
+                and 'constant_power'
+    """
+    bus_IDs_load = bus.loc[bus['Pd'] > 0, 'bus_i'].to_numpy()
+    bus_extra = pd.DataFrame({'bus_i': bus_IDs_load, 'constant_impedance': 0, 'constant_current': 0, 'constant_power': 1})
+    return bus_extra
@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 2026-10-19
+
+Module for mapping load time series (load IDs) in a load data set to buses of a grid model by solving
+a linear assignment problem, with costs based on the fit of the size of the load, the customer type and
+whether the time series are regular. The fit of the size of the load is given by the peak values of the
+time series when they are in absolute units; for normalized time series (as in the CINELDI data set), it is
+given by the load factor (mean relative to peak) of the time series, assuming that the time series with the
+highest load factors (the smoothest load) fit the buses with the highest peak load (that supply the most
+customers), i.e. by the difference between the quantiles of the peak load of the bus and of the load factor
+of the time series.
+"""
+
+import numpy as np
+import pandas as pd
+from scipy.optimize import linear_sum_assignment
+from scipy.stats import rankdata
+
+
+def get_profile_cube(load_data):
+    """ Arrange hourly load time series as a NumPy array (days x hours of the day x time series)
+
+        Inputs:
+            load_data: DataFrame with hourly load time series (rows are hours, columns are time series IDs)
+
+        Outputs:
+            cube: Array (days x 24 x time series); incomplete days at the end are omitted
+    """
+    values = load_data.to_numpy(dtype=float)
+    n_days = values.shape[0] // 24
+    return values[:n_days*24, :].reshape(n_days, 24, values.shape[1])
+
+
+def _get_quantiles(values, valid):
+    """ Quantiles (between 0 and 1, by rank) of the valid values (NaN for the others) """
+    quantiles = np.full(len(values), np.nan)
+    if valid.any():
+        quantiles[valid] = (rankdata(values[valid]) - 0.5) / np.count_nonzero(valid)
+    return quantiles
+
+
+def calc_mapping_cost_matrix(P_bus, peak_series, share_type_series, irregular_series, share_type_target=None,
+        weight_peak=1.0, weight_type=1.0, weight_irregular=1000.0, load_factor_series=None):
+    """ Calculate the cost of assigning each load time series to each bus
+
+        Inputs:
+            P_bus: Array with the peak load (MW) at each bus
+            peak_series: Array with the peak value of each time series (in MW, or NaN if the time series
+                are normalized so that the peak values carry no information)
+            share_type_series: Array (time series) with the share of the load of the customer type
+                that is wanted at the buses with a target customer type (e.g. residential)
+            irregular_series: Boolean array with True for time series that are irregular
+            share_type_target: Boolean array with True for buses that should preferably be assigned
+                time series of the customer type (optional; default: None, i.e. no buses)
+            weight_peak: Weight of the relative deviation (log-ratio) between the peak load of the bus
+                and the time series, or of the difference between the quantiles of the peak load of the bus
+                and of the load factor of the time series if the peak value is NaN (optional; default: 1.0)
+            weight_type: Weight of the share of the load of other customer types (optional; default: 1.0)
+            weight_irregular: Cost of assigning an irregular time series (optional; default: 1000.0, so
+                that irregular time series are only assigned if there are not enough regular ones)
+            load_factor_series: Array with the load factor (mean relative to peak) of each time series,
+                used for the fit of the size of the load for time series without a peak value (optional)
+
+        Outputs:
+            cost: Array (buses x time series) with assignment costs
+    """
+    P_bus = np.asarray(P_bus, dtype=float)
+    peak_series = np.asarray(peak_series, dtype=float)
+    cost = np.zeros((len(P_bus), len(peak_series)))
+
+    # Fit of the peak load, only for buses with a load and time series with a positive peak value
+    valid_bus = P_bus > 0
+    valid_series = np.isfinite(peak_series) & (peak_series > 0)
+    log_ratio = np.log(np.where(valid_series, peak_series, 1.0))[np.newaxis, :] - np.log(np.where(valid_bus, P_bus, 1.0))[:, np.newaxis]
+    cost += weight_peak * np.where(valid_bus[:, np.newaxis] & valid_series[np.newaxis, :], np.abs(log_ratio), 0.0)
+
+    # For time series without a peak value (normalized), the quantile of the load factor of the time series
+    # should match the quantile of the peak load of the bus (the smoothest load at the largest buses)
+    if load_factor_series is not None:
+        load_factor_series = np.asarray(load_factor_series, dtype=float)
+        valid_load_factor = np.isfinite(load_factor_series) & ~valid_series
+        quantile_bus = _get_quantiles(P_bus, valid_bus)
+        quantile_series = _get_quantiles(load_factor_series, valid_load_factor)
+        cost += weight_peak * np.where(valid_bus[:, np.newaxis] & valid_load_factor[np.newaxis, :],
+            np.abs(np.nan_to_num(quantile_bus)[:, np.newaxis] - np.nan_to_num(quantile_series)[np.newaxis, :]), 0.0)
+
+    # Share of the load not being of the target customer type for buses with a target customer type
+    if share_type_target is not None:
+        share_type_target = np.asarray(share_type_target, dtype=bool)
+        cost += weight_type * share_type_target[:, np.newaxis] * (1 - np.asarray(share_type_series, dtype=float))[np.newaxis, :]
+
+    cost += weight_irregular * np.asarray(irregular_series, dtype=float)[np.newaxis, :]
+    return cost
+
+
+def create_load_mapping(net, load_data, load_IDs_irregular, bus_IDs_new, share_residential=None,
+        load_IDs_residential=None, normalized=True, **kwargs):
+    """ Create mapping between load time series and buses with existing loads in the network and buses
+        with potential new (residential) loads; each time series is used at most once, and the
+        result is deterministic
+
+        Inputs:
+            net: pandapower network object with the existing loads (net.load with columns 'bus' and 'p_mw')
+            load_data: DataFrame with hourly load time series (rows are hours, columns are time series IDs)
+            load_IDs_irregular: List of IDs of irregular time series (time_series_IDs_irregular.csv)
+            bus_IDs_new: List of bus IDs of potential new residential loads (e.g., LECs in a load scenario)
+            share_residential: Series with the share of residential load indexed by time series ID (e.g.,
+                the 'residential' column of share_load_per_customer_type.csv) (optional)
+            load_IDs_residential: List of IDs of primarily residential time series (as in
+                time_series_IDs_primarily_residential.csv), used if share_residential is not given (optional)
+            normalized: True if the load data are normalized, so that their peak values do not say
+                anything about the fit to the peak load of the buses; the load factors of the time series
+                are then used instead (see the description of the module) (optional; default: True)
+            **kwargs: Weights passed on to calc_mapping_cost_matrix
+
+        Outputs:
+            mapping_load_to_bus: DataFrame indexed by bus ID ('bus_i') with columns 'time_series_ID' and
+                'existing_load', on the format of mapping_loads_to_CINELDI_MV_reference_grid.csv
+    """
+    # Sort inputs so that the result does not depend on the order of the input data
+    load_IDs = np.sort(np.array([int(col_name) for col_name in load_data.columns]))
+    load_data = load_data.set_axis([int(col_name) for col_name in load_data.columns], axis=1).loc[:, load_IDs]
+    load_existing = net.load.groupby('bus')['p_mw'].sum().sort_index()
+    bus_IDs_new = sorted(set(bus_IDs_new) - set(load_existing.index))
+    bus_IDs = list(load_existing.index) + bus_IDs_new
+    P_bus = np.concatenate([load_existing.to_numpy(dtype=float), np.zeros(len(bus_IDs_new))])
+
+    if len(bus_IDs) > len(load_IDs):
+        raise ValueError('More buses to map than there are load time series')
+
+    cube = get_profile_cube(load_data)
+    peak = cube.max(axis=(0, 1))
+    if normalized:
+        peak_series = np.full(len(load_IDs), np.nan)
+    else:
+        peak_series = peak / 1000
+    with np.errstate(divide='ignore', invalid='ignore'):
+        load_factor_series = np.where(peak > 0, cube.mean(axis=(0, 1)) / peak, np.nan)
+
+    if share_residential is not None:
+        share_type_series = share_residential.reindex(load_IDs, fill_value=0).to_numpy(dtype=float)
+    elif load_IDs_residential is not None:
+        share_type_series = np.isin(load_IDs, load_IDs_residential).astype(float)
+    else:
+        share_type_series = np.zeros(len(load_IDs))
+
+    share_type_target = np.concatenate([np.zeros(len(load_existing.index), dtype=bool), np.ones(len(bus_IDs_new), dtype=bool)])
+    irregular_series = np.isin(load_IDs, load_IDs_irregular)
+
+    cost = calc_mapping_cost_matrix(P_bus, peak_series, share_type_series, irregular_series, share_type_target,
+        load_factor_series=load_factor_series, **kwargs)
+    i_bus, i_series = linear_sum_assignment(cost)
+
+    mapping_load_to_bus = pd.DataFrame(index=pd.Index(np.asarray(bus_IDs)[i_bus], name='bus_i'))
+    mapping_load_to_bus['time_series_ID'] = load_IDs[i_series]
+    mapping_load_to_bus['existing_load'] = ~share_type_target[i_bus]
+
+    return mapping_load_to_bus
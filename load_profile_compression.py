@@ -0,0 +1,328 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 2026-10-19
+
+Module for a compressed (low-rank) representation of a large set of load profiles (hours x series), e.g.
+the relative load profiles of load_profiles.loaddata_rel for thousands of metered load points. Since the
+load profiles of different customers are highly correlated, the matrix of load profiles X is approximated
+by the product of a few basis profiles B (hours x rank) and weights W (rank x series), found either by
+truncated singular value decomposition (SVD) or by non-negative matrix factorization (NMF, with non-negative
+basis profiles and weights). The rank is the lowest that gives a relative error (root mean square error
+relative to the root mean square value over the hours) within a given tolerance for every series. Only the
+leading singular values and vectors are found (by a randomized SVD), and their number is doubled until the
+tolerance is met, instead of computing the full SVD of the load profiles.
+
+Any subset of the series or hours can be reconstructed when needed, and products with matrices (e.g., a
+mapping of series to buses or the path matrix of radial_topology) are found without reconstructing the load
+profiles, since X @ M is approximated by B @ (W @ M). The accuracy of the annual peak load and energy of each
+series can be reported by comparing to the original load profiles.
+
+Example:
+    compressed = compressed_profiles.from_profiles(profiles.loaddata_rel, tol=0.02)
+    mapped = compressed.map_profiles(filename_load_mapping, repr_days=list(range(1, 366)))
+    flows = mapped.dot(sp.diags(p_mw_bus) @ topology.path_matrix.T).reconstruct()
+"""
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+import instrumentation as instr
+
+# Number of iterations and convergence tolerance of the non-negative matrix factorization
+n_iter_nmf = 500
+tol_iter_nmf = 1e-5
+
+# Number of singular values found first by the truncated SVD (doubled until the tolerance is met), and the
+# oversampling and number of power iterations of the randomized SVD
+n_svd_initial = 16
+n_oversampling_svd = 10
+n_power_iter_svd = 2
+
+
+def _get_errors_series(X, B, W):
+    """ Relative error (root mean square error relative to the root mean square value) of each series """
+    norms = np.linalg.norm(X, axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(norms > 0, np.linalg.norm(X - B @ W, axis=0) / norms, 0.0)
+
+
+def _svd_truncated(X, k):
+    """ The k largest singular values (in descending order) and the corresponding singular vectors of X, by a
+        randomized SVD (the SVD of X projected on an orthonormal basis of the range of X @ Omega for a random
+        matrix Omega with a few more than k columns, refined by power iterations), or by the full SVD if k is
+        not much smaller than the number of hours or series """
+    n = min(X.shape)
+    if 2 * (k + n_oversampling_svd) >= n:
+        U, s, Vt = np.linalg.svd(X, full_matrices=False)
+        return U[:, :k], s[:k], Vt[:k]
+    # Fixed seed, so that the result is deterministic
+    rng = np.random.default_rng(0)
+    Q, _ = np.linalg.qr(X @ rng.standard_normal((X.shape[1], k + n_oversampling_svd)))
+    for _ in range(n_power_iter_svd):
+        Q, _ = np.linalg.qr(X.T @ Q)
+        Q, _ = np.linalg.qr(X @ Q)
+    U, s, Vt = np.linalg.svd(Q.T @ X, full_matrices=False)
+    return Q @ U[:, :k], s[:k], Vt[:k]
+
+
+def _get_rank_svd(X, s, Vt, tol):
+    """ Lowest rank for which the relative error of every series is within tol for the truncated SVD (len(s) if
+        there is none), and the largest relative error of the series for each rank up to len(s) """
+    # Squared error of each series when keeping the first r singular values, for r = 0, 1, ..., len(s)
+    # (the norm of each series is the sum of its squared components along the right singular vectors)
+    norms_squared = (X**2).sum(axis=0)
+    components_squared = (s[:, np.newaxis] * Vt)**2
+    errors_squared = np.maximum(norms_squared - np.vstack([np.zeros(X.shape[1]), np.cumsum(components_squared, axis=0)]), 0.0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        errors = np.where(norms_squared > 0, np.sqrt(errors_squared / norms_squared), 0.0).max(axis=1)
+    rank = int(np.argmax(errors <= tol)) if (errors <= tol).any() else len(s)
+    return rank, errors
+
+
+def _nmf(X, rank, n_iter=n_iter_nmf, tol_iter=tol_iter_nmf, U=None, s=None, Vt=None):
+    """ Non-negative matrix factorization X = B @ W by hierarchical alternating least squares, initialized by
+        the non-negative parts of the leading singular vectors; the largest relative error of the series is
+        also returned """
+    if U is None or len(s) < rank:
+        U, s, Vt = _svd_truncated(X, rank)
+    B = np.zeros((X.shape[0], rank))
+    W = np.zeros((rank, X.shape[1]))
+    n_svd = min(rank, len(s))
+    B[:, :n_svd] = np.abs(U[:, :n_svd]) * np.sqrt(s[:n_svd])
+    W[:n_svd] = np.abs(Vt[:n_svd]) * np.sqrt(s[:n_svd])[:, np.newaxis]
+    norm_X = np.linalg.norm(X)
+    error_last = np.inf
+    error = 0.0
+    for _ in range(n_iter):
+        BtX = B.T @ X
+        BtB = B.T @ B
+        for j in range(rank):
+            if BtB[j, j] > 0:
+                W[j] = np.maximum(W[j] + (BtX[j] - BtB[j] @ W) / BtB[j, j], 0.0)
+        XWt = X @ W.T
+        WWt = W @ W.T
+        for j in range(rank):
+            if WWt[j, j] > 0:
+                B[:, j] = np.maximum(B[:, j] + (XWt[:, j] - B @ WWt[:, j]) / WWt[j, j], 0.0)
+        error = np.linalg.norm(X - B @ W) / norm_X if norm_X > 0 else 0.0
+        if error_last - error < tol_iter * max(error, 1e-12):
+            break
+        error_last = error
+    return B, W, float(_get_errors_series(X, B, W).max())
+
+
+class compressed_profiles(object):
+
+    def __init__(self, basis, weights, index, columns, method='svd', error=np.nan):
+        """
+        Initialization of compressed load profiles object (load profiles X approximated by basis @ weights)
+
+        Inputs:
+            basis: Array (hours x rank) with the basis profiles
+            weights: Array (rank x series) with the weight of each basis profile for each series
+            index: Index of the hours (rows of the load profiles)
+            columns: Index of the series (columns of the load profiles, e.g. load IDs or bus IDs)
+            method: Method of the compression ('svd' or 'nmf') (optional)
+            error: Largest relative error of the series (see from_profiles) (optional)
+        """
+        self.basis = np.asarray(basis)
+        self.weights = np.asarray(weights)
+        self.index = pd.Index(index)
+        self.columns = pd.Index(columns)
+        self.method = method
+        self.error = error
+        if self.basis.shape != (len(self.index), self.weights.shape[0]) or self.weights.shape[1] != len(self.columns):
+            raise ValueError('The shapes of the basis profiles and the weights do not match the hours and series')
+
+
+    @classmethod
+    @instr.instrumented('compressed_profiles.from_profiles', rows=lambda compressed: len(compressed.index))
+    def from_profiles(cls, profiles, tol=0.02, method='svd', max_rank=None, dtype=np.float64):
+        """ Compress load profiles
+
+            Inputs:
+                profiles: DataFrame with load profiles; rows are hours and columns are series (e.g.,
+                    load_profiles.loaddata_rel or the output of load_profiles.map_rel_load_profiles)
+                tol: Largest relative error of any series (root mean square error relative to the root
+                    mean square value of the series over the hours) (optional; default: 0.02)
+                method: 'svd' (truncated singular value decomposition) or 'nmf' (non-negative matrix
+                    factorization, for non-negative load profiles) (optional; default: 'svd')
+                max_rank: Largest number of basis profiles (optional; default: no limit; if the tolerance
+                    cannot be met, the error is given by the attribute error)
+                dtype: Data type of the stored basis profiles and weights (optional; default: float64)
+
+            Outputs:
+                compressed: compressed_profiles object
+        """
+        X = profiles.to_numpy(dtype=float)
+        if np.isnan(X).any():
+            raise ValueError('The load profiles contain missing values')
+        # Only the leading singular values and vectors are found, increasing their number until the tolerance is met
+        rank_max = min(X.shape) if max_rank is None else min(max_rank, min(X.shape))
+        k = min(n_svd_initial, rank_max)
+        with instr.stage('load_profile_compression.svd', rows=X.shape[0]):
+            while True:
+                U, s, Vt = _svd_truncated(X, k)
+                rank, errors_svd = _get_rank_svd(X, s, Vt, tol)
+                if errors_svd[-1] <= tol or k >= rank_max:
+                    break
+                k = min(2 * k, rank_max)
+        rank = max(rank, 1)
+        if max_rank is not None:
+            rank = min(rank, max_rank)
+
+        if method == 'svd':
+            basis = U[:, :rank] * s[:rank]
+            weights = Vt[:rank]
+            error = float(errors_svd[rank])
+        elif method == 'nmf':
+            if (X < 0).any():
+                raise ValueError('Non-negative matrix factorization requires non-negative load profiles')
+            # Start from the rank of the truncated SVD, which is at least as accurate for the same rank
+            with instr.stage('load_profile_compression.nmf', rows=X.shape[0]):
+                while True:
+                    basis, weights, error = _nmf(X, rank, U=U, s=s, Vt=Vt)
+                    if error <= tol or rank >= rank_max:
+                        break
+                    rank = min(rank + max(1, rank // 4), rank_max)
+        else:
+            raise ValueError('Unknown method ' + str(method) + " (use 'svd' or 'nmf')")
+        return cls(basis.astype(dtype), weights.astype(dtype), profiles.index, profiles.columns, method, error)
+
+
+    @property
+    def rank(self):
+        """ Number of basis profiles """
+        return self.weights.shape[0]
+
+
+    @property
+    def nbytes(self):
+        """ Memory use (bytes) of the basis profiles and the weights """
+        return self.basis.nbytes + self.weights.nbytes
+
+
+    def get_compression_ratio(self):
+        """ Memory use of the load profiles (as float64) relative to that of the compressed representation """
+        return len(self.index) * len(self.columns) * 8 / self.nbytes
+
+
+    def _get_positions(self, labels, index, name):
+        if labels is None:
+            return slice(None)
+        positions = index.get_indexer(labels)
+        if (positions < 0).any():
+            raise KeyError(name + ' not found in the compressed load profiles: ' + str(list(pd.Index(labels)[positions < 0])))
+        return positions
+
+
+    def reconstruct(self, columns=None, hours=None):
+        """ Reconstruct (approximately) the load profiles of a subset of the series and hours
+
+            Inputs:
+                columns: List of series (column labels) (optional; default: all series)
+                hours: List of hours (row labels) (optional; default: all hours)
+
+            Outputs:
+                profiles: DataFrame with the reconstructed load profiles
+        """
+        pos_hours = self._get_positions(hours, self.index, 'Hours')
+        pos_columns = self._get_positions(columns, self.columns, 'Series')
+        values = self.basis[pos_hours] @ self.weights[:, pos_columns]
+        return pd.DataFrame(values, index=self.index[pos_hours], columns=self.columns[pos_columns])
+
+
+    def select(self, columns=None, hours=None, names=None):
+        """ Compressed load profiles for a subset of the series and hours (without reconstructing them)
+
+            Inputs:
+                columns, hours: see reconstruct (series may be repeated, e.g. when mapping series to buses)
+                names: New labels of the selected series (optional; default: the labels of the series)
+
+            Outputs:
+                compressed: compressed_profiles object
+        """
+        pos_hours = self._get_positions(hours, self.index, 'Hours')
+        pos_columns = self._get_positions(columns, self.columns, 'Series')
+        columns_new = self.columns[pos_columns] if names is None else names
+        return compressed_profiles(self.basis[pos_hours], self.weights[:, pos_columns], self.index[pos_hours], columns_new, self.method, self.error)
+
+
+    def dot(self, matrix, columns=None):
+        """ Compressed representation of the product of the load profiles and a matrix, found without
+            reconstructing the load profiles (e.g., a matrix (series x buses) for aggregating the load
+            profiles per bus, or sp.diags(p_mw) @ topology.path_matrix.T for the power flows of the branches
+            of a radial grid when the series are the buses)
+
+            Inputs:
+                matrix: Array or sparse matrix (series x n)
+                columns: Labels of the n columns of the product (optional; default: 0, 1, ...)
+
+            Outputs:
+                compressed: compressed_profiles object representing the product (hours x n)
+        """
+        if matrix.shape[0] != len(self.columns):
+            raise ValueError('The matrix must have one row per series (' + str(len(self.columns)) + ')')
+        if sp.issparse(matrix):
+            weights = np.asarray((matrix.T @ self.weights.T).T)
+        else:
+            weights = self.weights @ np.asarray(matrix)
+        if columns is None:
+            columns = pd.RangeIndex(matrix.shape[1])
+        return compressed_profiles(self.basis, weights, self.index, columns, self.method, np.nan)
+
+
+    def map_profiles(self, filename_load_mapping, repr_days=None):
+        """ Compressed relative load profiles mapped to the buses of the grid (as load_profiles.map_rel_load_profiles)
+
+            Inputs:
+                filename_load_mapping: Full path to file defining how load profiles are mapped onto buses of
+                    the grid model
+                repr_days: List with indices of the days of the year (1-indexed) (optional; default: all hours)
+
+            Outputs:
+                compressed: compressed_profiles object with hours 0, 1, ... of the days and bus IDs as series
+        """
+        mapping_load_to_bus = pd.read_csv(filename_load_mapping, sep=';')
+        hours = None
+        if repr_days is not None:
+            hours = self.index[np.concatenate([np.arange((day - 1) * 24, day * 24) for day in repr_days])]
+        compressed = self.select(mapping_load_to_bus['time_series_ID'].to_list(), hours, names=mapping_load_to_bus['bus_i'].to_list())
+        compressed.index = pd.RangeIndex(len(compressed.index))
+        return compressed
+
+
+    @instr.instrumented('compressed_profiles.get_accuracy', rows=len)
+    def get_accuracy(self, profiles, n_columns_block=1024):
+        """ Accuracy of the peak load and the energy of each series compared to the original load profiles
+
+            Inputs:
+                profiles: DataFrame with the original load profiles (same rows and columns)
+                n_columns_block: Number of series reconstructed at a time (to limit the memory use) (optional)
+
+            Outputs:
+                accuracy: DataFrame indexed by series with columns 'peak', 'peak_compressed', 'peak_error_percent',
+                    'energy', 'energy_compressed', 'energy_error_percent' and 'rmse' (root mean square error
+                    over the hours); the largest absolute errors (%) and the relative error of all load
+                    profiles (Frobenius norm) are given in accuracy.attrs
+        """
+        profiles = profiles.loc[self.index, self.columns]
+        results = []
+        for start in range(0, len(self.columns), n_columns_block):
+            X = profiles.iloc[:, start:start + n_columns_block].to_numpy(dtype=float)
+            X_compressed = self.basis @ self.weights[:, start:start + n_columns_block]
+            results.append((X.max(axis=0), X_compressed.max(axis=0), X.sum(axis=0), X_compressed.sum(axis=0),
+                np.sqrt(((X - X_compressed)**2).mean(axis=0)), ((X - X_compressed)**2).sum(), (X**2).sum()))
+        peak, peak_compressed, energy, energy_compressed, rmse, sum_error_squared, sum_squared = \
+            [np.concatenate(values) if np.ndim(values[0]) > 0 else np.sum(values) for values in zip(*results)]
+        # The relative errors are not defined for series with zero peak load or energy
+        with np.errstate(divide='ignore', invalid='ignore'):
+            peak_error_percent = np.where(peak != 0, (peak_compressed - peak) / np.abs(peak) * 100, np.nan)
+            energy_error_percent = np.where(energy != 0, (energy_compressed - energy) / np.abs(energy) * 100, np.nan)
+        accuracy = pd.DataFrame({'peak': peak, 'peak_compressed': peak_compressed, 'peak_error_percent': peak_error_percent,
+            'energy': energy, 'energy_compressed': energy_compressed, 'energy_error_percent': energy_error_percent,
+            'rmse': rmse}, index=self.columns)
+        accuracy.attrs['peak_error_max_percent'] = float(np.abs(accuracy['peak_error_percent']).max())
+        accuracy.attrs['energy_error_max_percent'] = float(np.abs(accuracy['energy_error_percent']).max())
+        accuracy.attrs['error'] = float(np.sqrt(sum_error_squared / sum_squared)) if sum_squared > 0 else 0.0
+        return accuracy
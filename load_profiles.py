@@ -8,15 +8,16 @@ Module for handling load profiles, i.e. time series for load demand (typically h
 """
 
 import pandas as pd
-import pandapower as pp
 import os
 from pandas.core.algorithms import isin
 from numpy import  sqrt, real, imag, pi
 import load_scenarios as ls
+import instrumentation as instr
 
 class load_profiles(object):
     
-    def __init__(self, loaddata_filename:str, normalized = True):
+    @instr.instrumented('load_profiles.__init__')
+    def __init__(self, loaddata_filename:str, normalized = True, loaddata = None):
         """
         Initialization of load profiles object. It is assumed that the input data
         are annual load demand time series with hourly resolution (kWh/h) for a set
@@ -29,17 +30,27 @@ class load_profiles(object):
             normalized:
                 True if load profile data are already normalized and unitless and meant be used to scale 
                 an absolute load value (in kWh/h); False is load data are in absolute values (units kWh/h)
+
+            loaddata:
+                DataFrame with load data that have already been read from the load data file (indexed
+                by time stamp), e.g. by a cineldi_dataset object, so that the file is not read again
+                (optional; it is not modified)
         """
 
         # Load the load data
+        st = instr.stage('load_profiles.read_load_data').start()
         filename, ext = os.path.splitext(loaddata_filename)
-        if ext == '.xlsx':
+        if loaddata is not None:
+            # Shallow copy, since only the index and column names are replaced below
+            loaddata = loaddata.copy(deep=False)
+        elif ext == '.xlsx':
             loaddata = pd.read_excel(loaddata_filename, index_col=0, parse_dates=False)
         elif ext == '.csv':
             loaddata = pd.read_csv(loaddata_filename, sep = ';', index_col=0, parse_dates=False)
         else:
             print('Error: Only .csv and .xlsx load data files supported')
             raise
+        st.stop(rows=len(loaddata.index))
 
         # Fix time stamp index of the DataFrame (not really needed, but nice to have for later processing)
         timestamp_list = [i.split(" ") for i in loaddata.index]
@@ -66,6 +77,7 @@ class load_profiles(object):
         self.load_max = load_max
 
 
+    @instr.instrumented('load_profiles.get_profile_days', rows=len)
     def get_profile_days(self,days:int):
         """
         Get (relative) load profiles for a given set of days
@@ -92,6 +104,7 @@ class load_profiles(object):
         return profile_days
 
 
+    @instr.instrumented('load_profiles.map_rel_load_profiles', rows=len)
     def map_rel_load_profiles(self, filename_load_mapping, repr_days=[29*2+1] ):
         """ 
         Return relative load profiles mapped to existing and new load points in the network
@@ -125,6 +138,7 @@ class load_profiles(object):
         return mapped_load_profiles
 
 
+    @instr.instrumented('load_profiles.map_cs_load_profiles', rows=len)
     def map_cs_load_profiles(self,mapped_load_profiles,filename_scenario,filename_load_profiles_cs=None,n_days=1):
         """ Add relative load profiles for charging stations to existing mapping of profiles to grid model
 
@@ -229,4 +243,21 @@ class load_profiles(object):
             bus_IDs_new_cs_loads = list(scen_cs_loads['bus_i'].unique())
             labels_cs_profiles = list(scen_cs_loads['label'])
         
-            return bus_IDs_new_cs_loads, labels_cs_profiles
\ No newline at end of file
+            return bus_IDs_new_cs_loads, labels_cs_profiles
+
+
+    def compress(self, tol=0.02, method='svd', max_rank=None):
+        """ Return a compressed (low-rank) representation of the relative load profiles
+            (see load_profile_compression.compressed_profiles.from_profiles)
+
+            Inputs:
+                tol: Largest relative error of the compression (optional; default: 0.02)
+                method: 'svd' or 'nmf' (optional; default: 'svd')
+                max_rank: Largest number of basis profiles (optional; default: no limit)
+
+            Outputs:
+                compressed: compressed_profiles object with the time stamps as hours and load IDs as series
+        """
+        import load_profile_compression as lpc
+
+        return lpc.compressed_profiles.from_profiles(self.loaddata_rel, tol=tol, method=method, max_rank=max_rank)
@@ -8,12 +8,13 @@ Module for handling scenarios for the long-term development of load demand in di
 """
 
 import pandas as pd
-import pandapower as pp
 import os
 import math
 from pandas.core.algorithms import isin
+import instrumentation as instr
 
 
+@instr.instrumented('apply_scenario_to_net', rows=lambda net: len(net.load.index))
 def apply_scenario_to_net(net,scenario_data,year, load_scale=1.0, power_factor=0.95):
     """ Modify network  to be consistent with long-term load scenario for some future year
 
@@ -39,6 +40,9 @@ def apply_scenario_to_net(net,scenario_data,year, load_scale=1.0, power_factor=0
             
         NB: Only scenarios for point loads are currently implemented. 
     """ 
+
+    # pandapower is only imported when it is needed (it takes a long time to import)
+    import pandapower as pp
     
     years = scenario_data['point_loads']['year_rel']
     buses = scenario_data['point_loads']['bus_i']
@@ -73,6 +77,7 @@ def apply_scenario_to_net(net,scenario_data,year, load_scale=1.0, power_factor=0
     return net
 
 
+@instr.instrumented('read_scenario_from_csv', rows=lambda scenario_data: len(scenario_data['point_loads'].index))
 def read_scenario_from_csv(folder, filename_point_load):
     """ Generate scenarios for long-term load development from .csv input file
 
@@ -105,6 +110,7 @@ def read_scenario_from_csv(folder, filename_point_load):
     return scenario_data
 
 
+@instr.instrumented('interp_for_scenario', rows=len)
 def interp_for_scenario(df,years_interp):
     """ Interpolate data evaluated for specific years in a scenario. The only type of interpolation
         that is currently supported is to let values for missing years be the previous explicitly
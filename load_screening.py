@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 2026-10-19
+
+Module for screening load time series (e.g., in the load data of a load_profiles object) to identify
+irregular time series (long runs of zeros, flat lines, spikes, etc.) and primarily residential time series,
+corresponding to time_series_IDs_irregular.csv and time_series_IDs_primarily_residential.csv in the
+CINELDI MV reference data set.
+"""
+
+import os
+import numpy as np
+import pandas as pd
+
+# Default criteria for classifying a time series as irregular
+max_zero_run_hours = 24         # Longest allowed run of consecutive hours with zero load
+max_flat_run_hours = 24         # Longest allowed run of consecutive hours with identical (non-zero) load
+max_share_zero = 0.1            # Largest allowed share of hours with zero load
+max_spikes = 10                 # Largest allowed number of isolated spikes
+min_load_factor = 0.1           # Smallest allowed ratio between average and peak load
+
+# Threshold for spikes, in number of standard deviations of the hour-to-hour changes
+spike_threshold = 8.0
+
+# Default criteria for classifying a time series as primarily residential
+min_share_residential = 0.5     # Smallest share of residential load if customer type shares are available
+min_evening_ratio = 1.1         # Smallest ratio between evening (17-21) and daytime (9-15) load on weekdays
+min_weekend_ratio = 0.95        # Smallest ratio between weekend and weekday load
+
+
+# Number of time series to screen at a time (limits memory use for large load data sets)
+n_series_chunk = 1000
+
+
+def _longest_run(mask):
+    """ Length of the longest run of consecutive True values in each row of a boolean array """
+    counts = np.cumsum(mask, axis=1, dtype=np.int32)
+    # Subtract the count at the last False value before each position to restart the count for each run
+    reset = np.maximum.accumulate(np.where(mask, 0, counts), axis=1)
+    return (counts - reset).max(axis=1, initial=0)
+
+
+def calc_screening_metrics(loaddata):
+    """ Calculate screening metrics for load time series, with a few vectorized passes over all time series
+
+        Inputs:
+            loaddata: DataFrame with hourly load time series (index is a DatetimeIndex, as for
+                load_profiles.loaddata, and columns are time series IDs)
+
+        Outputs:
+            metrics: DataFrame indexed by time series ID with columns 'max_zero_run', 'max_flat_run' (hours),
+                'share_zero', 'n_spikes', 'load_factor', 'weekend_ratio', 'winter_summer_ratio' and 'evening_ratio'
+    """
+    timestamps = pd.DatetimeIndex(loaddata.index)
+    is_weekend = timestamps.dayofweek >= 5
+    month = timestamps.month
+    hour = timestamps.hour
+
+    # Matrix (hours x periods) for calculating the average load in different periods by one matrix product
+    periods = np.column_stack([~is_weekend, is_weekend, np.isin(month, [12, 1, 2]), np.isin(month, [6, 7, 8]),
+        ~is_weekend & (hour >= 17) & (hour < 21), ~is_weekend & (hour >= 9) & (hour < 15)]).astype(float)
+    n_hours_periods = periods.sum(axis=0)
+    periods = np.divide(periods, n_hours_periods, out=np.zeros_like(periods), where=n_hours_periods > 0)
+
+    metrics = []
+    for i_start in range(0, len(loaddata.columns), n_series_chunk):
+        # Time series as rows (contiguous in memory) for efficient passes along the time axis
+        values = np.ascontiguousarray(loaddata.iloc[:, i_start:i_start + n_series_chunk].to_numpy(dtype=float).T)
+        values = np.nan_to_num(values, nan=0.0)
+        metrics_chunk = _calc_screening_metrics_chunk(values, periods, n_hours_periods > 0)
+        metrics_chunk.index = pd.Index(loaddata.columns[i_start:i_start + n_series_chunk], name='time_series_ID')
+        metrics.append(metrics_chunk)
+
+    if len(metrics) == 0:
+        return _calc_screening_metrics_chunk(np.zeros((0, len(timestamps))), periods, n_hours_periods > 0).rename_axis('time_series_ID')
+    return pd.concat(metrics, axis=0)
+
+
+def _calc_screening_metrics_chunk(values, periods, has_hours_periods):
+    """ Calculate screening metrics for an array of time series (time series x hours) """
+    n_series = values.shape[0]
+    is_zero = values == 0
+    diff = np.diff(values, axis=1)
+    is_flat = (diff == 0) & ~is_zero[:, 1:]
+
+    # Spikes are jumps up followed immediately by jumps down (or vice versa) that are large compared
+    # with the typical hour-to-hour change (estimated by the mean absolute change, scaled to correspond to
+    # the standard deviation for normally distributed changes; this is much faster than the median and
+    # hardly affected by the few spikes there are in a time series)
+    scale = np.abs(diff).mean(axis=1) * np.sqrt(np.pi / 2) if diff.shape[1] > 0 else np.zeros(n_series)
+    threshold = spike_threshold * np.where(scale > 0, scale, np.inf)[:, np.newaxis]
+    jump_up = diff > threshold
+    jump_down = diff < -threshold
+    n_spikes = ((jump_up[:, :-1] & jump_down[:, 1:]) | (jump_down[:, :-1] & jump_up[:, 1:])).sum(axis=1)
+
+    load_max = values.max(axis=1, initial=0)
+    load_mean = values.mean(axis=1) if values.shape[1] > 0 else np.zeros(n_series)
+    mean_periods = values @ periods
+    mean_periods[:, ~has_hours_periods] = np.nan
+
+    def ratio(numerator, denominator):
+        return np.divide(numerator, denominator, out=np.full(n_series, np.nan), where=denominator > 0)
+
+    # A run of n hours without change corresponds to n + 1 hours with identical load
+    max_flat_changes = _longest_run(is_flat)
+
+    metrics = pd.DataFrame(index=pd.RangeIndex(n_series))
+    metrics['max_zero_run'] = _longest_run(is_zero)
+    metrics['max_flat_run'] = np.where(max_flat_changes > 0, max_flat_changes + 1, 0)
+    metrics['share_zero'] = is_zero.mean(axis=1)
+    metrics['n_spikes'] = n_spikes
+    metrics['load_factor'] = ratio(load_mean, load_max)
+    metrics['weekend_ratio'] = ratio(mean_periods[:, 1], mean_periods[:, 0])
+    metrics['winter_summer_ratio'] = ratio(mean_periods[:, 2], mean_periods[:, 3])
+    metrics['evening_ratio'] = ratio(mean_periods[:, 4], mean_periods[:, 5])
+
+    return metrics
+
+
+def update_screening_metrics(loaddata, metrics_prev=None):
+    """ Calculate screening metrics only for time series that are not already screened
+        (e.g., when new meter data are appended to the load data)
+
+        Inputs:
+            loaddata: DataFrame with hourly load time series (see calc_screening_metrics)
+            metrics_prev: DataFrame with previously calculated metrics (optional; default: None)
+
+        Outputs:
+            metrics: DataFrame with metrics for all time series in loaddata
+    """
+    if metrics_prev is None or len(metrics_prev.index) == 0:
+        return calc_screening_metrics(loaddata)
+
+    cols_new = [col for col in loaddata.columns if col not in metrics_prev.index]
+    metrics = metrics_prev.loc[metrics_prev.index.isin(loaddata.columns)]
+    if len(cols_new) > 0:
+        metrics = pd.concat([metrics, calc_screening_metrics(loaddata.loc[:, cols_new])], axis=0)
+    return metrics.loc[list(loaddata.columns)]
+
+
+def classify_time_series(metrics, share_residential=None):
+    """ Classify time series as irregular and/or primarily residential from the screening metrics
+
+        Inputs:
+            metrics: DataFrame with screening metrics (from calc_screening_metrics)
+            share_residential: Series with the share of residential load indexed by time series ID (e.g.,
+                from share_load_per_customer_type.csv); if not given, the classification as primarily
+                residential is based on the weekday evening peak and the weekend load (optional)
+
+        Outputs:
+            classification: DataFrame indexed by time series ID with boolean columns 'irregular' and 'residential'
+    """
+    classification = pd.DataFrame(index=metrics.index)
+    classification['irregular'] = ((metrics['max_zero_run'] >= max_zero_run_hours)
+        | (metrics['max_flat_run'] >= max_flat_run_hours)
+        | (metrics['share_zero'] > max_share_zero)
+        | (metrics['n_spikes'] > max_spikes)
+        | ~(metrics['load_factor'] >= min_load_factor))
+
+    if share_residential is not None:
+        classification['residential'] = share_residential.reindex(metrics.index, fill_value=0) >= min_share_residential
+    else:
+        classification['residential'] = (metrics['evening_ratio'] >= min_evening_ratio) & (metrics['weekend_ratio'] >= min_weekend_ratio)
+
+    return classification
+
+
+def write_time_series_ID_lists(classification, folder,
+        filename_irregular='time_series_IDs_irregular.csv', filename_residential='time_series_IDs_primarily_residential.csv'):
+    """ Write lists of IDs of irregular and primarily residential time series to file (on the format of
+        the CINELDI MV reference data set)
+
+        Inputs:
+            classification: DataFrame from classify_time_series
+            folder: Folder to write the files to
+            filename_irregular, filename_residential: File names (optional)
+    """
+    for column, filename in [('irregular', filename_irregular), ('residential', filename_residential)]:
+        IDs = classification.index[classification[column].to_numpy()]
+        df_IDs = pd.DataFrame({'time_series_ID': [int(ID) for ID in IDs]})
+        df_IDs.to_csv(os.path.join(folder, filename), sep=';', index=False)
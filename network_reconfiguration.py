@@ -0,0 +1,326 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 2026-10-19
+
+Module for network reconfiguration of radially operated distribution grids, i.e. for finding the set of
+open branches (open points) that minimizes the energy losses without violating the voltage and line
+loading limits, by a branch exchange search: starting from the present configuration, closing a tie branch
+forms a loop, and opening another branch of the loop gives a new radial configuration. The best exchange
+over all tie branches is made as long as it reduces the losses (or the violations), and the search stops
+when no exchange gives any improvement.
+
+Each configuration is evaluated by a power flow for a set of operating states (e.g., the hours of the
+representative days of a season). The power flow is solved with the inverse of the (reduced) bus-branch
+incidence matrix of the in-service branches, which for a radial grid is the path matrix (up to signs; see
+radial_topology.py): the branch currents are the inverse transposed times the bus currents (backward
+sweep), and the bus voltages are the inverse times the voltage drops over the branches (forward sweep). A
+branch exchange replaces one row of the incidence matrix, so the inverse for the new configuration is
+found by a rank-one (Sherman-Morrison) update of the inverse for the present configuration rather than
+by setting up the topology anew. The results for configurations that have already been evaluated are cached.
+
+The searches for different seasons are independent and are run in parallel in a pool of worker processes.
+"""
+
+import os
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+import radial_power_flow as rpf
+import instrumentation as instr
+
+# Months of each season
+seasons = {'winter': [12, 1, 2], 'spring': [3, 4, 5], 'summer': [6, 7, 8], 'autumn': [9, 10, 11]}
+
+
+def get_representative_days(profiles, seasons=seasons, n_days=3):
+    """ Select representative days for each season from the load profiles: the days of the season are
+        sorted by their daily load and divided into n_days groups of (about) equal size, and the day with
+        the median daily load of each group represents the days of the group. The day with the highest
+        hourly load of the season is added with no weight, so that the voltage and line loading limits are
+        also checked for the peak load of the season.
+
+        Inputs:
+            profiles: load_profiles object (see load_profiles.py) with hourly load profiles for a year
+            seasons: Dictionary with the months (1-12) of each season (optional; default: winter, spring,
+                summer and autumn)
+            n_days: Number of representative days per season (optional; default: 3)
+
+        Outputs:
+            days: DataFrame with columns 'season', 'day' (day of the year, 1-indexed, as for
+                load_profiles.get_profile_days) and 'n_days' (number of days represented by the day)
+    """
+    # Total relative load over all load points as proxy for the load of the grid
+    load_total = profiles.loaddata_rel.sum(axis=1).to_numpy(dtype=float)
+    n_days_year = len(load_total) // 24
+    load_days = load_total[:n_days_year * 24].reshape(n_days_year, 24)
+    months = profiles.loaddata_rel.index[:n_days_year * 24:24].month
+
+    rows = []
+    for season, months_season in seasons.items():
+        days_season = np.flatnonzero(np.isin(months, months_season))
+        if len(days_season) == 0:
+            continue
+        days_sorted = days_season[np.argsort(load_days[days_season].sum(axis=1), kind='stable')]
+        for group in np.array_split(days_sorted, min(n_days, len(days_sorted))):
+            rows.append((season, int(group[len(group) // 2]) + 1, len(group)))
+        day_peak = int(days_season[np.argmax(load_days[days_season].max(axis=1))]) + 1
+        rows.append((season, day_peak, 0))
+    return pd.DataFrame(rows, columns=['season', 'day', 'n_days'])
+
+
+class _configuration_evaluator(object):
+    """ Evaluation of radial configurations for a set of operating states, with a cache of the results """
+
+    def __init__(self, pf, P_mw, Q_mvar, weights, vm_min, max_loading_percent, switchable, tol=1e-6, max_iter=100):
+        topology = pf.topology
+        n_bus = len(topology.bus_IDs)
+        self.pos_source = topology.pos_source
+        # Position of each bus in the reduced incidence matrix (without the source bus)
+        self.pos_reduced = np.cumsum(np.arange(n_bus) != topology.pos_source) - 1
+        self.pos_reduced[topology.pos_source] = -1
+        keep = np.arange(n_bus) != topology.pos_source
+        self.f_pos = topology.f_pos
+        self.t_pos = topology.t_pos
+        self.z_pu = pf.r_pu + 1j * pf.x_pu
+        self.b_pu = pf.b_pu
+        self.r_pu = pf.r_pu
+        self.vm_source = pf.vm_source
+        self.sn_mva = pf.sn_mva
+        # Current rating of each branch (p.u.)
+        self.max_i_pu = pf.max_i_ka * np.sqrt(3) * pf.vn_kv / pf.sn_mva if pf.max_i_ka is not None else np.full(len(self.f_pos), np.inf)
+        self.n_bus = n_bus
+        self.keep = keep
+        # Load demand (p.u.) as buses x states, so that the columns of the interleaved real and imaginary
+        # parts are multiplied by the (real) inverse of the incidence matrix in one matrix product
+        self.S_load = np.ascontiguousarray(((np.asarray(P_mw) + 1j * np.asarray(Q_mvar)) / pf.sn_mva)[:, keep].T)
+        self.weights = np.asarray(weights, dtype=float)
+        self.vm_min = vm_min[keep]
+        self.max_loading_percent = max_loading_percent
+        self.switchable = switchable
+        self.tol = tol
+        self.max_iter = max_iter
+        self.cache = {}
+        self.n_evaluations = 0
+        self.n_cache_hits = 0
+
+    def _get_rows(self, branches):
+        """ Rows of the reduced incidence matrix for the given branches (+1 at the from bus and -1 at the to bus) """
+        rows = np.zeros((len(branches), self.n_bus))
+        rows[np.arange(len(branches)), self.f_pos[branches]] = 1.0
+        rows[np.arange(len(branches)), self.t_pos[branches]] = -1.0
+        return rows
+
+    def get_state(self, in_service):
+        """ Set up the inverse of the incidence matrix for a configuration (raises numpy.linalg.LinAlgError
+            if the in-service branches do not form a radial grid with all buses energized) """
+        branches = np.flatnonzero(in_service)
+        rows = self._get_rows(branches)
+        inverse = np.linalg.inv(rows[:, self.keep])
+        return {'branches': branches, 'inverse': np.rint(inverse), 'a_source': rows[:, self.pos_source], 'V': None}
+
+    def get_loop(self, state, tie):
+        """ Positions (in state['branches']) of the branches in the loop formed by closing the tie branch """
+        inverse = state['inverse']
+        on_path = [inverse[self.pos_reduced[pos], :] != 0 if pos != self.pos_source else np.zeros(inverse.shape[1], dtype=bool)
+            for pos in (self.f_pos[tie], self.t_pos[tie])]
+        return np.flatnonzero(on_path[0] ^ on_path[1])
+
+    def exchange(self, state, p, tie):
+        """ New state after opening the branch at position p (in state['branches']) and closing the tie branch
+            (Sherman-Morrison update of the inverse); None if the result is not radial """
+        row_new = self._get_rows([tie])[0]
+        branch_old = state['branches'][p]
+        u = (row_new - self._get_rows([branch_old])[0])[self.keep]
+        inverse = state['inverse']
+        nz = np.flatnonzero(u)
+        u_inverse = u[nz] @ inverse[nz, :]
+        denominator = 1.0 + u_inverse[p]
+        if abs(denominator) < 1e-9:
+            return None
+        inverse_new = np.rint(inverse - np.outer(inverse[:, p], u_inverse) / denominator)
+        branches = state['branches'].copy()
+        branches[p] = tie
+        a_source = state['a_source'].copy()
+        a_source[p] = row_new[self.pos_source]
+        return {'branches': branches, 'inverse': inverse_new, 'a_source': a_source, 'V': state['V']}
+
+    def evaluate(self, state):
+        """ Evaluate the configuration of a state (using the cache if it has been evaluated before)
+
+            Outputs:
+                result: Tuple (violation, losses (MWh, weighted sum over the operating states), lowest voltage
+                    (p.u.), highest line loading (%))
+        """
+        key = frozenset(state['branches'].tolist())
+        if key in self.cache:
+            self.n_cache_hits += 1
+            return self.cache[key]
+        self.n_evaluations += 1
+
+        branches = state['branches']
+        inverse = state['inverse']
+        z = self.z_pu[branches][:, np.newaxis]
+        b_half = 0.5 * self.b_pu[branches]
+        y_shunt = 1j * (np.bincount(self.f_pos[branches], weights=b_half, minlength=self.n_bus)
+            + np.bincount(self.t_pos[branches], weights=b_half, minlength=self.n_bus))[self.keep][:, np.newaxis]
+        drop_source = state['a_source'][:, np.newaxis] * self.vm_source
+        V = state['V'] if state['V'] is not None else np.full(self.S_load.shape, complex(self.vm_source))
+        for n_iter in range(self.max_iter):
+            I_bus = np.conj(self.S_load / V) + y_shunt * V
+            # Branch currents (in the direction from the from bus to the to bus)
+            I_branch = -(inverse.T @ I_bus.view(float)).view(complex)
+            V_new = (inverse @ np.ascontiguousarray(z * I_branch - drop_source).view(float)).view(complex)
+            change = np.abs(V_new - V).max()
+            V = V_new
+            if change < self.tol:
+                break
+        state['V'] = V
+
+        I_abs = np.abs(I_branch)
+        losses = float((self.r_pu[branches] @ I_abs**2) @ self.weights) * self.sn_mva
+        vm_bus = np.abs(V).min(axis=1)
+        loading_branch = I_abs.max(axis=1) / self.max_i_pu[branches] * 100
+        violation = max(0.0, np.nanmax(self.vm_min - vm_bus) * 100) + max(0.0, loading_branch.max() - self.max_loading_percent)
+        result = (float(violation), losses, float(vm_bus.min()), float(loading_branch.max()))
+        self.cache[key] = result
+        return result
+
+    def search(self, in_service, max_iterations=100):
+        """ Branch exchange search starting from the given configuration
+
+            Outputs:
+                in_service: Boolean array with the in-service status of each branch of the best configuration
+                result: Evaluation of the best configuration (see evaluate)
+                result_start: Evaluation of the starting configuration
+                n_iterations: Number of exchanges made
+        """
+        state = self.get_state(in_service)
+        result = result_start = self.evaluate(state)
+        n_iterations = 0
+        while n_iterations < max_iterations:
+            ties = np.setdiff1d(np.arange(len(self.f_pos)), state['branches'])
+            best = None
+            for tie in ties:
+                for p in self.get_loop(state, tie):
+                    if not self.switchable[state['branches'][p]]:
+                        continue
+                    state_new = self.exchange(state, p, tie)
+                    if state_new is None:
+                        continue
+                    result_new = self.evaluate(state_new)
+                    if best is None or result_new[:2] < best[1][:2]:
+                        best = (state_new, result_new)
+            if best is None or best[1][:2] >= result[:2]:
+                break
+            state, result = best
+            n_iterations += 1
+        in_service = np.zeros(len(self.f_pos), dtype=bool)
+        in_service[state['branches']] = True
+        return in_service, result, result_start, n_iterations
+
+
+def _search_season(args):
+    """ Run the branch exchange search for one season (in a worker process) """
+    pf, P_mw, Q_mvar, weights, vm_min, in_service, settings = args
+    evaluator = _configuration_evaluator(pf, P_mw, Q_mvar, weights, vm_min, settings['max_loading_percent'], settings['switchable'])
+    in_service_best, result, result_start, n_iterations = evaluator.search(in_service, settings['max_iterations'])
+    return in_service_best, result, result_start, n_iterations, evaluator.n_evaluations, evaluator.n_cache_hits
+
+
+@instr.instrumented('search_configuration')
+def search_configuration(net, P_mw, Q_mvar, weights=None, line_IDs_switchable=None, max_loading_percent=100.0, max_iterations=100, pf=None):
+    """ Find the configuration (set of open lines) with the lowest energy losses for a set of operating states
+        by branch exchange search, starting from the present configuration of the network
+
+        Inputs:
+            net: pandapower network of a radial grid with all buses energized, with lower voltage limits in
+                net.bus.min_vm_pu (not modified)
+            P_mw, Q_mvar: Arrays (operating states x buses, in the order of net.bus.index) with the load demand
+                (e.g., from radial_power_flow.get_bus_loads_time_series)
+            weights: Array with the number of hours represented by each operating state (optional; default: 1)
+            line_IDs_switchable: List of indices of the lines that can be opened (optional; default: all lines)
+            max_loading_percent: Upper limit for the line loading (% of max_i_ka) (optional; default: 100)
+            max_iterations: Maximum number of branch exchanges (optional; default: 100)
+            pf: radial_power_flow object for the network, if already set up (optional)
+
+        Outputs:
+            results: Dictionary with 'open_lines' (list of indices of the open lines of the best configuration),
+                'open_lines_base' (of the present configuration), 'losses_MWh', 'losses_MWh_base',
+                'vm_min_pu', 'vm_min_pu_base', 'loading_max_percent', 'loading_max_percent_base',
+                'violation' (sum of largest voltage deficit and overload in %), 'n_iterations',
+                'n_evaluations' and 'n_cache_hits'
+    """
+    if pf is None:
+        pf = rpf.radial_power_flow.from_net(net)
+    P_mw = np.atleast_2d(np.asarray(P_mw, dtype=float))
+    Q_mvar = np.atleast_2d(np.asarray(Q_mvar, dtype=float))
+    weights = np.ones(P_mw.shape[0]) if weights is None else np.asarray(weights, dtype=float)
+    settings = _get_settings(net, line_IDs_switchable, max_loading_percent, max_iterations)
+    vm_min = rpf.get_bus_vm_min(net)
+    result = _search_season((pf, P_mw, Q_mvar, weights, vm_min, pf.topology.in_service, settings))
+    return _get_results(net, pf.topology.in_service, *result)
+
+
+def _get_settings(net, line_IDs_switchable, max_loading_percent, max_iterations):
+    switchable = np.ones(len(net.line.index), dtype=bool)
+    if line_IDs_switchable is not None:
+        unknown = pd.Index(line_IDs_switchable).difference(net.line.index)
+        if len(unknown) > 0:
+            raise KeyError('Lines not in the network: ' + str(list(unknown)))
+        switchable = net.line.index.isin(line_IDs_switchable)
+    return {'switchable': switchable, 'max_loading_percent': max_loading_percent, 'max_iterations': max_iterations}
+
+
+def _get_results(net, in_service_base, in_service, result, result_start, n_iterations, n_evaluations, n_cache_hits):
+    return {'open_lines': net.line.index[~in_service].to_list(), 'open_lines_base': net.line.index[~in_service_base].to_list(),
+        'losses_MWh': result[1], 'losses_MWh_base': result_start[1], 'vm_min_pu': result[2], 'vm_min_pu_base': result_start[2],
+        'loading_max_percent': result[3], 'loading_max_percent_base': result_start[3], 'violation': result[0],
+        'n_iterations': n_iterations, 'n_evaluations': n_evaluations, 'n_cache_hits': n_cache_hits}
+
+
+@instr.instrumented('search_configuration_seasons', rows=len)
+def search_configuration_seasons(net, profiles, filename_load_mapping, seasons=seasons, n_days=3, line_IDs_switchable=None,
+        max_loading_percent=100.0, max_iterations=100, n_workers=None):
+    """ Find the configuration (set of open lines) with the lowest energy losses for each season, evaluated for
+        representative days of the season (see get_representative_days)
+
+        Inputs:
+            net: pandapower network of a radial grid with all buses energized and the peak load of each load,
+                with lower voltage limits in net.bus.min_vm_pu (not modified)
+            profiles: load_profiles object (see load_profiles.py)
+            filename_load_mapping: Full path to file defining how load profiles are mapped onto buses
+            seasons, n_days: see get_representative_days
+            line_IDs_switchable, max_loading_percent, max_iterations: see search_configuration
+            n_workers: Number of worker processes (optional; default: number of CPUs, at most the number of
+                seasons; 1 to run in the calling process)
+
+        Outputs:
+            results: DataFrame indexed by season with the results of search_configuration for each season
+                (losses are for the whole season) and 'days' (the representative days)
+    """
+    pf = rpf.radial_power_flow.from_net(net)
+    days = get_representative_days(profiles, seasons, n_days)
+    settings = _get_settings(net, line_IDs_switchable, max_loading_percent, max_iterations)
+    vm_min = rpf.get_bus_vm_min(net)
+
+    tasks = []
+    with instr.stage('network_reconfiguration.load_demand', rows=len(days)):
+        for season, days_season in days.groupby('season', sort=False):
+            profiles_mapped = profiles.map_rel_load_profiles(filename_load_mapping, repr_days=days_season['day'].to_list())
+            P_mw, Q_mvar = rpf.get_bus_loads_time_series(net, profiles_mapped)
+            weights = np.repeat(days_season['n_days'].to_numpy(dtype=float), 24)
+            tasks.append((pf, P_mw, Q_mvar, weights, vm_min, pf.topology.in_service, settings))
+
+    if n_workers is None:
+        n_workers = min(os.cpu_count() or 1, len(tasks))
+    with instr.stage('network_reconfiguration.search', rows=len(tasks)):
+        if n_workers > 1:
+            with ProcessPoolExecutor(max_workers=n_workers) as executor:
+                results = list(executor.map(_search_season, tasks))
+        else:
+            results = [_search_season(task) for task in tasks]
+
+    results = pd.DataFrame([_get_results(net, pf.topology.in_service, *result) for result in results],
+        index=pd.Index(days['season'].unique(), name='season'))
+    results['days'] = [days_season['day'].to_list() for _, days_season in days.groupby('season', sort=False)]
+    return results
@@ -0,0 +1,277 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 2026-10-19
+
+Module for reducing the size of a radial grid (e.g., the CINELDI MV reference grid, as set up by
+pandapower_read_csv.read_net_from_csv) for studies where only the interface to the rest of the system
+matters, e.g. when MV feeders are embedded in a much larger system. Each selected subtree (the part of the
+grid downstream of a given line, e.g. the first line of a feeder) is replaced by an equivalent:
+
+- the bus downstream of the line (the interface bus) and its loads are kept,
+- the other buses of the subtree, with their lines and loads, are removed (tie lines to removed buses too),
+- an equivalent line from the interface bus to a new bus supplies an aggregated load at the new bus.
+
+The aggregated load is the sum of the removed loads, with a load profile (a new column of the mapped load
+profiles, named by the new bus ID) that is the sum of their hourly load demand. The impedance of the
+equivalent line is chosen so that its energy losses over the hours equal the sum of the energy losses of the
+removed lines, with the losses estimated from the power flows given by the downstream load demand. The line
+charging of the removed lines is given to the equivalent line. The interface voltages and flows of the
+reduced grid are compared to those of the original grid by the radial power flow (see radial_power_flow.py)
+for all hours, and the rows that are removed are kept, so that the original grid can be restored.
+
+Example:
+    net_reduced, profiles_reduced, reduction = reduce_network(net, get_feeder_lines(net), profiles_mapped)
+    print(reduction['errors'])
+    net_original = restore_network(net_reduced, reduction)
+"""
+
+import copy
+import numpy as np
+import pandas as pd
+import radial_power_flow as rpf
+from radial_topology import radial_topology
+import instrumentation as instr
+
+# Tables indexed by bus or by line (in addition to 'bus' and 'line') that rows are removed from
+tables_bus = ['bus_geodata', 'bus_extra']
+tables_line = ['line_geodata', 'branch_extra']
+
+
+def get_feeder_lines(net):
+    """ Indices of the first line of each feeder (the in-service lines connected to the source bus), for
+        reducing whole feeders """
+    topology = radial_topology.from_net(net)
+    return net.line.index[np.unique(topology.feeder[topology.feeder >= 0])]
+
+
+def _get_rows_removed(net, buses_removed, lines_removed):
+    """ Boolean masks (rows to remove) of each table of the network that has rows for removed buses or lines,
+        including the result tables """
+    rows = {}
+    for table in list(net.keys()):
+        df = net[table]
+        if not isinstance(df, pd.DataFrame) or len(df.index) == 0:
+            continue
+        base = table[len('res_'):] if table.startswith('res_') else table
+        if base in ['bus'] + tables_bus:
+            mask = df.index.isin(buses_removed)
+        elif base in ['line'] + tables_line:
+            mask = df.index.isin(lines_removed)
+        elif base == 'switch' and base in net:
+            switch = net.switch
+            mask_switch = switch['bus'].isin(buses_removed) | ((switch['et'] == 'b') & switch['element'].isin(buses_removed)) | \
+                ((switch['et'] == 'l') & switch['element'].isin(lines_removed))
+            mask = df.index.isin(switch.index[mask_switch])
+        elif isinstance(net.get(base), pd.DataFrame) and 'bus' in net[base].columns:
+            mask = df.index.isin(net[base].index[net[base]['bus'].isin(buses_removed)])
+        else:
+            continue
+        if mask.any():
+            rows[table] = mask
+    return rows
+
+
+@instr.instrumented('reduce_network')
+def reduce_network(net, line_IDs_cut, profiles_mapped, hours=None, report=True):
+    """ Replace the subtrees downstream of the given lines by equivalents (see the description of the module)
+
+        Inputs:
+            net: pandapower network of a radial grid with the peak load of each load (not modified)
+            line_IDs_cut: Indices of the in-service lines (net.line) that the subtrees to reduce are downstream
+                of (e.g., from get_feeder_lines); a subtree cannot contain another of the lines
+            profiles_mapped: DataFrame with relative load profiles mapped to buses (e.g., from
+                load_profiles.map_rel_load_profiles for all days of the year); rows are hours and columns are
+                bus IDs (see radial_power_flow.get_load_time_series)
+            hours: List of hours (row indices of profiles_mapped) that the impedances of the equivalents are
+                fitted for and that the errors are reported for (optional; default: all hours)
+            report: True to compare the reduced grid to the original grid (see calc_reduction_errors)
+                (optional; default: True)
+
+        Outputs:
+            net_reduced: pandapower network with the equivalents
+            profiles_reduced: DataFrame with the load profiles of the loads of the reduced grid, including
+                the aggregated load profile of each equivalent (for all rows of profiles_mapped)
+            reduction: Dictionary with 'equivalents' (DataFrame indexed by the cut lines with the interface
+                bus, the bus, line and load of the equivalent, the number of removed buses, lines and tie
+                lines, the aggregated peak load and the impedance of the equivalent line), 'removed' (removed
+                rows of each table), 'added' (indices of the added rows of each table), 'index_original'
+                and 'dtypes_original' (original order of the rows and data types of the columns of each table
+                that was changed) and 'errors' (if report is True)
+    """
+    import pandapower as pp
+
+    if hours is None:
+        hours = profiles_mapped.index
+    topology = radial_topology.from_net(net)
+    pos_cut = net.line.index.get_indexer(line_IDs_cut)
+    if (pos_cut < 0).any():
+        raise KeyError('Lines not found in the network: ' + str(list(pd.Index(line_IDs_cut)[pos_cut < 0])))
+    if (topology.branch_child[pos_cut] < 0).any():
+        raise ValueError('Lines that are not in service cannot be cut: ' + str(list(net.line.index[pos_cut[topology.branch_child[pos_cut] < 0]])))
+
+    with instr.stage('network_reduction.flows', rows=len(hours)):
+        # Power flow of each line from the downstream load demand (lines x hours) for the equivalent impedances
+        P_mw, Q_mvar = rpf.get_bus_loads_time_series(net, profiles_mapped, hours)
+        S_bus = P_mw + 1j * Q_mvar
+        sum_flows_squared = (np.abs(topology.path_matrix @ S_bus.T)**2).sum(axis=1)
+        # Load demand of each load for all rows of profiles_mapped, for the aggregated load profiles
+        load = net.load.loc[net.load['in_service'].astype(bool)]
+        P_load_all, _ = rpf.get_load_time_series(net, profiles_mapped, profiles_mapped.index)
+
+    n_parallel = net.line['parallel'].to_numpy(dtype=float) if 'parallel' in net.line.columns else np.ones(len(net.line.index))
+    length = net.line['length_km'].to_numpy(dtype=float)
+    r_ohm = net.line['r_ohm_per_km'].to_numpy(dtype=float) * length / n_parallel
+    x_ohm = net.line['x_ohm_per_km'].to_numpy(dtype=float) * length / n_parallel
+    c_nf = net.line['c_nf_per_km'].to_numpy(dtype=float) * length * n_parallel
+    scaling = load['scaling'].to_numpy(dtype=float) if 'scaling' in load.columns else 1.0
+    p_load = load['p_mw'].to_numpy(dtype=float) * scaling
+    q_load = load['q_mvar'].to_numpy(dtype=float) * scaling
+    pos_bus_load = topology.get_bus_positions(load['bus'])
+
+    net_reduced = copy.deepcopy(net)
+    is_removed = np.zeros(len(topology.bus_IDs), dtype=bool)
+    new_ID = int(max(net.bus.index.max(), net.load.index.max() if len(net.load.index) > 0 else 0)) + 1
+    new_line = int(net.line.index.max()) + 1
+    equivalents = []
+    columns_profiles = {}
+    for k in pos_cut:
+        pos_interface = topology.branch_child[k]
+        pos_subtree = topology.path_matrix[k].indices
+        pos_removed = pos_subtree[pos_subtree != pos_interface]
+        if len(pos_removed) == 0:
+            raise ValueError('There are no buses downstream of the interface bus of line ' + str(net.line.index[k]) + ' to reduce')
+        if is_removed[pos_subtree].any():
+            raise ValueError('The subtree downstream of line ' + str(net.line.index[k]) + ' overlaps with another subtree to reduce')
+        is_removed[pos_removed] = True
+        # The lines within the subtree are the lines to the removed buses
+        k_internal = topology.parent_branch[pos_removed]
+        n_ties_removed = np.count_nonzero(~topology.in_service & (np.isin(topology.f_pos, pos_removed) | np.isin(topology.t_pos, pos_removed)))
+
+        sum_aggregated_squared = (np.abs(S_bus[:, pos_removed].sum(axis=1))**2).sum()
+        weights = sum_flows_squared[k_internal] / sum_aggregated_squared if sum_aggregated_squared > 0 else np.zeros(len(k_internal))
+        is_load_removed = np.isin(pos_bus_load, pos_removed)
+        p_eq = p_load[is_load_removed].sum()
+        q_eq = q_load[is_load_removed].sum()
+
+        bus_interface = topology.bus_IDs[pos_interface]
+        bus_data = net.bus.loc[bus_interface]
+        pp.create_bus(net_reduced, index=new_ID, name=new_ID, vn_kv=bus_data['vn_kv'], type=bus_data['type'], zone=bus_data['zone'],
+            min_vm_pu=bus_data.get('min_vm_pu', np.nan), max_vm_pu=bus_data.get('max_vm_pu', np.nan))
+        pp.create_line_from_parameters(net_reduced, index=new_line, from_bus=bus_interface, to_bus=new_ID, length_km=1.0,
+            r_ohm_per_km=float(weights @ r_ohm[k_internal]), x_ohm_per_km=float(weights @ x_ohm[k_internal]),
+            c_nf_per_km=float(c_nf[k_internal].sum()), max_i_ka=float(net.line['max_i_ka'].iloc[k] * n_parallel[k]), name='equivalent')
+        if 'branch_extra' in net_reduced and isinstance(net_reduced['branch_extra'], pd.DataFrame):
+            net_reduced['branch_extra'].loc[new_line, ['type', 'length_km']] = ['equivalent', 1.0]
+        pp.create_load(net_reduced, index=new_ID, bus=new_ID, name=new_ID, p_mw=p_eq, q_mvar=q_eq)
+        # Relative profile of the aggregated load (the sum of the hourly load demand of the removed loads)
+        columns_profiles[new_ID] = P_load_all[:, is_load_removed].sum(axis=1) / p_eq if p_eq != 0 else np.ones(len(profiles_mapped.index))
+
+        equivalents.append({'line': net.line.index[k], 'bus_interface': bus_interface, 'bus_equivalent': new_ID,
+            'line_equivalent': new_line, 'load_equivalent': new_ID, 'n_buses_removed': len(pos_removed),
+            'n_lines_removed': len(k_internal), 'n_tie_lines_removed': n_ties_removed, 'n_loads_removed': int(is_load_removed.sum()), 'p_mw': p_eq, 'q_mvar': q_eq,
+            'r_ohm': float(weights @ r_ohm[k_internal]), 'x_ohm': float(weights @ x_ohm[k_internal])})
+        new_ID += 1
+        new_line += 1
+
+    # Remove the buses of the subtrees with the lines (including tie lines) and the elements connected to them
+    buses_removed = topology.bus_IDs[is_removed]
+    lines_removed = net.line.index[is_removed[topology.f_pos] | is_removed[topology.t_pos]]
+    rows = _get_rows_removed(net, buses_removed, lines_removed)
+    removed = {table: net[table].loc[mask] for table, mask in rows.items()}
+    tables_changed = [table for table in set(rows) | {'bus', 'line', 'load', 'branch_extra'} if isinstance(net.get(table), pd.DataFrame)]
+    index_original = {table: net[table].index for table in tables_changed}
+    dtypes_original = {table: net[table].dtypes for table in tables_changed}
+    for table, mask in rows.items():
+        net_reduced[table] = net_reduced[table].drop(index=net[table].index[mask])
+    equivalents = pd.DataFrame(equivalents).set_index('line')
+
+    profiles_reduced = profiles_mapped.loc[:, profiles_mapped.columns.difference(buses_removed, sort=False)].copy()
+    for column, values in columns_profiles.items():
+        profiles_reduced[column] = values
+
+    reduction = {'equivalents': equivalents, 'removed': removed, 'index_original': index_original, 'dtypes_original': dtypes_original,
+        'added': {'bus': list(equivalents['bus_equivalent']), 'line': list(equivalents['line_equivalent']),
+            'load': list(equivalents['load_equivalent']), 'branch_extra': list(equivalents['line_equivalent'])}}
+    if report:
+        reduction['errors'] = calc_reduction_errors(net, net_reduced, reduction, profiles_mapped, profiles_reduced, hours)
+    return net_reduced, profiles_reduced, reduction
+
+
+def restore_network(net_reduced, reduction):
+    """ Restore the original network from a reduced network (the equivalents are removed and the removed rows
+        are put back in the original order)
+
+        Inputs:
+            net_reduced: pandapower network from reduce_network (not modified)
+            reduction: Dictionary from reduce_network
+
+        Outputs:
+            net: pandapower network equal to the original network
+    """
+    net = copy.deepcopy(net_reduced)
+    for table, index in reduction['added'].items():
+        if table in net and isinstance(net[table], pd.DataFrame):
+            net[table] = net[table].drop(index=net[table].index.intersection(index))
+    for table, index in reduction['index_original'].items():
+        df = net[table]
+        if table in reduction['removed']:
+            df = pd.concat([df, reduction['removed'][table]])
+        df = df.loc[index].astype(reduction['dtypes_original'][table])
+        df.index = index
+        net[table] = df
+    return net
+
+
+@instr.instrumented('calc_reduction_errors')
+def calc_reduction_errors(net, net_reduced, reduction, profiles_mapped, profiles_reduced, hours=None):
+    """ Compare the voltages and flows of the reduced network to those of the original network by power flow
+        for each hour (see radial_power_flow.py)
+
+        Inputs:
+            net: Original pandapower network
+            net_reduced, reduction, profiles_reduced: Outputs of reduce_network
+            profiles_mapped: Load profiles of the original network (see reduce_network)
+            hours: List of hours (row indices of the load profiles) (optional; default: all hours)
+
+        Outputs:
+            errors: Dictionary with the number of buses of the original and the reduced network, the largest
+                errors of the voltage magnitude (p.u.) at the interface buses and at all kept buses (with the bus),
+                of the active and reactive power flow (MW and Mvar) into the interface buses and through all kept
+                lines (with the line), of the power supplied from the source (MW), and the error of the energy
+                losses (MWh and %)
+    """
+    if hours is None:
+        hours = profiles_mapped.index
+    results = []
+    for net_i, profiles_i in [(net, profiles_mapped), (net_reduced, profiles_reduced)]:
+        pf = rpf.radial_power_flow.from_net(net_i)
+        P_mw, Q_mvar = rpf.get_bus_loads_time_series(net_i, profiles_i, hours)
+        results_i = pf.solve(P_mw, Q_mvar)
+        if not results_i['converged']:
+            raise RuntimeError('The power flow did not converge')
+        results_i['p_supply_mw'] = P_mw.sum(axis=1) + results_i['pl_mw'].sum(axis=1)
+        results.append(results_i)
+    full, reduced = results
+
+    equivalents = reduction['equivalents']
+    buses_kept = net_reduced.bus.index.difference(equivalents['bus_equivalent'], sort=False)
+    lines_kept = net_reduced.line.index.difference(equivalents['line_equivalent'], sort=False)
+    error_vm = np.abs(full['vm_pu'][:, net.bus.index.get_indexer(buses_kept)] - reduced['vm_pu'][:, net_reduced.bus.index.get_indexer(buses_kept)])
+    pos_full = net.line.index.get_indexer(lines_kept)
+    pos_reduced = net_reduced.line.index.get_indexer(lines_kept)
+    error_p = np.abs(full['p_mw'][:, pos_full] - reduced['p_mw'][:, pos_reduced])
+    error_q = np.abs(full['q_mvar'][:, pos_full] - reduced['q_mvar'][:, pos_reduced])
+    is_interface_bus = buses_kept.isin(equivalents['bus_interface'])
+    is_interface_line = lines_kept.isin(equivalents.index)
+    losses_MWh = full['pl_mw'].sum()
+    losses_reduced_MWh = reduced['pl_mw'].sum()
+    return {'n_buses': len(net.bus.index), 'n_buses_reduced': len(net_reduced.bus.index),
+        'vm_interface_max_error_pu': float(error_vm[:, is_interface_bus].max()),
+        'vm_max_error_pu': float(error_vm.max()), 'bus_vm_max_error': buses_kept[int(error_vm.max(axis=0).argmax())],
+        'p_interface_max_error_mw': float(error_p[:, is_interface_line].max()),
+        'q_interface_max_error_mvar': float(error_q[:, is_interface_line].max()),
+        'p_max_error_mw': float(error_p.max()), 'line_p_max_error': lines_kept[int(error_p.max(axis=0).argmax())],
+        'q_max_error_mvar': float(error_q.max()),
+        'p_supply_max_error_mw': float(np.abs(full['p_supply_mw'] - reduced['p_supply_mw']).max()),
+        'losses_error_MWh': float(losses_reduced_MWh - losses_MWh),
+        'losses_error_percent': float((losses_reduced_MWh - losses_MWh) / losses_MWh * 100) if losses_MWh > 0 else np.nan}
@@ -9,10 +9,38 @@ reference grid based on input .csv files on the MATPOWER format.
 
 import pandas as pd
 import os
-import pandapower as pp
 import math
+import instrumentation as instr
 
 
+def get_filenames_grid_data(DiB_version=True):
+    """ Get the file names of the grid data files
+
+        Inputs:
+            DiB_version: True if assuming files and file names as for data set published 
+                in connection with Data in Brief (DiB) manuscript; False if assuming 
+                previous version (until around August 2022)
+
+        Outputs:
+            filenames: Dictionary with file names for keys 'bus', 'branch', 'branch_extra' 
+                and 'bus_extra' (None if not part of the data set version)
+    """
+
+    # Hard coding file names for CINELDI reference grid data
+    if DiB_version:
+        filenames = {'bus': 'CINELDI_MV_reference_grid_base_bus.csv',
+            'branch': 'CINELDI_MV_reference_grid_base_branch.csv',
+            'branch_extra': 'CINELDI_MV_reference_grid_base_branch_extra.csv',
+            'bus_extra': 'CINELDI_MV_reference_grid_base_bus_extra.csv'}
+    else:
+        filenames = {'bus': 'Cineldi124Bus_Busdata.csv',
+            'branch': 'Cineldi124Bus_Branch.csv',
+            'branch_extra': 'Cineldi124Bus_Branch_extra.csv',
+            'bus_extra': None}
+    return filenames
+
+
+@instr.instrumented('read_net_from_csv', rows=lambda net: len(net.bus.index))
 def read_net_from_csv(folder, baseMVA=10, DiB_version = True):
     """ Read network data from .csv file and convert to pandapower
 
@@ -28,28 +56,45 @@ def read_net_from_csv(folder, baseMVA=10, DiB_version = True):
             net: pandapower net DataFrame for network            
     """
 
-    # Hard coding file names for CINELDI reference grid data
-    if DiB_version:
-        filename_bus = 'CINELDI_MV_reference_grid_base_bus.csv'
-        filename_branch = 'CINELDI_MV_reference_grid_base_branch.csv'
-        filename_branch_extra = 'CINELDI_MV_reference_grid_base_branch_extra.csv'
-        filename_bus_extra = 'CINELDI_MV_reference_grid_base_bus_extra.csv'        
-    else:
-        filename_bus = 'Cineldi124Bus_Busdata.csv'
-        filename_branch = 'Cineldi124Bus_Branch.csv'
-        filename_branch_extra = 'Cineldi124Bus_Branch_extra.csv'
+    filenames = get_filenames_grid_data(DiB_version)
 
     # Read files from .csv files
-    filename_bus_fullpath = os.path.join(folder, filename_bus)
-    filename_branch_fullpath = os.path.join(folder, filename_branch)    
-    bus = pd.read_csv(filename_bus_fullpath,sep=';')
-    branch = pd.read_csv(filename_branch_fullpath,sep=';')
+    with instr.stage('read_net_from_csv.read_csv') as st:
+        filename_bus_fullpath = os.path.join(folder, filenames['bus'])
+        filename_branch_fullpath = os.path.join(folder, filenames['branch'])    
+        bus = pd.read_csv(filename_bus_fullpath,sep=';')
+        branch = pd.read_csv(filename_branch_fullpath,sep=';')
+
+        # Only try to read extra branch data if input file exists
+        filename_branch_extra_fullpath = os.path.join(folder, filenames['branch_extra'])
+        if os.path.isfile(filename_branch_extra_fullpath):
+            branch_extra = pd.read_csv(filename_branch_extra_fullpath,sep=';')        
+        else:
+            branch_extra = None
+        st.set_rows(len(bus.index) + len(branch.index))
+
+    return create_net_from_data(bus, branch, branch_extra, baseMVA)
+
+
+@instr.instrumented('create_net_from_data', rows=lambda net: len(net.bus.index))
+def create_net_from_data(bus, branch, branch_extra=None, baseMVA=10):
+    """ Set up pandapower network from grid data (on the MATPOWER format) that have already been read 
+        (e.g., by read_net_from_csv or from a cineldi_dataset object)
+
+        Inputs:
+            bus: DataFrame with bus data (as read from the bus data file; it is not modified)
+            branch: DataFrame with branch data (as read from the branch data file; it is not modified)
+            branch_extra: DataFrame with extra branch data, which is stored as net.branch_extra
+                (optional; default: None)
+            baseMVA: Base apparent power value to use in the per-unit conversion 
+                (optional; default: 10 MVA)
+
+        Outputs:
+            net: pandapower net DataFrame for network            
+    """
 
-    # Only try to read extra branch data if input file exists
-    filename_branch_extra_fullpath = os.path.join(folder, filename_branch_extra)
-    branch_extra_exists = os.path.isfile(filename_branch_extra_fullpath)
-    if branch_extra_exists:
-        branch_extra = pd.read_csv(filename_branch_extra_fullpath,sep=';')        
+    # pandapower is only imported when a network is built (it takes a long time to import)
+    import pandapower as pp
 
     # Assuming the grid to be operated at frequency 50 Hz
     f_hz = 50.0
@@ -66,6 +111,7 @@ def read_net_from_csv(folder, baseMVA=10, DiB_version = True):
         s_base_kV = bus['base_kV']
 
     # Read bus and load data
+    st = instr.stage('read_net_from_csv.create_buses', rows=len(bus.index)).start()
     for i_bus in bus.index:
         
         if 'ID' in bus.columns:
@@ -130,11 +176,13 @@ def read_net_from_csv(folder, baseMVA=10, DiB_version = True):
 
     # Set the row indices for the load DataFrame to be the load names
     net.load.set_index('name',drop=False,inplace=True)
+    st.stop()
 
     # Add bus results DataFrame to network
     net.res_bus = res_bus
 
     # Read line data (and we assume there are no transformers)
+    st = instr.stage('read_net_from_csv.create_lines', rows=len(branch.index)).start()
     for i_branch in branch.index:
         f_bus = branch.loc[i_branch,'f_bus']
         t_bus = branch.loc[i_branch,'t_bus']
@@ -204,12 +252,13 @@ def read_net_from_csv(folder, baseMVA=10, DiB_version = True):
 
         # Adding line to network
         pp.create_line_from_parameters(net, from_bus=f_bus, to_bus=t_bus, length_km=length_km, r_ohm_per_km = r_ohm, x_ohm_per_km = x_ohm, c_nf_per_km = c_nf_per_km, max_i_ka = max_i_ka, in_service=br_status)
+    st.stop()
 
     # Specify main feeder (MF) and point of common coupling to the external (HV) power grid
     bus_MF = 1
     pp.create_ext_grid(net, bus_MF)
   
-    if branch_extra_exists:
+    if branch_extra is not None:
         net.branch_extra = branch_extra
 
     return net
@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 2026-10-19
+
+Module for caching the results of power flow calculations by pandapower, for analyses that run the power
+flow for the same network and load demand many times (e.g., the years of a load scenario that are the same
+for several variants of a grid development plan). The state of the network is identified by a fingerprint,
+i.e. a hash of the arrays of the tables that the power flow depends on (buses, lines, loads, switches,
+external grids etc., including the scaling of the loads) and of the options for the power flow. The results
+are kept in memory for the most recently used fingerprints (LRU) and optionally in files in a folder, which
+can be shared between processes.
+
+Example:
+    cache = pf_cache(max_entries=256, path='pf_cache')
+    for year in years:
+        net_year = ls.apply_scenario_to_net(copy.deepcopy(net), scenario, year)
+        cached_runpp(net_year, cache, algorithm='bfsw')
+        ...
+    print(cache.get_stats())
+"""
+
+import collections
+import copy
+import hashlib
+import os
+import pickle
+import threading
+import time
+import uuid
+import numpy as np
+import pandas as pd
+import instrumentation as instr
+
+# Tables of the network that the power flow depends on
+tables_fingerprint = ['bus', 'line', 'load', 'sgen', 'gen', 'ext_grid', 'switch', 'trafo', 'trafo3w', 'shunt', 'storage',
+    'impedance', 'ward', 'xward', 'dcline', 'motor', 'asymmetric_load', 'asymmetric_sgen']
+
+# Columns that the power flow does not depend on
+columns_ignored = {'name', 'type', 'std_type', 'geo', 'zone', 'description'}
+
+# Options of the power flow that do not change the results
+options_ignored = {'init', 'numba'}
+
+# Internal data structures of pandapower that are set by the power flow (e.g., the internal power flow case
+# _ppc and the lookups from the tables to it), which are cached with the result tables so that they are
+# valid after a hit (e.g., for a following power flow with init='results', or for estimation of sensitivities)
+internals_cached = ['_ppc', '_pd2ppc_lookups', '_is_elements', '_is_elements_final', '_options', '_isolated_buses',
+    '_gen_order', '_impedance_bb_switches', '_fused_bb_switches']
+
+
+def _update_hash(h, values):
+    """ Add an array (column of a table) to a hash """
+    if values.dtype == object:
+        h.update('\x1f'.join(map(str, values)).encode())
+    else:
+        h.update(str(values.dtype).encode())
+        h.update(np.ascontiguousarray(values).view(np.uint8))
+
+
+def fingerprint(net, **kwargs):
+    """ Fingerprint of the state of a network that the results of the power flow depend on
+
+        Inputs:
+            net: pandapower network
+            kwargs: Options of the power flow (e.g., algorithm='bfsw')
+
+        Outputs:
+            key: Hexadecimal string
+    """
+    h = hashlib.blake2b(digest_size=20)
+    h.update(repr((float(net.sn_mva), float(net.f_hz))).encode())
+    for table in tables_fingerprint:
+        if table not in net or not isinstance(net[table], pd.DataFrame) or len(net[table].index) == 0:
+            continue
+        df = net[table]
+        h.update(table.encode())
+        _update_hash(h, df.index.to_numpy())
+        for column in df.columns:
+            if column in columns_ignored:
+                continue
+            h.update(str(column).encode())
+            _update_hash(h, df[column].to_numpy())
+    h.update(repr(sorted((key, repr(value)) for key, value in kwargs.items() if key not in options_ignored)).encode())
+    return h.hexdigest()
+
+
+class pf_cache(object):
+
+    def __init__(self, max_entries=1024, path=None):
+        """
+        Initialization of cache for power flow results
+
+        Inputs:
+            max_entries: Largest number of results to keep in memory (optional; default: 1024)
+            path: Folder for keeping the results in files (one per fingerprint), which can be shared between
+                processes (optional; default: results are only kept in memory)
+        """
+        self.max_entries = max_entries
+        self.path = path
+        if path is not None:
+            os.makedirs(path, exist_ok=True)
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    def reset_stats(self):
+        """ Reset the hit and miss statistics """
+        self.n_hits_memory = 0
+        self.n_hits_disk = 0
+        self.n_misses = 0
+        self.time_saved = 0.0
+        self.time_fingerprint = 0.0
+
+    def get_stats(self):
+        """ Hit and miss statistics
+
+            Outputs:
+                stats: Dictionary with 'hits_memory', 'hits_disk', 'misses', 'hit_rate', 'time_saved_s' (the
+                    time of the power flow calculations that were avoided), 'time_fingerprint_s' and 'n_entries'
+                    (number of results in memory)
+        """
+        n_lookups = self.n_hits_memory + self.n_hits_disk + self.n_misses
+        return {'hits_memory': self.n_hits_memory, 'hits_disk': self.n_hits_disk, 'misses': self.n_misses,
+            'hit_rate': (self.n_hits_memory + self.n_hits_disk) / n_lookups if n_lookups > 0 else np.nan,
+            'time_saved_s': self.time_saved, 'time_fingerprint_s': self.time_fingerprint, 'n_entries': len(self._entries)}
+
+    def _get_filename(self, key):
+        return os.path.join(self.path, key + '.pkl')
+
+    def get(self, key):
+        """ Get the results for a fingerprint (None if not in the cache) """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.n_hits_memory += 1
+                self.time_saved += entry['time']
+                return entry
+        if self.path is not None and os.path.isfile(self._get_filename(key)):
+            try:
+                with open(self._get_filename(key), 'rb') as file:
+                    entry = pickle.load(file)
+            except (OSError, EOFError, pickle.UnpicklingError):
+                entry = None
+            if entry is not None:
+                self._put_memory(key, entry)
+                with self._lock:
+                    self.n_hits_disk += 1
+                    self.time_saved += entry['time']
+                return entry
+        with self._lock:
+            self.n_misses += 1
+        return None
+
+    def _put_memory(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def put(self, key, results, time_pf=0.0, internals=None):
+        """ Add results for a fingerprint
+
+            Inputs:
+                key: Fingerprint (see fingerprint)
+                results: Dictionary with the result tables (e.g., 'res_bus' and 'res_line')
+                time_pf: Time of the power flow calculation (s), for the statistics (optional)
+                internals: Dictionary with internal data structures of pandapower (see internals_cached) (optional)
+        """
+        entry = {'results': results, 'time': time_pf, 'internals': {} if internals is None else internals}
+        self._put_memory(key, entry)
+        if self.path is not None:
+            # Write to a temporary file that is renamed, so that other processes never read incomplete files
+            filename = self._get_filename(key)
+            filename_tmp = filename + '.' + uuid.uuid4().hex + '.tmp'
+            with open(filename_tmp, 'wb') as file:
+                pickle.dump(entry, file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(filename_tmp, filename)
+
+    def clear(self, disk=False):
+        """ Remove all results from memory (and from the folder if disk is True) """
+        with self._lock:
+            self._entries.clear()
+        if disk and self.path is not None:
+            for filename in os.listdir(self.path):
+                if filename.endswith('.pkl'):
+                    os.remove(os.path.join(self.path, filename))
+
+
+# Cache used by cached_runpp if no cache is given
+cache_default = pf_cache()
+
+
+@instr.instrumented('cached_runpp')
+def cached_runpp(net, cache=None, **kwargs):
+    """ Run the power flow by pandapower (pandapower.runpp), unless results for the same state of the network
+        and the same options are in the cache, in which case the result tables and the internal data structures
+        set by the power flow (see internals_cached) are copied to the network, so that the network is in the
+        same state as after running the power flow
+
+        Inputs:
+            net: pandapower network
+            cache: pf_cache object (optional; default: cache_default)
+            kwargs: Options for pandapower.runpp
+
+        Outputs:
+            hit: True if the results were found in the cache
+    """
+    if cache is None:
+        cache = cache_default
+    time_start = time.perf_counter()
+    key = fingerprint(net, **kwargs)
+    cache.time_fingerprint += time.perf_counter() - time_start
+
+    entry = cache.get(key)
+    if entry is not None:
+        for table, results in entry['results'].items():
+            net[table] = results.copy()
+        for name, value in entry['internals'].items():
+            net[name] = copy.deepcopy(value)
+        net['converged'] = True
+        return True
+
+    # pandapower is only imported when it is needed (it takes a long time to import)
+    import pandapower as pp
+
+    time_start = time.perf_counter()
+    pp.runpp(net, **kwargs)
+    time_pf = time.perf_counter() - time_start
+    results = {table: net[table].copy() for table in net.keys()
+        if table.startswith('res_') and isinstance(net[table], pd.DataFrame) and len(net[table].index) > 0}
+    internals = {name: copy.deepcopy(net[name]) for name in internals_cached if name in net}
+    cache.put(key, results, time_pf, internals)
+    return False
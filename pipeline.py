@@ -0,0 +1,340 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 2026-10-19
+
+Module (and command-line tool) for building the CINELDI MV reference data set by running the processing
+scripts as a pipeline of steps with declared input and output files. A step is only run if its outputs
+are missing or have been modified, or if the contents of its input files, of the script itself or of the
+modules of the code folder that the script imports have changed since it was last run (tracked by content
+hashes in a state file in the data folder, in the style of make); steps that do not depend on each other
+are run in parallel.
+
+Usage (from the folder with the code):
+    python pipeline.py --data-path <folder with the data set> [--jobs 4] [--force] [--dry-run] [steps ...]
+
+The data folder can also be given by the environment variable CINELDI_DATA_PATH, which is also used to
+pass the data folder on to the scripts. If steps are given, only these steps and the steps they depend
+on are considered.
+"""
+
+import argparse
+import ast
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+# Folder with the code (scripts)
+path_code = os.path.dirname(os.path.abspath(__file__))
+
+# Name of the file (in the data folder) storing content hashes of the inputs and outputs of each step
+filename_state = '.pipeline_state.json'
+
+# Steps of the pipeline, with input and output files relative to the data folder (the modules of the code
+# folder that a script imports are tracked automatically; other code files can be given by a 'code' list);
+# snapshots from create_grid_with_load_snapshot.py are written to the folder the script is run from, i.e.
+# the data folder
+steps = {
+    'process_grid_data': {
+        'script': 'process_grid_data.py',
+        'inputs': ['grid_data_input/Cineldi124Bus_Busdata.csv', 'grid_data_input/Cineldi124Bus_Branch.csv',
+            'grid_data_input/CINELDI_MV_reference_grid_branch_installation_year.csv',
+            'distribution_line_types_in_reference_grid.csv'],
+        'outputs': ['CINELDI_MV_reference_grid_base_bus.csv', 'CINELDI_MV_reference_grid_base_branch.csv',
+            'CINELDI_MV_reference_grid_base_bus_extra.csv', 'CINELDI_MV_reference_grid_base_branch_extra.csv',
+            'CINELDI_MV_reference_grid_base_branch_pf_sol.csv', 'CINELDI_MV_reference_grid_base.xls'],
+    },
+    'calc_share_customer_type': {
+        'script': 'calc_share_customer_type.py',
+        'inputs': ['load_data_input/load_data_set_original.xlsx'],
+        'outputs': ['share_load_per_customer_type.csv'],
+    },
+    'create_load_mapping': {
+        'script': 'create_load_mapping.py',
+        'inputs': ['CINELDI_MV_reference_grid_base_bus.csv', 'CINELDI_MV_reference_grid_base_branch.csv',
+            'CINELDI_MV_reference_grid_base_branch_extra.csv', 'time_series_IDs_primarily_residential.csv',
+            'time_series_IDs_irregular.csv', 'load_data_CINELDI_MV_reference_system.csv', 'scenario_LEC_only.csv'],
+        'outputs': ['mapping_loads_to_CINELDI_MV_reference_grid.csv'],
+    },
+    'prepare_reldata': {
+        'script': 'prepare_reldata.py',
+        'inputs': ['distribution_line_types_in_reference_grid.csv', 'reldata_for_component_types.csv',
+            'CINELDI_MV_reference_grid_base_bus.csv', 'CINELDI_MV_reference_grid_base_branch.csv',
+            'CINELDI_MV_reference_grid_base_branch_extra.csv', 'share_load_per_customer_type.csv',
+            'mapping_loads_to_CINELDI_MV_reference_grid.csv', 'load_data_CINELDI_MV_reference_system.csv'],
+        'outputs': ['CINELDI_MV_reference_system_reldata.csv', 'CINELDI_MV_reference_system_load_point.csv',
+            'customer_interruption_cost_data.csv'],
+    },
+    'create_grid_with_load_snapshot': {
+        'script': 'create_grid_with_load_snapshot.py',
+        'inputs': ['CINELDI_MV_reference_grid_base_bus.csv', 'load_data_CINELDI_MV_reference_system.csv',
+            'mapping_loads_to_CINELDI_MV_reference_grid.csv', 'scenario_LEC_only.csv'],
+        'outputs': ['CINELDI_MV_reference_grid_snapshot_bus.csv'],
+    },
+}
+
+
+def get_dependencies(steps):
+    """ Find the steps that each step depends on, i.e. the steps with outputs that are inputs of the step
+
+        Inputs:
+            steps: Dictionary of steps (as the module variable steps)
+
+        Outputs:
+            dependencies: Dictionary with a set of names of the steps each step depends on
+    """
+    producer = {filename: name for name, step in steps.items() for filename in step['outputs']}
+    return {name: {producer[filename] for filename in step['inputs'] if filename in producer and producer[filename] != name}
+        for name, step in steps.items()}
+
+
+def select_steps(steps, targets):
+    """ Return the names of the given target steps and all steps they (directly or indirectly) depend on """
+    dependencies = get_dependencies(steps)
+    selected = set()
+    stack = list(targets)
+    while len(stack) > 0:
+        name = stack.pop()
+        if name not in steps:
+            raise KeyError('Unknown step: ' + name)
+        if name not in selected:
+            selected.add(name)
+            stack.extend(dependencies[name])
+    return selected
+
+
+class file_hashes(object):
+
+    def __init__(self, cache=None):
+        """
+        Initialization of object for calculating content hashes of files, where hashes are only
+        recalculated for files whose size or modification time has changed
+
+        Inputs:
+            cache: Dictionary with previously calculated hashes (as returned by get_cache) (optional)
+        """
+        self.cache = dict(cache) if cache is not None else {}
+
+
+    def get_hash(self, filename_fullpath):
+        """ Return the BLAKE2 hash of the contents of a file (None if the file does not exist) """
+        if not os.path.isfile(filename_fullpath):
+            return None
+        stat = os.stat(filename_fullpath)
+        key = os.path.abspath(filename_fullpath)
+        cached = self.cache.get(key)
+        if cached is not None and cached['size'] == stat.st_size and cached['mtime_ns'] == stat.st_mtime_ns:
+            return cached['hash']
+
+        h = hashlib.blake2b(digest_size=16)
+        with open(filename_fullpath, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                h.update(block)
+        self.cache[key] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'hash': h.hexdigest()}
+        return h.hexdigest()
+
+
+    def get_cache(self):
+        return self.cache
+
+
+def read_state(path_data_set):
+    filename_state_fullpath = os.path.join(path_data_set, filename_state)
+    if not os.path.isfile(filename_state_fullpath):
+        return {'steps': {}, 'hashes': {}}
+    with open(filename_state_fullpath) as f:
+        return json.load(f)
+
+
+def write_state(path_data_set, state):
+    # Write to a temporary file first so that the state file is not corrupted if the pipeline is interrupted
+    filename_state_fullpath = os.path.join(path_data_set, filename_state)
+    with open(filename_state_fullpath + '.tmp', 'w') as f:
+        json.dump(state, f, indent=1, sort_keys=True)
+    os.replace(filename_state_fullpath + '.tmp', filename_state_fullpath)
+
+
+def get_local_imports(filename_script):
+    """ Modules of the code folder that a script imports, directly or through other modules of the code folder
+
+        Inputs:
+            filename_script: File name of the script (relative to the code folder)
+
+        Outputs:
+            filenames: Sorted list of file names (relative to the code folder) of the imported modules
+    """
+    found = set()
+    stack = [filename_script]
+    while len(stack) > 0:
+        filename = stack.pop()
+        try:
+            with open(os.path.join(path_code, filename), encoding='utf-8') as f:
+                tree = ast.parse(f.read(), filename=filename)
+        except (OSError, SyntaxError, ValueError):
+            continue
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                modules = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.module is not None and node.level == 0:
+                modules = [node.module]
+            else:
+                continue
+            for module in modules:
+                filename_module = module.split('.')[0] + '.py'
+                if filename_module not in found and filename_module != filename_script and os.path.isfile(os.path.join(path_code, filename_module)):
+                    found.add(filename_module)
+                    stack.append(filename_module)
+    return sorted(found)
+
+
+def get_signature(step, path_data_set, hashes):
+    """ Content hashes of the script, the modules of the code folder it imports (and other code files given by
+        the optional 'code' list of the step) and the input files of a step """
+    signature = {'script': hashes.get_hash(os.path.join(path_code, step['script']))}
+    for filename in sorted(set(get_local_imports(step['script'])) | set(step.get('code', []))):
+        signature['code:' + filename] = hashes.get_hash(os.path.join(path_code, filename))
+    for filename in step['inputs']:
+        signature[filename] = hashes.get_hash(os.path.join(path_data_set, filename))
+    return signature
+
+
+def is_up_to_date(name, step, path_data_set, state, hashes):
+    """ Return True if a step has been run with the current script and inputs and its outputs are unchanged """
+    state_step = state['steps'].get(name)
+    if state_step is None or state_step['signature'] != get_signature(step, path_data_set, hashes):
+        return False
+    for filename in step['outputs']:
+        hash_output = hashes.get_hash(os.path.join(path_data_set, filename))
+        if hash_output is None or hash_output != state_step['outputs'].get(filename):
+            return False
+    return True
+
+
+def run_step(name, step, path_data_set):
+    """ Run the script of a step in a separate process with the data folder as working directory
+
+        Outputs:
+            returncode: Return code of the script (0 if successful)
+            output: Standard output and error of the script
+            duration: Run time (s)
+    """
+    env = dict(os.environ)
+    env['CINELDI_DATA_PATH'] = path_data_set
+    t_start = time.perf_counter()
+    result = subprocess.run([sys.executable, os.path.join(path_code, step['script'])], cwd=path_data_set, env=env,
+        stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    return result.returncode, result.stdout, time.perf_counter() - t_start
+
+
+def run_pipeline(path_data_set, targets=None, n_jobs=4, force=False, dry_run=False, steps=steps, log=print):
+    """ Run the steps of the pipeline that are not up to date, in parallel where possible
+
+        Inputs:
+            path_data_set: Folder with the data set
+            targets: List of names of steps to run (optional; default: None, i.e. all steps)
+            n_jobs: Largest number of steps running at the same time (optional; default: 4)
+            force: True to run the steps even if they are up to date (optional; default: False)
+            dry_run: True to only report which steps would be run (optional; default: False)
+            steps: Dictionary of steps (optional; default: the module variable steps)
+            log: Function for reporting progress (optional; default: print)
+
+        Outputs:
+            status: Dictionary with the status of each step ('up to date', 'done', 'failed', 'blocked'
+                (not run since a step it depends on failed) or 'would run' (for dry runs))
+    """
+    path_data_set = os.path.abspath(path_data_set)
+    names = select_steps(steps, targets) if targets else set(steps)
+    dependencies = {name: deps & names for name, deps in get_dependencies(steps).items() if name in names}
+    state = read_state(path_data_set)
+    hashes = file_hashes(state.get('hashes'))
+
+    status = {}
+    changed = set()
+    pending = set(names)
+    running = {}
+
+    def process_ready(executor):
+        # Start (or skip) all pending steps whose dependencies are finished, until no more steps are ready
+        ready = [name for name in sorted(pending) if not any(dep in pending or dep in running.values() for dep in dependencies[name])]
+        while len(ready) > 0:
+            name = ready.pop(0)
+            pending.discard(name)
+            if any(status[dep] in ('failed', 'blocked') for dep in dependencies[name]):
+                status[name] = 'blocked'
+                log(name + ': blocked (a step it depends on failed)')
+            elif dry_run:
+                if force or (dependencies[name] & changed) or not is_up_to_date(name, steps[name], path_data_set, state, hashes):
+                    status[name] = 'would run'
+                    changed.add(name)
+                else:
+                    status[name] = 'up to date'
+                log(name + ': ' + status[name])
+            elif not force and is_up_to_date(name, steps[name], path_data_set, state, hashes):
+                status[name] = 'up to date'
+                log(name + ': up to date')
+            else:
+                log(name + ': running')
+                running[executor.submit(run_step, name, steps[name], path_data_set)] = name
+            if len(ready) == 0:
+                ready = [name for name in sorted(pending) if not any(dep in pending or dep in running.values() for dep in dependencies[name])]
+
+    with ThreadPoolExecutor(max_workers=max(1, n_jobs)) as executor:
+        process_ready(executor)
+        while len(running) > 0:
+            finished, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for future in finished:
+                name = running.pop(future)
+                returncode, output, duration = future.result()
+                if returncode == 0:
+                    # Record the signature of the inputs and the hashes of the outputs of the step
+                    state['steps'][name] = {'signature': get_signature(steps[name], path_data_set, hashes),
+                        'outputs': {filename: hashes.get_hash(os.path.join(path_data_set, filename)) for filename in steps[name]['outputs']},
+                        'duration_s': duration}
+                    status[name] = 'done'
+                    log(name + ': done ({:.1f} s)'.format(duration))
+                else:
+                    state['steps'].pop(name, None)
+                    status[name] = 'failed'
+                    log(name + ': failed (return code ' + str(returncode) + ')\n' + output[-2000:])
+            if not dry_run:
+                state['hashes'] = hashes.get_cache()
+                write_state(path_data_set, state)
+            process_ready(executor)
+
+    if not dry_run:
+        state['hashes'] = hashes.get_cache()
+        write_state(path_data_set, state)
+    return status
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Build the CINELDI MV reference data set, running only the steps that are not up to date')
+    parser.add_argument('steps', nargs='*', help='Steps to run (together with the steps they depend on); default: all steps')
+    parser.add_argument('--data-path', default=os.environ.get('CINELDI_DATA_PATH'), help='Folder with the data set (default: CINELDI_DATA_PATH)')
+    parser.add_argument('--jobs', '-j', type=int, default=4, help='Largest number of steps to run in parallel (default: 4)')
+    parser.add_argument('--force', action='store_true', help='Run steps even if they are up to date')
+    parser.add_argument('--dry-run', '-n', action='store_true', help='Only report which steps would be run')
+    parser.add_argument('--list', action='store_true', help='List the steps with their inputs and outputs')
+    args = parser.parse_args(argv)
+
+    if args.list:
+        dependencies = get_dependencies(steps)
+        for name, step in steps.items():
+            print(name + ' (' + step['script'] + ')')
+            print('    depends on: ' + (', '.join(sorted(dependencies[name])) or '-'))
+            print('    code: ' + ', '.join(sorted(set(get_local_imports(step['script'])) | set(step.get('code', [])))))
+            print('    inputs: ' + ', '.join(step['inputs']))
+            print('    outputs: ' + ', '.join(step['outputs']))
+        return 0
+    if args.data_path is None:
+        parser.error('The data folder must be given by --data-path or the environment variable CINELDI_DATA_PATH')
+
+    status = run_pipeline(args.data_path, targets=args.steps, n_jobs=args.jobs, force=args.force, dry_run=args.dry_run)
+    return 1 if any(value in ('failed', 'blocked') for value in status.values()) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
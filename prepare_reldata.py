@@ -11,22 +11,15 @@ for the CINELDI MV reference system.
 
 import pandas as pd
 import os
+import interruption_costs as ic
+import cineldi_dataset as cd
+import instrumentation as instr
 
 # %% Define input data
 
 # Location of (processed) data set for CINELDI MV reference system
-# (to be replaced by your own local data folder)
-path_data_set         = 'C:/Users/ivespe/Data_sets/CINELDI_MV_reference_system/'
-
-# Input file names
-filename_line_types = 'distribution_line_types_in_reference_grid.csv'
-filename_reldata_input = 'reldata_for_component_types.csv'
-filename_bus = 'CINELDI_MV_reference_grid_base_bus.csv'
-filename_branch = 'CINELDI_MV_reference_grid_base_branch.csv'
-filename_branch_extra = 'CINELDI_MV_reference_grid_base_branch_extra.csv'
-filename_share_load = 'share_load_per_customer_type.csv'
-filename_mapping_load = 'mapping_loads_to_CINELDI_MV_reference_grid.csv'
-filename_load_data = 'load_data_CINELDI_MV_reference_system.csv'
+# (to be replaced by your own local data folder, or given by the environment variable CINELDI_DATA_PATH)
+path_data_set         = os.environ.get('CINELDI_DATA_PATH', 'C:/Users/ivespe/Data_sets/CINELDI_MV_reference_system/')
 
 # Output file names
 filename_reldata_output = 'CINELDI_MV_reference_system_reldata.csv'
@@ -38,32 +31,24 @@ sectioning_time = 0.5
 
 # %% Load input data
 
-filename_reldata_input_fullpath = os.path.join(path_data_set,filename_reldata_input)
-filename_bus_fullpath = os.path.join(path_data_set,filename_bus)
-filename_branch_fullpath = os.path.join(path_data_set,filename_branch)
-filename_branch_extra_fullpath = os.path.join(path_data_set,filename_branch_extra)
-filename_line_types_fullpath = os.path.join(path_data_set,filename_line_types)
-filename_share_load_fullpath = os.path.join(path_data_set,filename_share_load)
-filename_mapping_load_fullpath = os.path.join(path_data_set,filename_mapping_load)
-filename_load_data_fullpath = os.path.join(path_data_set,filename_load_data)
-
-reldata_input = pd.read_csv(filename_reldata_input_fullpath, sep=';')
-reldata_input.set_index('main_type',drop=True,inplace=True)
-bus = pd.read_csv(filename_bus_fullpath, sep=';')
-bus.set_index('bus_i',drop=True,inplace=True)
-branch = pd.read_csv(filename_branch_fullpath, sep=';')
-branch_extra = pd.read_csv(filename_branch_extra_fullpath, sep=';')
-line_types = pd.read_csv(filename_line_types_fullpath, sep=';')
-line_types.set_index('type',drop=True,inplace=True)
-share_load = pd.read_csv(filename_share_load_fullpath, sep=';')
-share_load.drop(columns = ['time_series_ID'],inplace=True)
-mapping_load = pd.read_csv(filename_mapping_load_fullpath, sep=';')
-mapping_load.set_index('bus_i',drop=False,inplace=True)
-load_data = pd.read_csv(filename_load_data_fullpath, sep=';')
+st = instr.stage('prepare_reldata.read_input').start()
+# The input files are read concurrently (the DataFrames of the data set object are not to be modified in place)
+data = cd.cineldi_dataset(path_data_set).prefetch('reldata_input', 'bus', 'branch', 'branch_extra', 'line_types', 
+    'share_load', 'mapping', 'load_data')
+reldata_input = data.reldata_input
+bus = data.bus.set_index('bus_i')
+branch = data.branch
+branch_extra = data.branch_extra
+line_types = data.line_types
+share_load = data.share_load.drop(columns = ['time_series_ID'])
+mapping_load = data.mapping
+load_data = data.load_data
+st.stop(rows=len(branch.index))
 
 
 # %% Calculate line reliability data
 
+st = instr.stage('prepare_reldata.calc_line_reldata').start()
 # Initialize output DataFrame
 reldata = pd.DataFrame(index = branch_extra.index, columns = ['f_bus', 't_bus', 'lambda_perm', 'lambda_temp', 'r_perm', 'r_temp', 'sectioning_time'])
 
@@ -92,9 +77,11 @@ for i_branch in branch_extra.index:
     reldata.loc[i_branch,'r_perm'] = r_perm
     reldata.loc[i_branch,'r_temp'] = r_temp
     reldata.loc[i_branch,'sectioning_time'] = sectioning_time
+st.stop(rows=len(reldata.index))
 
 # %% Set values for load point reliability data 
 
+st = instr.stage('prepare_reldata.calc_load_point_data').start()
 bus_IDs_load_points = mapping_load.loc[mapping_load['existing_load'],'bus_i'].tolist()
 
 load_point_data = pd.DataFrame(index = bus_IDs_load_points, columns = ['bus_i', 'customer_type', 'P_ref_MW', 'P_avg_MW', 'ratio_P_ref_P_avg','c_NOK_per_kWh_1h','c_NOK_per_kWh_4h'])
@@ -109,14 +96,14 @@ for bus_i in load_point_data.index:
     load_point_data.loc[bus_i,'customer_type'] = share_load.loc[time_series_ID].idxmax()
     load_point_data.loc[bus_i,'P_ref_MW'] = P_ref_MW
     load_point_data.loc[bus_i,'ratio_P_ref_P_avg'] = P_ref_MW / P_avg_MW
+st.stop(rows=len(load_point_data.index))
 
 # %% Define cost functions for customer interruption costs
 
-# Average consumer price index for the year that the customer cost functions are defined for (2017) 
-# and for the reference year for the data set (2021) 
-# (Source: https://www.ssb.no/priser-og-prisindekser/konsumpriser/statistikk/konsumprisindeksen)
-KPI_2017 = 105.5
-KPI_2021 = 116.1
+st = instr.stage('prepare_reldata.calc_interruption_cost_data').start()
+# Cost functions of the regulation (at cost level 2017), converted to the cost level of the 
+# reference year for the data set (2021) by the consumer price index 
+cost_functions = ic.interruption_cost_functions(cost_level_factor=ic.KPI_2021/ic.KPI_2017)
 
 # %% Prepare interruption cost data for each customer type
 
@@ -137,33 +124,10 @@ customer_type_data.loc['public','f_c'] = 0.38
 customer_type_data.loc['industry','f_c'] = 0.38
 customer_type_data.loc['commercial','f_c'] = 0.49
 
-# Specific interruption cost function evaluated for interruption duration r = 1 hour
-# (Source: https://lovdata.no/forskrift/1999-03-11-302/§9-2)
-r = 1
-c_ref_1h_per_kW_2017 = pd.Series(index = customer_types, dtype='float64')
-c_ref_1h_per_kW_2017['residential'] = 8.8 + 14.7*r
-c_ref_1h_per_kW_2017['agriculture'] = 21.4+17.5*(r-1)
-c_ref_1h_per_kW_2017['public'] = 194.5+31.4*(r-1)
-c_ref_1h_per_kW_2017['industry'] = 132.6+92.5*(r-1)
-c_ref_1h_per_kW_2017['commercial'] = 220.3+102.4*(r-1)
-
-# Convert from cost level 2017 (in the current regulation) to cost level 2021
-c_ref_1h_per_kW_2021 = c_ref_1h_per_kW_2017 * KPI_2021/KPI_2017
-customer_type_data['c_ref_1h'] = c_ref_1h_per_kW_2021 
-
-# Specific interruption cost function evaluated for interruption duration r = 4 hours
-# (Source: https://lovdata.no/forskrift/1999-03-11-302/§9-2)
-r = 4
-c_ref_4h_per_kW_2017 = pd.Series(index = customer_types, dtype='float64')
-c_ref_4h_per_kW_2017['residential'] = 38.4+21.9*(r-2)
-c_ref_4h_per_kW_2017['agriculture'] = 74.2+16.1*(r-4)
-c_ref_4h_per_kW_2017['public'] = 288.9+58.2*(r-4)
-c_ref_4h_per_kW_2017['industry'] = 410.3+62.5*(r-4)
-c_ref_4h_per_kW_2017['commercial'] = 527.2+158.8 *(r-4)
-
-# Convert from cost level 2017 (in the current regulation) to cost level 2021
-c_ref_4h_per_kW_2021 = c_ref_4h_per_kW_2017 * KPI_2021/KPI_2017
-customer_type_data['c_ref_4h'] = c_ref_4h_per_kW_2021 
+# Specific interruption cost function evaluated for interruption duration r = 1 hour and r = 4 hours
+# (Source: https://lovdata.no/forskrift/1999-03-11-302/§9-2; see interruption_costs.py)
+customer_type_data['c_ref_1h'] = cost_functions.calc_c_ref(1, customer_types)
+customer_type_data['c_ref_4h'] = cost_functions.calc_c_ref(4, customer_types)
 
 
 # %% Add specific interruption cost data (in NOK/kWh) to the load point data
@@ -180,9 +144,11 @@ for i_bus in load_point_data.index:
     c_ref_4h = customer_type_data.loc[customer_type,'c_ref_4h']    
     c_NOK_per_kWh_4h = c_ref_4h/4 * f_c * ratio_P_ref_P_avg
     load_point_data.loc[i_bus,'c_NOK_per_kWh_4h'] = c_NOK_per_kWh_4h
+st.stop(rows=len(load_point_data.index))
 
 # %% Write output to files
 
+st = instr.stage('prepare_reldata.write_output').start()
 filename_reldata_output_fullpath = os.path.join(path_data_set,filename_reldata_output)
 reldata.to_csv(filename_reldata_output_fullpath, sep = ';', index = False)
 
@@ -192,5 +158,6 @@ load_point_data.to_csv(filename_load_point_data_fullpath, sep = ';', index = Fal
 
 filename_customer_type_data_fullpath = os.path.join(path_data_set,filename_customer_type_data)
 customer_type_data.to_csv(filename_customer_type_data_fullpath, sep = ';', index = True)
+st.stop()
 
 # %%
@@ -12,17 +12,18 @@ estimating line lengths. Also updating format of files to standard MATPOWER form
 
 import pandas as pd
 import os
-import math
 import pandapower as pp
 import pandapower_read_csv as ppcsv
+import line_types as lt
 
 # %% Set up paths and parameters
 
-# Path of folder with grid data files to be processed (inputs)
-path_input = 'C:/Users/ivespe/Data_sets/CINELDI_MV_reference_system/grid_data_input'
-
 #  Path of folder with processed grid data (outputs)
-path_data_set = 'C:/Users/ivespe/Data_sets/CINELDI_MV_reference_system'
+# (to be replaced by your own local data folder, or given by the environment variable CINELDI_DATA_PATH)
+path_data_set = os.environ.get('CINELDI_DATA_PATH', 'C:/Users/ivespe/Data_sets/CINELDI_MV_reference_system')
+
+# Path of folder with grid data files to be processed (inputs)
+path_input = os.path.join(path_data_set, 'grid_data_input')
 
 # True if rateA (branch flow limit) is in p.u. and should be converted to units MVA 
 do_mult_rateA = True
@@ -83,79 +84,39 @@ df_installation_year = pd.read_csv(filename_installation_year_fullpath, sep=';',
 
 # Assuming the grid to be operated at frequency 50 Hz
 f_hz = 50.0
-omega = math.pi * f_hz  # 1/s
 
 # Assuming the base power value to be 10 MVA
 baseMVA = 10
 
+# Approximate each cable to be one of the standard cable types according to a given mapping
+# (same rating, and same R/X value if several line types have the same rating)
+id_line_type, report_line_types = lt.match_line_types(branch, bus, line_type_data, baseMVA=baseMVA)
+
+for i_report in report_line_types.index:
+    i_branch = report_line_types.loc[i_report,'branch']
+    status = report_line_types.loc[i_report,'status']
+    if status == 'ambiguous':
+        print('Warning for branch #', i_branch , ': Multiple line types with the same rating and R/X value; choosing the first one')
+    elif status == 'unmatched':
+        print('Error for branch #', i_branch , ': No line types with the same rating and R/X value')
+
+if any(report_line_types['status'] == 'unmatched'):
+    exit()
+
+# Calculating length of cables and charging susceptance from standard cable type data
+b, type_line, length_km = lt.calc_branch_data_from_line_types(branch, bus, line_type_data, id_line_type, baseMVA=baseMVA, f_hz=f_hz)
+branch['b'] = b
+
+if do_mult_rateA:
+    # Convert branch rating from p.u. to units MVA
+    branch['rateA'] = branch['rateA'] * baseMVA
+
 # Create DataFrame for extra/custom/auxiliary data fields for branches
-branch_extra = pd.DataFrame(columns = ['type','length_km','installation_year','location_type'], index = branch.index)
-
-# Read line data (and we assume there are no transformers)
-for i_branch in branch.index:
-    f_bus = branch.loc[i_branch,'f_bus']
-    rateA = branch.loc[i_branch,'rateA']
-    r = branch.loc[i_branch,'r']
-    x = branch.loc[i_branch,'x']
-    
-    # Converting line rating to units A from p.u. (in units of baseMVA)
-    baseKV = bus.loc[f_bus,'baseKV']
-    I_max = round(rateA * baseMVA / baseKV  / math.sqrt(3) * 1000)
-
-    # Base impedance value (ohm)
-    Zni = baseKV**2/baseMVA  
-    r_ohm = r * Zni
-
-    # Approximate the cable to be one of the standard cable types according to a given mapping
-    ids_same_rating = line_type_data.index[line_type_data['Imax_A'] == I_max]
-
-    if len(ids_same_rating) == 1:
-        id_line_type = ids_same_rating[0]        
-    
-    elif len(ids_same_rating) > 1:
-        line_type_R_over_X = line_type_data.loc[ids_same_rating,'R_ohm_per_km'] / line_type_data.loc[ids_same_rating,'X_ohm_per_km']            
-        ids_same_R_over_X = line_type_R_over_X.index[round(line_type_R_over_X,2) == round(r/x,2)]
-        if len(ids_same_R_over_X) == 1:
-            id_line_type = ids_same_R_over_X[0]
-        elif len(ids_same_R_over_X) == 0:
-            print('Error for branch #', i_branch , ': No line types with the same rating and R/X value')
-            exit()
-        elif len(ids_same_R_over_X) > 0:
-            print('Warning for branch #', i_branch , ': Multiple line types with the same rating and R/X value; choosing the first one')            
-            id_line_type = ids_same_R_over_X[0]
-
-    elif len(ids_same_rating) == 0:
-        # If cable type is not defined (according to given mapping), assume it to be a fictitious 
-        # cable of negligible length (corresponding to the last entry in line_type_data)
-        id_line_type = len(line_type_data.index)-1
-
-    # Installation year of line
-    installation_year = df_installation_year.loc[i_branch,'installation_year']
-
-    # Identifier/name of the line type                    
-    type_line = line_type_data.loc[id_line_type,'type']
-
-    # Calculating length of cable
-    r_ohm_per_km = line_type_data.loc[id_line_type,'R_ohm_per_km']
-    length_km = r_ohm / r_ohm_per_km
-
-    # Finding charging susceptance from standard cable type data ("driftskapasitet", Cd, in μf_per_km)
-    c_μf_per_km = line_type_data.loc[id_line_type,'Cd_nF_per_km'] / 1000
-
-    # Converting charging susceptance from μF (per km) to p.u.
-    c_μf = c_μf_per_km * length_km 
-    b = 2*omega*Zni*c_μf/1e6 
-    branch.loc[i_branch,'b'] = b
-
-    if do_mult_rateA:
-        # Convert branch rating from p.u. to units MVA
-        branch.loc[i_branch,'rateA'] = rateA * baseMVA
-
-    # Add information to branch extra data fields
-    branch_extra.loc[i_branch,'length_km'] = length_km
-    branch_extra.loc[i_branch,'type'] = type_line
-    branch_extra.loc[i_branch,'location_type'] = 'semi-urban'
-    branch_extra.loc[i_branch,'installation_year'] = installation_year
+branch_extra = pd.DataFrame(index = branch.index)
+branch_extra['type'] = type_line
+branch_extra['length_km'] = length_km
+branch_extra['installation_year'] = df_installation_year.loc[branch.index,'installation_year'].to_numpy()
+branch_extra['location_type'] = 'semi-urban'
 
 # %% Remove reserve column if present
 if 'reserve' in branch.columns:
@@ -200,12 +161,7 @@ branch.columns = branch_cols_new
 
 # %% Create additional bus data (with parameters for ZIP load model)
 
-bus_extra = pd.DataFrame(columns = ['bus_i', 'constant_impedance', 'constant_current', 'constant_power'])
-for idx_bus in bus.index:    
-    if bus.loc[idx_bus,'Pd'] > 0:
-        # As default data, specify a constant power load at each bus with a load point
-        bus_extra_newrow = pd.DataFrame(data = {'bus_i': [bus.loc[idx_bus,'bus_i']], 'constant_impedance': [0], 'constant_current': [0], 'constant_power': [1]})
-        bus_extra = pd.concat([bus_extra, bus_extra_newrow], axis=0)
+bus_extra = lt.create_bus_extra(bus)
 
 # %% Write the modified branch and bus data to .csv files
 
@@ -0,0 +1,277 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 2026-10-19
+
+Module for power flow calculations for radially operated distribution grids by the backward/forward sweep
+method, formulated with the path matrix of the radial topology (see radial_topology.py): the branch
+currents are the sums of the currents drawn by the buses downstream of each branch (backward sweep), and
+the voltage of each bus is the source voltage minus the voltage drops over the branches on the path
+from the source (forward sweep). Both sweeps are sparse matrix products, so the power flow is solved for
+many operating states (e.g., all hours of a year) at once.
+
+The grid is assumed to have a single voltage level (no transformers), as the CINELDI MV reference grid.
+"""
+
+import math
+import numpy as np
+import pandas as pd
+from radial_topology import radial_topology
+import instrumentation as instr
+
+
+def get_bus_loads(net):
+    """ Get the load demand at each bus of a pandapower network (sum of the in-service loads, scaled by
+        their scaling factors)
+
+        Inputs:
+            net: pandapower network
+
+        Outputs:
+            P_mw: Array (1 x buses, in the order of net.bus.index) with active power load demand (MW)
+            Q_mvar: Array (1 x buses) with reactive power load demand (Mvar)
+    """
+    load = net.load.loc[net.load['in_service'].astype(bool)]
+    scaling = load['scaling'].to_numpy(dtype=float) if 'scaling' in load.columns else 1.0
+    pos = net.bus.index.get_indexer(load['bus'])
+    P_mw = np.bincount(pos, weights=load['p_mw'].to_numpy(dtype=float) * scaling, minlength=len(net.bus.index))
+    Q_mvar = np.bincount(pos, weights=load['q_mvar'].to_numpy(dtype=float) * scaling, minlength=len(net.bus.index))
+    return P_mw[np.newaxis, :], Q_mvar[np.newaxis, :]
+
+
+def get_load_time_series(net, profiles_mapped, hours=None):
+    """ Get the load demand of each in-service load of a pandapower network for a time series of operating states
+
+        Inputs:
+            net: pandapower network with the peak load of each load
+            profiles_mapped: DataFrame with relative load profiles mapped to buses (e.g., from
+                load_profiles.map_rel_load_profiles); rows are hours and columns are bus IDs (the names
+                of the loads of net.load); loads without a profile are not scaled
+            hours: List of hours (row indices of profiles_mapped) (optional; default: all hours)
+
+        Outputs:
+            P_mw: Array (hours x in-service loads, in the order of net.load) with active power load demand (MW)
+            Q_mvar: Array (hours x in-service loads) with reactive power load demand (Mvar)
+    """
+    if hours is None:
+        hours = profiles_mapped.index
+    load = net.load.loc[net.load['in_service'].astype(bool)]
+    names_load = load['name'].to_numpy()
+    scaling = np.ones((len(hours), len(names_load)))
+    has_profile = np.asarray(pd.Index(names_load).isin(profiles_mapped.columns))
+    scaling[:, has_profile] = profiles_mapped.loc[hours, names_load[has_profile]].to_numpy(dtype=float)
+    if 'scaling' in load.columns:
+        scaling = scaling * load['scaling'].to_numpy(dtype=float)
+    return scaling * load['p_mw'].to_numpy(dtype=float), scaling * load['q_mvar'].to_numpy(dtype=float)
+
+
+def get_bus_loads_time_series(net, profiles_mapped, hours=None):
+    """ Get the load demand at each bus of a pandapower network for a time series of operating states
+
+        Inputs:
+            net, profiles_mapped, hours: see get_load_time_series
+
+        Outputs:
+            P_mw: Array (hours x buses, in the order of net.bus.index) with active power load demand (MW)
+            Q_mvar: Array (hours x buses) with reactive power load demand (Mvar)
+    """
+    P_load, Q_load = get_load_time_series(net, profiles_mapped, hours)
+    # Matrix (loads x buses) for summing the loads at each bus
+    load = net.load.loc[net.load['in_service'].astype(bool)]
+    incidence = np.zeros((len(load.index), len(net.bus.index)))
+    incidence[np.arange(len(load.index)), net.bus.index.get_indexer(load['bus'])] = 1.0
+    return P_load @ incidence, Q_load @ incidence
+
+
+def get_bus_vm_min(net):
+    """ Get the lower voltage limit (p.u.) of each bus of a pandapower network (in the order of net.bus.index),
+        from net.bus.min_vm_pu (NaN, i.e. no limit, if the network has no voltage limits) """
+    return net.bus['min_vm_pu'].to_numpy(dtype=float) if 'min_vm_pu' in net.bus.columns else np.full(len(net.bus.index), np.nan)
+
+
+def split_tasks(tasks, n_parts):
+    """ Split a list of tasks into at most n_parts lists of about the same length (e.g., for worker processes) """
+    n_parts = max(1, min(n_parts, len(tasks)))
+    return [tasks[i::n_parts] for i in range(n_parts)]
+
+
+class radial_power_flow(object):
+
+    def __init__(self, topology, r_pu, x_pu, b_pu=None, vn_kv=None, max_i_ka=None, sn_mva=1.0, vm_source=1.0,
+            tol=1e-9, max_iter=100):
+        """
+        Initialization of radial power flow object for a given topology (the topology and the branch data
+        are kept, so that the power flow can be solved repeatedly for different load demand)
+
+        Inputs:
+            topology: radial_topology object
+            r_pu, x_pu: Arrays with the resistance and reactance of each branch (p.u. on base sn_mva)
+            b_pu: Array with the total charging susceptance of each branch (p.u.) (optional; default: none)
+            vn_kv: Array with the nominal voltage of each branch (kV), for currents in kA (optional)
+            max_i_ka: Array with the current rating of each branch (kA), for the loading (optional)
+            sn_mva: Base power (MVA) (optional; default: 1)
+            vm_source: Voltage magnitude at the source bus (p.u.) (optional; default: 1.0)
+            tol: Convergence tolerance for the change in bus voltages (p.u.) (optional)
+            max_iter: Maximum number of iterations (optional; default: 100)
+        """
+        self.topology = topology
+        self.sn_mva = sn_mva
+        self.vm_source = vm_source
+        self.tol = tol
+        self.max_iter = max_iter
+        n_branch = len(topology.f_pos)
+        self.r_pu = np.asarray(r_pu, dtype=float)
+        self.x_pu = np.asarray(x_pu, dtype=float)
+        self.b_pu = np.asarray(b_pu, dtype=float) if b_pu is not None else np.zeros(n_branch)
+        self.vn_kv = np.asarray(vn_kv, dtype=float) if vn_kv is not None else None
+        self.max_i_ka = np.asarray(max_i_ka, dtype=float) if max_i_ka is not None else None
+
+        # Impedance of the in-service branches of the tree (zero for tie branches)
+        in_service = topology.branch_child >= 0
+        self.z_pu = np.where(in_service, self.r_pu + 1j * self.x_pu, 0.0)
+
+        # Shunt admittance at each bus from half the charging susceptance of each in-service branch
+        n_bus = len(topology.bus_IDs)
+        b_half = np.where(in_service, 0.5 * self.b_pu, 0.0)
+        y_shunt = 1j * (np.bincount(topology.f_pos, weights=b_half, minlength=n_bus) + np.bincount(topology.t_pos, weights=b_half, minlength=n_bus))
+        y_shunt[~topology.energized] = 0.0
+        self.y_shunt = y_shunt
+
+        # Backward sweep: branch currents = path_matrix x bus currents;
+        # forward sweep: voltage drops = path_matrix^T x (branch impedance x branch currents)
+        self.path_matrix = topology.path_matrix.tocsr()
+        self.path_matrix_T = topology.path_matrix.T.tocsr()
+
+
+    def _get_arguments(self, branches=slice(None)):
+        return {'r_pu': self.r_pu[branches], 'x_pu': self.x_pu[branches], 'b_pu': self.b_pu[branches],
+            'vn_kv': self.vn_kv[branches] if self.vn_kv is not None else None,
+            'max_i_ka': self.max_i_ka[branches] if self.max_i_ka is not None else None,
+            'sn_mva': self.sn_mva, 'vm_source': self.vm_source, 'tol': self.tol, 'max_iter': self.max_iter}
+
+
+    @classmethod
+    def from_net(cls, net, topology=None, **kwargs):
+        """ Set up radial power flow object from the lines of a pandapower network
+
+            Inputs:
+                net: pandapower network (e.g., as set up by pandapower_read_csv.read_net_from_csv)
+                topology: radial_topology object for the network (optional; default: set up from net)
+                kwargs: Other arguments (see __init__)
+
+            Outputs:
+                pf: radial_power_flow object
+        """
+        if topology is None:
+            topology = radial_topology.from_net(net)
+        vn_kv = net.bus.loc[net.line['from_bus'], 'vn_kv'].to_numpy(dtype=float)
+        z_base = vn_kv**2 / net.sn_mva
+        n_parallel = net.line['parallel'].to_numpy(dtype=float) if 'parallel' in net.line.columns else 1.0
+        length = net.line['length_km'].to_numpy(dtype=float)
+        r_pu = net.line['r_ohm_per_km'].to_numpy(dtype=float) * length / n_parallel / z_base
+        x_pu = net.line['x_ohm_per_km'].to_numpy(dtype=float) * length / n_parallel / z_base
+        b_pu = 2 * math.pi * net.f_hz * net.line['c_nf_per_km'].to_numpy(dtype=float) * 1e-9 * length * n_parallel * z_base
+        max_i_ka = net.line['max_i_ka'].to_numpy(dtype=float) * n_parallel
+        kwargs.setdefault('vm_source', float(net.ext_grid['vm_pu'].iloc[0]))
+        return cls(topology, r_pu, x_pu, b_pu=b_pu, vn_kv=vn_kv, max_i_ka=max_i_ka, sn_mva=net.sn_mva, **kwargs)
+
+
+    def with_branch_status(self, in_service):
+        """ Return power flow object for the same grid with a different set of in-service branches
+            (e.g., after a branch outage and closing a tie branch)
+
+            Inputs:
+                in_service: Array-like with the new in-service status of each branch
+
+            Outputs:
+                pf: radial_power_flow object
+        """
+        return radial_power_flow(self.topology.with_branch_status(in_service), **self._get_arguments())
+
+
+    def get_subgrid(self, branches, in_service=None):
+        """ Return power flow object for the part of the grid with the given branches and the buses they
+            connect (e.g., some feeders, possibly with a different set of in-service branches), so that
+            the power flow can be solved for this part only
+
+            Inputs:
+                branches: Array with the indices of the branches of the part of the grid
+                in_service: Array-like with the in-service status of these branches (optional;
+                    default: the present status)
+
+            Outputs:
+                pf: radial_power_flow object for the part of the grid, with attributes pos_buses and
+                    branches giving the positions of its buses and branches in the full grid
+        """
+        topology = self.topology
+        branches = np.asarray(branches)
+        if in_service is None:
+            in_service = topology.in_service[branches]
+        pos_buses = np.unique(np.concatenate([[topology.pos_source], topology.f_pos[branches], topology.t_pos[branches]]))
+        topology_sub = radial_topology(topology.bus_IDs[topology.f_pos[branches]], topology.bus_IDs[topology.t_pos[branches]],
+            in_service, bus_IDs=topology.bus_IDs[pos_buses], bus_source=topology.bus_source)
+        pf = radial_power_flow(topology_sub, **self._get_arguments(branches))
+        pf.pos_buses = pos_buses
+        pf.branches = branches
+        return pf
+
+
+    def solve(self, P_mw, Q_mvar):
+        """ Solve the power flow for one or more operating states
+
+            Inputs:
+                P_mw: Array (states x buses, in the order of topology.bus_IDs) with active power load (MW)
+                Q_mvar: Array (states x buses) with reactive power load (Mvar)
+
+            Outputs:
+                results: Dictionary with arrays (states x buses or states x branches):
+                    'vm_pu', 'va_degree': Bus voltage magnitude (p.u.) and angle (degrees)
+                    'i_ka': Branch current (kA; p.u. if vn_kv is not given)
+                    'loading_percent': Branch current in % of max_i_ka (if max_i_ka is given)
+                    'p_mw', 'q_mvar': Power flow into each branch at its upstream end (MW and Mvar)
+                    'pl_mw', 'ql_mvar': Losses of each branch (MW and Mvar)
+                and 'n_iter' (number of iterations) and 'converged' (True if converged)
+        """
+        topology = self.topology
+        S_load = (np.atleast_2d(np.asarray(P_mw, dtype=float)) + 1j * np.atleast_2d(np.asarray(Q_mvar, dtype=float))) / self.sn_mva
+        S_load[:, ~topology.energized] = 0.0
+        S_load[:, topology.pos_source] = 0.0
+        n_states, n_bus = S_load.shape
+        if n_bus != len(topology.bus_IDs):
+            raise ValueError('Expected load demand for ' + str(len(topology.bus_IDs)) + ' buses, got ' + str(n_bus))
+
+        with instr.stage('radial_power_flow.solve', rows=n_states):
+            V = np.full((n_states, n_bus), complex(self.vm_source))
+            V[:, ~topology.energized] = 0.0
+            energized = topology.energized
+            converged = False
+            for n_iter in range(1, self.max_iter + 1):
+                # Backward sweep: currents drawn by the loads and shunts, summed over the downstream buses
+                I_bus = np.zeros_like(V)
+                I_bus[:, energized] = np.conj(S_load[:, energized] / V[:, energized]) + self.y_shunt[energized] * V[:, energized]
+                I_branch = (self.path_matrix @ I_bus.T).T
+                # Forward sweep: voltage drops over the branches on the path from the source
+                V_new = self.vm_source - (self.path_matrix_T @ (self.z_pu[:, np.newaxis] * I_branch.T)).T
+                V_new[:, ~energized] = 0.0
+                change = np.abs(V_new - V).max() if V.size > 0 else 0.0
+                V = V_new
+                if change < self.tol:
+                    converged = True
+                    break
+
+        results = {'n_iter': n_iter, 'converged': converged}
+        results['vm_pu'] = np.abs(V)
+        results['va_degree'] = np.degrees(np.angle(V))
+        i_base_ka = self.sn_mva / (math.sqrt(3) * self.vn_kv) if self.vn_kv is not None else 1.0
+        results['i_ka'] = np.abs(I_branch) * i_base_ka
+        if self.max_i_ka is not None:
+            with np.errstate(divide='ignore', invalid='ignore'):
+                results['loading_percent'] = results['i_ka'] / self.max_i_ka * 100
+        # Power into each branch at its upstream end (voltage of the parent bus of the downstream bus)
+        pos_up = np.where(topology.branch_child >= 0, topology.parent_bus[np.maximum(topology.branch_child, 0)], topology.pos_source)
+        S_branch = V[:, pos_up] * np.conj(I_branch) * self.sn_mva
+        S_loss = self.z_pu * np.abs(I_branch)**2 * self.sn_mva
+        results['p_mw'] = S_branch.real
+        results['q_mvar'] = S_branch.imag
+        results['pl_mw'] = S_loss.real
+        results['ql_mvar'] = S_loss.imag
+        return results
@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 2026-10-19
+
+Module for representing the topology of a radially operated distribution grid (e.g., the CINELDI MV
+reference grid) by index arrays and sparse matrices that can be used for vectorized analyses.
+"""
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from scipy.sparse.csgraph import breadth_first_order
+
+
+class radial_topology(object):
+
+    def __init__(self, f_bus, t_bus, in_service, bus_IDs=None, bus_source=1):
+        """
+        Initialization of radial topology object. The buses that can be reached from the source bus
+        through in-service branches form a tree; branches that are not in service (e.g., the normally
+        open reserve connections between feeders) are kept track of as tie branches.
+
+        Inputs:
+            f_bus: Array-like with bus IDs of the from bus of each branch
+            t_bus: Array-like with bus IDs of the to bus of each branch
+            in_service: Array-like with True (or 1) for branches that are in service and False (or 0)
+                for branches that are out of service (open)
+            bus_IDs: Array-like with bus IDs of all buses in the grid
+                (optional; default: all buses that branches are connected to)
+            bus_source: Bus ID of the bus connected to the external (HV) grid
+                (optional; default: 1, as for the CINELDI MV reference grid)
+
+        The main attributes are (with bus positions referring to the order of bus_IDs):
+            parent_bus: For each bus, the position of the upstream neighbour bus (-1 for the source and
+                for buses that are not energized)
+            parent_branch: For each bus, the index of the branch connecting it to its upstream bus (-1 if none)
+            feeder: For each bus, the index of the first branch on the path from the source bus,
+                identifying the feeder the bus is supplied by (-1 if none)
+            branch_feeder: For each branch, the feeder (as defined above) it belongs to (-1 for tie branches)
+            branch_child: For each branch, the position of the bus downstream of it (-1 for tie branches)
+            path_matrix: Sparse matrix (branches x buses) with element (k, j) equal to 1 if branch k is on
+                the path from the source bus to bus j, i.e., if bus j is downstream of branch k
+        """
+
+        f_bus = np.asarray(f_bus)
+        t_bus = np.asarray(t_bus)
+        in_service = np.asarray(in_service).astype(bool)
+        if bus_IDs is None:
+            bus_IDs = np.unique(np.concatenate([f_bus, t_bus]))
+        bus_index = pd.Index(bus_IDs)
+
+        n_bus = len(bus_index)
+        n_branch = len(f_bus)
+        f_pos = bus_index.get_indexer(f_bus)
+        t_pos = bus_index.get_indexer(t_bus)
+        pos_source = bus_index.get_loc(bus_source)
+        if (f_pos < 0).any() or (t_pos < 0).any():
+            raise ValueError('Branches are connected to buses that are not in the list of bus IDs')
+
+        # Find the tree of energized buses by a breadth-first search from the source bus
+        i_in_service = np.flatnonzero(in_service)
+        adjacency = sp.csr_matrix((np.ones(len(i_in_service)), (f_pos[i_in_service], t_pos[i_in_service])), shape=(n_bus, n_bus))
+        order, predecessors = breadth_first_order(adjacency, pos_source, directed=False, return_predecessors=True)
+
+        energized = np.zeros(n_bus, dtype=bool)
+        energized[order] = True
+        if np.count_nonzero(energized[f_pos[i_in_service]]) > len(order) - 1:
+            raise ValueError('The in-service branches do not form a radial (tree) topology')
+
+        parent_bus = np.full(n_bus, -1)
+        parent_bus[order[1:]] = predecessors[order[1:]]
+
+        # Identify the branch between each bus and its upstream bus by looking up the (unordered) bus pair
+        keys_branch = np.minimum(f_pos, t_pos) * n_bus + np.maximum(f_pos, t_pos)
+        keys_in_service = keys_branch[i_in_service]
+        sorter = np.argsort(keys_in_service)
+        children = order[1:]
+        keys_children = np.minimum(children, parent_bus[children]) * n_bus + np.maximum(children, parent_bus[children])
+        parent_branch = np.full(n_bus, -1)
+        parent_branch[children] = i_in_service[sorter[np.searchsorted(keys_in_service, keys_children, sorter=sorter)]]
+
+        # Walk all buses towards the source simultaneously, which gives the depth of each bus,
+        # the feeder it belongs to and the entries of the path matrix with one vectorized step per level
+        depth = np.zeros(n_bus, dtype=int)
+        feeder = np.full(n_bus, -1)
+        rows_path = []
+        cols_path = []
+        buses = children.copy()
+        current = children.copy()
+        while len(current) > 0:
+            branches_current = parent_branch[current]
+            rows_path.append(branches_current)
+            cols_path.append(buses)
+            depth[buses] += 1
+            upstream = parent_bus[current]
+            at_source = (upstream == pos_source)
+            feeder[buses[at_source]] = branches_current[at_source]
+            buses = buses[~at_source]
+            current = upstream[~at_source]
+        rows_path = np.concatenate(rows_path) if rows_path else np.zeros(0, dtype=int)
+        cols_path = np.concatenate(cols_path) if cols_path else np.zeros(0, dtype=int)
+        path_matrix = sp.csr_matrix((np.ones(len(rows_path)), (rows_path, cols_path)), shape=(n_branch, n_bus))
+
+        branch_child = np.full(n_branch, -1)
+        branch_child[parent_branch[children]] = children
+        branch_feeder = np.full(n_branch, -1)
+        branch_feeder[parent_branch[children]] = feeder[children]
+
+        # Store variables to object
+        self.bus_IDs = bus_index
+        self.bus_source = bus_source
+        self.pos_source = pos_source
+        self.f_pos = f_pos
+        self.t_pos = t_pos
+        self.in_service = in_service
+        self.order = order
+        self.energized = energized
+        self.parent_bus = parent_bus
+        self.parent_branch = parent_branch
+        self.depth = depth
+        self.feeder = feeder
+        self.branch_feeder = branch_feeder
+        self.branch_child = branch_child
+        self.path_matrix = path_matrix
+        self.tie_branches = np.flatnonzero(~in_service)
+
+
+    @classmethod
+    def from_branch_data(cls, branch, bus_IDs=None, bus_source=1):
+        """ Set up radial topology from branch data on the MATPOWER format (as in the CINELDI data set)
+
+            Inputs:
+                branch: DataFrame with branch data (columns 'f_bus', 't_bus' and 'br_status')
+                bus_IDs: Bus IDs of all buses (optional; see __init__)
+                bus_source: Bus ID of the source bus (optional; default: 1)
+
+            Outputs:
+                topology: radial_topology object
+        """
+        return cls(branch['f_bus'].to_numpy(), branch['t_bus'].to_numpy(), branch['br_status'].to_numpy() > 0, bus_IDs=bus_IDs, bus_source=bus_source)
+
+
+    @classmethod
+    def from_net(cls, net):
+        """ Set up radial topology from the lines of a pandapower network (e.g., as set up by
+            pandapower_read_csv.read_net_from_csv); branch indices refer to the order of net.line
+
+            Inputs:
+                net: pandapower network object
+
+            Outputs:
+                topology: radial_topology object
+        """
+        bus_source = net.ext_grid['bus'].iloc[0]
+        return cls(net.line['from_bus'].to_numpy(), net.line['to_bus'].to_numpy(), net.line['in_service'].to_numpy(), bus_IDs=net.bus.index.to_numpy(), bus_source=bus_source)
+
+
+    def with_branch_status(self, in_service):
+        """ Return topology for the same grid with a different set of in-service branches
+            (e.g., after a branch outage or when moving an open point)
+
+            Inputs:
+                in_service: Array-like with the new in-service status of each branch
+
+            Outputs:
+                topology: radial_topology object
+        """
+        return radial_topology(self.bus_IDs[self.f_pos], self.bus_IDs[self.t_pos], in_service, bus_IDs=self.bus_IDs, bus_source=self.bus_source)
+
+
+    def get_bus_positions(self, bus_IDs):
+        """ Return the positions (used in the arrays and matrices of this object) for a list of bus IDs """
+        positions = self.bus_IDs.get_indexer(bus_IDs)
+        if (positions < 0).any():
+            raise KeyError('Bus IDs not found in the topology')
+        return positions
+
+
+    def get_reserve_branches(self):
+        """ Identify the branches for which the area downstream of the branch can be resupplied through
+            a tie branch (i.e., where a normally open branch connects the downstream area to the rest of
+            the grid) if the branch is disconnected
+
+            Outputs:
+                has_reserve: Boolean array with one entry per branch
+        """
+        if len(self.tie_branches) == 0:
+            return np.zeros(self.path_matrix.shape[0], dtype=bool)
+
+        # A tie branch can resupply the area downstream of branch k if exactly one of its end buses is downstream of k
+        downstream_f = self.path_matrix[:, self.f_pos[self.tie_branches]]
+        downstream_t = self.path_matrix[:, self.t_pos[self.tie_branches]]
+        crossing = abs(downstream_f - downstream_t)
+        return np.asarray(crossing.sum(axis=1)).ravel() > 0
@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 2026-10-19
+
+Module for analytical (RELRAD-style) calculation of reliability indices (SAIFI, SAIDI, EENS and
+CENS/KILE) for radially operated distribution grids, using the component reliability data and load point
+data prepared by prepare_reldata.py.
+"""
+
+import numpy as np
+import pandas as pd
+import radial_topology as rt
+
+# Classification of how a load point is affected by a failure of a component
+UNAFFECTED = 0
+AFFECTED_UNTIL_SECTIONING = 1
+AFFECTED_UNTIL_REPAIR = 2
+
+
+class reliability_analysis(object):
+
+    def __init__(self, reldata, load_points, br_status=None, bus_IDs=None, bus_source=1, use_reserve=True):
+        """
+        Initialization of the reliability analysis object. The components are the branches of the grid,
+        and the consequence of a failure of each component for each load point is classified as follows:
+            - Load points downstream of the failed component are affected until the component is repaired,
+              unless the area downstream can be resupplied through a tie branch (then until sectioning)
+            - Other load points in the same feeder are affected until the failed component is
+              disconnected (sectioning), since the feeder circuit breaker trips
+            - Load points in other feeders are unaffected
+        This assumes that there are disconnectors at both ends of all branches and that the tie branches
+        have sufficient capacity.
+
+        Inputs:
+            reldata: DataFrame with reliability data for each branch, on the format written by
+                prepare_reldata.py (columns 'f_bus', 't_bus', 'lambda_perm', 'lambda_temp' (failures per
+                year), 'r_perm', 'r_temp' and 'sectioning_time' (hours))
+            load_points: DataFrame indexed by bus ID of the load points with column 'P_avg_MW' (average load)
+                and optionally 'n_customers' (number of customers; 1 per load point if not given) and
+                'c_NOK_per_kWh_1h' and 'c_NOK_per_kWh_4h' (specific interruption costs, as written by
+                prepare_reldata.py; needed for CENS)
+            br_status: Array-like with the status of each branch (1 if in service, 0 if normally open)
+                (optional; default: all branches in service)
+            bus_IDs: Bus IDs of all buses (optional; default: all buses connected to branches)
+            bus_source: Bus ID of the source bus (optional; default: 1)
+            use_reserve: True if load points downstream of a failed component can be resupplied through
+                tie branches after sectioning (optional; default: True)
+        """
+
+        if br_status is None:
+            br_status = np.ones(len(reldata.index))
+
+        self.bus_IDs_all = bus_IDs
+        self.bus_source = bus_source
+        self.use_reserve = use_reserve
+        self.f_bus = reldata['f_bus'].to_numpy()
+        self.t_bus = reldata['t_bus'].to_numpy()
+        self.load_points = load_points
+        self.set_reldata(reldata)
+        self.set_topology(br_status)
+
+
+    def set_reldata(self, reldata):
+        """ Update the component reliability data (e.g., after changing the data for some components)
+
+            Inputs:
+                reldata: DataFrame with reliability data for each branch (see __init__)
+        """
+        self.lambda_perm = reldata['lambda_perm'].to_numpy(dtype=float)
+        self.lambda_temp = reldata['lambda_temp'].to_numpy(dtype=float)
+        self.r_perm = reldata['r_perm'].to_numpy(dtype=float)
+        self.r_temp = reldata['r_temp'].to_numpy(dtype=float)
+        self.sectioning_time = reldata['sectioning_time'].to_numpy(dtype=float)
+
+
+    def set_topology(self, br_status):
+        """ Update the topology of the grid (e.g., after moving an open point) and the precomputed
+            matrices identifying which load points are affected by failures of each component
+
+            Inputs:
+                br_status: Array-like with the status of each branch (1 if in service, 0 if normally open)
+        """
+        topology = rt.radial_topology(self.f_bus, self.t_bus, np.asarray(br_status) > 0, bus_IDs=self.bus_IDs_all, bus_source=self.bus_source)
+        pos_lp = topology.get_bus_positions(self.load_points.index)
+
+        # Sparse matrix (components x load points) of load points affected until repair
+        downstream = topology.path_matrix[:, pos_lp]
+        if self.use_reserve:
+            has_reserve = topology.get_reserve_branches()
+            downstream = downstream.multiply((~has_reserve).astype(float)[:, np.newaxis]).tocsr()
+            downstream.eliminate_zeros()
+
+        self.topology = topology
+        self.matrix_repair = downstream
+        self.feeder_lp = topology.feeder[pos_lp]
+
+
+    def get_classification_matrix(self):
+        """ Return the matrix classifying the consequence of a failure of each component for each load point
+
+            Outputs:
+                classification: DataFrame (components x load point bus IDs) with values UNAFFECTED,
+                    AFFECTED_UNTIL_SECTIONING or AFFECTED_UNTIL_REPAIR
+        """
+        feeder_comp = self.topology.branch_feeder
+        same_feeder = (feeder_comp[:, np.newaxis] == self.feeder_lp[np.newaxis, :]) & (feeder_comp[:, np.newaxis] >= 0)
+        classification = same_feeder.astype(np.int8) * AFFECTED_UNTIL_SECTIONING
+        classification[self.matrix_repair.toarray() > 0] = AFFECTED_UNTIL_REPAIR
+        return pd.DataFrame(classification, columns=self.load_points.index)
+
+
+    def sum_over_affected(self, values_repair, values_sectioning):
+        """ Sum values for each component over the failures affecting each load point
+
+            Inputs:
+                values_repair: Array (components, or components x m) of values to sum for load points
+                    affected until repair
+                values_sectioning: Array (same shape) of values to sum for load points affected until sectioning
+
+            Outputs:
+                sums: Array (load points, or load points x m) with the sums
+        """
+        # The sum for load points affected until sectioning is obtained as the sum over all components
+        # in the feeder minus the sum over the components for which the load point is affected until repair
+        sum_repair = self.matrix_repair.T @ values_repair
+        feeder_comp = self.topology.branch_feeder
+        in_feeder = feeder_comp >= 0
+        sum_feeder = np.zeros(values_sectioning.shape)
+        np.add.at(sum_feeder, feeder_comp[in_feeder], values_sectioning[in_feeder])
+        sum_feeder_lp = sum_feeder[np.maximum(self.feeder_lp, 0)]
+        sum_feeder_lp[self.feeder_lp < 0] = 0
+        sum_sectioning = sum_feeder_lp - self.matrix_repair.T @ values_sectioning
+        return sum_repair + sum_sectioning
+
+
+    def calc_load_point_indices(self):
+        """ Calculate reliability indices for each load point
+
+            Outputs:
+                indices_lp: DataFrame indexed by load point bus ID with columns 'lambda' (interruptions per year),
+                    'U' (annual interruption duration, hours per year), 'r' (average interruption duration, hours),
+                    'EENS_MWh' (expected energy not supplied, MWh per year) and 'CENS_NOK' (expected
+                    cost of energy not supplied, NOK per year; only if specific interruption costs are given)
+        """
+        lambda_tot = self.lambda_perm + self.lambda_temp
+
+        # Interruption durations for load points affected until repair and until sectioning, respectively
+        r_sec_perm = np.minimum(self.sectioning_time, self.r_perm)
+        r_sec_temp = np.minimum(self.sectioning_time, self.r_temp)
+        U_repair = self.lambda_perm * self.r_perm + self.lambda_temp * self.r_temp
+        U_sectioning = self.lambda_perm * r_sec_perm + self.lambda_temp * r_sec_temp
+
+        lambda_lp = self.sum_over_affected(lambda_tot, lambda_tot)
+        U_lp = self.sum_over_affected(U_repair, U_sectioning)
+        P_avg_MW = self.load_points['P_avg_MW'].to_numpy(dtype=float)
+
+        indices_lp = pd.DataFrame(index=self.load_points.index)
+        indices_lp['lambda'] = lambda_lp
+        indices_lp['U'] = U_lp
+        indices_lp['r'] = np.divide(U_lp, lambda_lp, out=np.zeros_like(U_lp), where=lambda_lp > 0)
+        indices_lp['EENS_MWh'] = P_avg_MW * U_lp
+
+        if {'c_NOK_per_kWh_1h', 'c_NOK_per_kWh_4h'}.issubset(self.load_points.columns):
+            # The specific interruption cost (NOK/kWh) is interpolated linearly between the values for 1 hour
+            # and 4 hours (and kept constant outside this range), i.e. c(r) = c_1h + w(r) * (c_4h - c_1h),
+            # so that the expected cost can be found as two sums over the affected load points
+            c_1h = self.load_points['c_NOK_per_kWh_1h'].to_numpy(dtype=float)
+            c_4h = self.load_points['c_NOK_per_kWh_4h'].to_numpy(dtype=float)
+            w = lambda r: np.clip((r - 1) / 3, 0, 1)
+            U_w_repair = self.lambda_perm * self.r_perm * w(self.r_perm) + self.lambda_temp * self.r_temp * w(self.r_temp)
+            U_w_sectioning = self.lambda_perm * r_sec_perm * w(r_sec_perm) + self.lambda_temp * r_sec_temp * w(r_sec_temp)
+            U_w_lp = self.sum_over_affected(U_w_repair, U_w_sectioning)
+            indices_lp['CENS_NOK'] = P_avg_MW * 1000 * (c_1h * U_lp + (c_4h - c_1h) * U_w_lp)
+
+        return indices_lp
+
+
+    def calc_system_indices(self, indices_lp=None):
+        """ Calculate system reliability indices
+
+            Inputs:
+                indices_lp: Load point indices from calc_load_point_indices (optional; calculated if not given)
+
+            Outputs:
+                indices_sys: Series with 'SAIFI' (interruptions per customer and year), 'SAIDI' (hours per
+                    customer and year), 'CAIDI' (hours per interruption), 'EENS_MWh' (MWh per year) and
+                    'CENS_NOK' (NOK per year; only if specific interruption costs are given)
+        """
+        if indices_lp is None:
+            indices_lp = self.calc_load_point_indices()
+
+        if 'n_customers' in self.load_points.columns:
+            n_customers = self.load_points['n_customers'].to_numpy(dtype=float)
+        else:
+            n_customers = np.ones(len(self.load_points.index))
+
+        indices_sys = pd.Series(dtype='float64')
+        indices_sys['SAIFI'] = n_customers @ indices_lp['lambda'].to_numpy() / n_customers.sum()
+        indices_sys['SAIDI'] = n_customers @ indices_lp['U'].to_numpy() / n_customers.sum()
+        indices_sys['CAIDI'] = indices_sys['SAIDI'] / indices_sys['SAIFI'] if indices_sys['SAIFI'] > 0 else 0
+        indices_sys['EENS_MWh'] = indices_lp['EENS_MWh'].sum()
+        if 'CENS_NOK' in indices_lp.columns:
+            indices_sys['CENS_NOK'] = indices_lp['CENS_NOK'].sum()
+
+        return indices_sys
+
+
+def calc_P_avg_load_points(bus, mapping_load, load_data):
+    """ Calculate the average load of the existing load points in the grid from the normalized load
+        time series, as in prepare_reldata.py
+
+        Inputs:
+            bus: DataFrame with bus data indexed by bus ID (column 'Pd' with peak load in MW)
+            mapping_load: DataFrame with mapping between load time series and buses (columns 'bus_i',
+                'time_series_ID' and 'existing_load')
+            load_data: DataFrame with normalized load time series with time series IDs as column names
+
+        Outputs:
+            P_avg_MW: Series with average load (MW) indexed by bus ID of the existing load points
+    """
+    mapping_existing = mapping_load.loc[mapping_load['existing_load'].astype(bool)]
+    bus_IDs = mapping_existing['bus_i'].to_numpy()
+    load_data_mean = load_data.mean(numeric_only=True)
+    load_data_mean.index = load_data_mean.index.astype(str)
+    mean_profiles = load_data_mean.loc[mapping_existing['time_series_ID'].astype(str)].to_numpy()
+    P_avg_MW = pd.Series(mean_profiles * bus.loc[bus_IDs, 'Pd'].to_numpy(dtype=float), index=pd.Index(bus_IDs, name='bus_i'))
+    return P_avg_MW
@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 2026-10-19
+
+Module for sequential Monte Carlo simulation of the reliability of supply for radially operated
+distribution grids, using the component reliability data prepared by prepare_reldata.py and
+hourly load time series for the load points (e.g., from load_profiles.py).
+"""
+
+import os
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+import reliability_analysis as ra
+
+# Number of hours in the simulated year
+n_hours_year = 8760
+
+# Maximum number of failure events to evaluate in one vectorized step (limits memory use)
+n_events_chunk = 20000
+
+# State used by the worker processes (set once per process by _init_worker)
+_worker_state = None
+
+
+def get_load_point_time_series(load_profiles, filename_load_mapping, bus, bus_IDs_load_points):
+    """ Get hourly load time series (MW) for the load points over the full year
+
+        Inputs:
+            load_profiles: load_profiles object (see load_profiles.py)
+            filename_load_mapping: Full path to file defining how load profiles are mapped onto buses of the grid model
+            bus: DataFrame with bus data indexed by bus ID (column 'Pd' with peak load in MW)
+            bus_IDs_load_points: List of bus IDs of the load points
+
+        Outputs:
+            load_lp: Array (hours x load points) with load demand in MW
+    """
+    profiles_mapped = load_profiles.map_rel_load_profiles(filename_load_mapping, list(range(1, 366)))
+    profiles_lp = profiles_mapped.loc[:, bus_IDs_load_points].to_numpy(dtype=float)
+    return profiles_lp * bus.loc[bus_IDs_load_points, 'Pd'].to_numpy(dtype=float)
+
+
+def _init_worker(state):
+    global _worker_state
+    _worker_state = state
+
+
+def _simulate_years(n_years, seed_seq, state=None):
+    """ Simulate a number of years with a given seed sequence; returns per-year results as an array
+        (years x [number of customer interruptions, customer interruption duration, energy not supplied])
+    """
+    if state is None:
+        state = _worker_state
+    rng = np.random.default_rng(seed_seq)
+    lambda_perm, lambda_temp = state['lambda_perm'], state['lambda_temp']
+    n_comp = len(lambda_perm)
+    results = np.zeros((n_years, 3))
+
+    for failure_type in ['perm', 'temp']:
+        # Sample the number of failures for all years and components at once, and then the failure
+        # times (uniformly distributed within the year for a Poisson process) and durations of all failures
+        n_failures = rng.poisson(state['lambda_' + failure_type], size=(n_years, n_comp))
+        year_event = np.repeat(np.repeat(np.arange(n_years), n_comp), n_failures.ravel())
+        comp_event = np.repeat(np.tile(np.arange(n_comp), n_years), n_failures.ravel())
+        n_events = len(comp_event)
+        if n_events == 0:
+            continue
+        t_event = rng.uniform(0, n_hours_year, n_events)
+        r_mean = state['r_' + failure_type][comp_event]
+        if state['duration_distribution'] == 'exponential':
+            r_event = rng.exponential(1.0, n_events) * r_mean
+        else:
+            r_event = r_mean
+        r_sec_event = np.minimum(state['sectioning_time'][comp_event], r_event)
+
+        for i_start in range(0, n_events, n_events_chunk):
+            sl = slice(i_start, i_start + n_events_chunk)
+            classification = state['classification'][comp_event[sl]]
+            duration = np.where(classification == ra.AFFECTED_UNTIL_REPAIR, r_event[sl, np.newaxis],
+                np.where(classification == ra.AFFECTED_UNTIL_SECTIONING, r_sec_event[sl, np.newaxis], 0.0))
+            ens = _calc_energy(state['load_cum'], state['load_ext'], t_event[sl], duration)
+            affected = classification != ra.UNAFFECTED
+            n_customers = state['n_customers']
+            np.add.at(results[:, 0], year_event[sl], affected @ n_customers)
+            np.add.at(results[:, 1], year_event[sl], duration @ n_customers)
+            np.add.at(results[:, 2], year_event[sl], ens.sum(axis=1))
+
+    return results
+
+
+def _calc_energy(load_cum, load_ext, t_start, duration):
+    """ Energy not supplied (MWh) for interruptions starting at times t_start (hours; one per event)
+        with durations (events x load points), found from the cumulative load with linear interpolation
+    """
+    cols = np.arange(load_cum.shape[1])[np.newaxis, :]
+    t_end = np.minimum(t_start[:, np.newaxis] + duration, load_cum.shape[0] - 1)
+    i_start = np.floor(t_start).astype(int)[:, np.newaxis]
+    i_end = np.floor(t_end).astype(int)
+    e_start = load_cum[i_start, cols] + (t_start[:, np.newaxis] - i_start) * load_ext[i_start, cols]
+    e_end = load_cum[i_end, cols] + (t_end - i_end) * load_ext[i_end, cols]
+    return e_end - e_start
+
+
+def run_monte_carlo(analysis, load_lp, max_years=100000, min_years=1000, batch_years=10000, tol=0.01,
+        seed=None, n_workers=None, duration_distribution='exponential'):
+    """ Run sequential Monte Carlo simulation of the reliability of supply until convergence
+
+        Failures of each component are assumed to occur according to a homogeneous Poisson process, and the
+        consequences of each failure for the load points are as classified by the reliability_analysis object.
+        Overlapping failures are treated independently of each other. Interruptions extending past the
+        end of the year continue into the start of the (same) load year.
+
+        Inputs:
+            analysis: reliability_analysis object (see reliability_analysis.py) with the component
+                reliability data, load points and topology to simulate
+            load_lp: Array (hours x load points) with hourly load demand in MW for the load points
+                (in the same order as analysis.load_points), e.g. from get_load_point_time_series
+            max_years: Maximum number of years to simulate (optional; default: 100000)
+            min_years: Minimum number of years to simulate before checking convergence (optional; default: 1000)
+            batch_years: Number of years to simulate between each convergence check (optional; default: 10000)
+            tol: Convergence criterion for the coefficient of variation of the estimates of the
+                expected SAIDI and EENS (optional; default: 0.01)
+            seed: Seed for the random number generator (optional; default: None, i.e. not reproducible)
+            n_workers: Number of worker processes (optional; default: None, i.e. number of processors;
+                with n_workers=1 the simulation is run in the current process)
+            duration_distribution: 'exponential' for exponentially distributed repair and outage times
+                with mean values from the reliability data, or 'fixed' for using the mean values directly
+
+        Outputs:
+            results_years: DataFrame with one row per simulated year and columns 'SAIFI', 'SAIDI' and 'EENS_MWh'
+            convergence: DataFrame with the estimated expected values and coefficients of variation
+                after each batch of years
+    """
+    if 'n_customers' in analysis.load_points.columns:
+        n_customers = analysis.load_points['n_customers'].to_numpy(dtype=float)
+    else:
+        n_customers = np.ones(len(analysis.load_points.index))
+
+    # Extend the load to two years to handle interruptions extending past the end of the year
+    load_lp = np.asarray(load_lp, dtype=float)
+    load_ext = np.concatenate([load_lp, load_lp, load_lp[-1:]], axis=0)
+    load_cum = np.concatenate([np.zeros((1, load_lp.shape[1])), np.cumsum(load_ext[:-1], axis=0)], axis=0)
+
+    state = {'lambda_perm': analysis.lambda_perm, 'lambda_temp': analysis.lambda_temp,
+        'r_perm': analysis.r_perm, 'r_temp': analysis.r_temp, 'sectioning_time': analysis.sectioning_time,
+        'classification': analysis.get_classification_matrix().to_numpy(),
+        'n_customers': n_customers, 'load_cum': load_cum, 'load_ext': load_ext,
+        'duration_distribution': duration_distribution}
+
+    seed_seq = np.random.SeedSequence(seed)
+    results = []
+    convergence = []
+    n_years = 0
+    executor = None
+    if n_workers != 1:
+        n_workers = n_workers or os.cpu_count()
+        executor = ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker, initargs=(state,))
+
+    try:
+        while n_years < max_years:
+            n_batch = min(batch_years if n_years >= min_years else min_years, max_years - n_years)
+
+            # Each worker simulates a share of the years in the batch with an independent random number stream
+            if executor is None:
+                results.append(_simulate_years(n_batch, seed_seq.spawn(1)[0], state))
+            else:
+                n_chunks = min(n_workers, n_batch)
+                years_chunks = np.diff(np.linspace(0, n_batch, n_chunks + 1).astype(int))
+                seeds_chunks = seed_seq.spawn(n_chunks)
+                results.extend(executor.map(_simulate_years, years_chunks, seeds_chunks))
+            n_years += n_batch
+
+            # Check convergence by the coefficient of variation of the estimated expected values
+            results_all = np.concatenate(results, axis=0)
+            mean = results_all.mean(axis=0)
+            std = results_all.std(axis=0, ddof=1)
+            cov = np.divide(std / np.sqrt(n_years), mean, out=np.zeros_like(mean), where=mean > 0)
+            convergence.append({'n_years': n_years, 'SAIDI': mean[1] / n_customers.sum(), 'EENS_MWh': mean[2],
+                'cov_SAIDI': cov[1], 'cov_EENS': cov[2]})
+            if max(cov[1], cov[2]) < tol:
+                break
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    results_all = np.concatenate(results, axis=0)
+    results_years = pd.DataFrame({'SAIFI': results_all[:, 0] / n_customers.sum(),
+        'SAIDI': results_all[:, 1] / n_customers.sum(), 'EENS_MWh': results_all[:, 2]})
+    results_years.index.name = 'year'
+
+    return results_years, pd.DataFrame(convergence)
@@ -0,0 +1,404 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 2026-10-19
+
+Module for storing results of time-series power flow analyses (e.g., for all hours of a year or of
+several years of a load scenario) in a folder with one subfolder per result quantity (e.g., vm_pu or
+loading_percent), where the results are appended as compressed chunks, i.e. matrices with one row per
+hour and one column per element (bus or line).
+
+For each chunk, small summaries are stored as well (for each element the minimum and maximum value and
+the hours they occur, and for each hour the minimum and maximum value and the elements they occur for).
+The summaries of all chunks are collected in an index for each quantity, so that queries as "worst
+voltage per bus in year 7" or "hours with any line loaded above 100 %" are answered from the index
+without reading the results themselves.
+
+Several workers (threads or processes) can append to the same store at the same time, since each writer
+writes its own chunk files (each chunk file is written to a temporary file and then renamed).
+
+Example:
+    store = results_store(path_results, elements=get_elements_from_net(net))
+    with store.get_writer() as writer:
+        for hour in hours:
+            ...
+            pp.runpp(net)
+            writer.append(year, hour, get_net_results(net))
+    v_min = store.get_element_summary('vm_pu', years=[7])['min']
+    hours_overload = store.get_hours_above('loading_percent', 100)
+"""
+
+import json
+import os
+import shutil
+import threading
+import uuid
+import numpy as np
+import pandas as pd
+import instrumentation as instr
+
+# Quantities that can be stored: element type and the column of the pandapower result table
+quantities = {'vm_pu': ('bus', 'res_bus', 'vm_pu'),
+    'va_degree': ('bus', 'res_bus', 'va_degree'),
+    'p_mw': ('bus', 'res_bus', 'p_mw'),
+    'q_mvar': ('bus', 'res_bus', 'q_mvar'),
+    'loading_percent': ('line', 'res_line', 'loading_percent'),
+    'i_ka': ('line', 'res_line', 'i_ka'),
+    'p_from_mw': ('line', 'res_line', 'p_from_mw'),
+    'q_from_mvar': ('line', 'res_line', 'q_from_mvar'),
+    'pl_mw': ('line', 'res_line', 'pl_mw'),
+    'ql_mvar': ('line', 'res_line', 'ql_mvar')}
+
+# Quantities stored by default by get_net_results
+quantities_default = ['vm_pu', 'p_mw', 'q_mvar', 'loading_percent', 'p_from_mw', 'q_from_mvar', 'pl_mw', 'ql_mvar']
+
+filename_meta = 'meta.json'
+filename_index = '_index.npz'
+
+# Arrays of the summary of each chunk
+_keys_element = ['el_min', 'el_max', 'el_argmin', 'el_argmax']
+_keys_hour = ['hour_min', 'hour_max', 'hour_argmin', 'hour_argmax']
+
+
+def get_elements_from_net(net):
+    """ Get the element IDs of the buses and lines of a pandapower network (for results_store) """
+    return {'bus': net.bus.index.tolist(), 'line': net.line.index.tolist()}
+
+
+def get_net_results(net, quantities_net=quantities_default):
+    """ Get the results of the last power flow calculation of a pandapower network
+
+        Inputs:
+            net: pandapower network with power flow results
+            quantities_net: List of quantities (see quantities) (optional)
+
+        Outputs:
+            values: Dictionary with an array of values (one per element) for each quantity
+    """
+    values = {}
+    for quantity in quantities_net:
+        element_type, table, column = quantities[quantity]
+        values[quantity] = net[table][column].to_numpy(dtype=float)
+    return values
+
+
+def _write_npz(filename, **arrays):
+    """ Write a compressed .npz file (to a temporary file first, so that readers never see a partial file) """
+    filename_tmp = os.path.join(os.path.dirname(filename), '.tmp_' + uuid.uuid4().hex + '_' + os.path.basename(filename))
+    with open(filename_tmp, 'wb') as f:
+        np.savez_compressed(f, **arrays)
+    os.replace(filename_tmp, filename)
+
+
+def _argmin_argmax(values):
+    """ Positions of the minimum and maximum values along the first axis, ignoring NaN values """
+    is_nan = np.isnan(values)
+    pos_min = np.argmin(np.where(is_nan, np.inf, values), axis=0)
+    pos_max = np.argmax(np.where(is_nan, -np.inf, values), axis=0)
+    return pos_min, pos_max
+
+
+def _calc_summary(values, hours):
+    """ Summary of a chunk (hours x elements) of results """
+    el_argmin, el_argmax = _argmin_argmax(values)
+    hour_argmin, hour_argmax = _argmin_argmax(values.T)
+    i_el = np.arange(values.shape[1])
+    i_hour = np.arange(values.shape[0])
+    return {'el_min': values[el_argmin, i_el], 'el_max': values[el_argmax, i_el],
+        'el_argmin': hours[el_argmin], 'el_argmax': hours[el_argmax],
+        'hour_min': values[i_hour, hour_argmin], 'hour_max': values[i_hour, hour_argmax],
+        'hour_argmin': hour_argmin, 'hour_argmax': hour_argmax}
+
+
+class results_writer(object):
+    """ Writer appending results to a results store (get it by results_store.get_writer); the results
+        are buffered and written as a chunk when the number of hours given by n_rows_chunk is reached,
+        when the year changes and when the writer is flushed or closed """
+
+    def __init__(self, store, writer_id=None, n_rows_chunk=744, dtype=np.float32):
+        """
+        Inputs:
+            store: results_store object
+            writer_id: ID that is part of the names of the chunk files of the writer; it must be
+                unique for writers writing at the same time (optional; default: a random ID). A writer
+                with the same ID as an earlier writer (e.g., when rerunning the same block of hours)
+                replaces the chunk files of the earlier writer.
+            n_rows_chunk: Maximum number of hours per chunk (optional; default: 744, i.e. one month)
+            dtype: Data type of the stored values (optional; default: float32; the summaries are
+                calculated before converting)
+        """
+        self.store = store
+        self.writer_id = writer_id if writer_id is not None else str(os.getpid()) + '_' + uuid.uuid4().hex[:8]
+        self.n_rows_chunk = n_rows_chunk
+        self.dtype = dtype
+        self.n_chunks = 0
+        self._year = None
+        self._hours = []
+        self._values = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    def append(self, year, hours, values):
+        """ Append results for one or more hours of a year
+
+            Inputs:
+                year: Year (e.g., relative to the reference year)
+                hours: Hour of the year or list of hours
+                values: Dictionary with the values of each quantity, as an array with one value per
+                    element (for a single hour) or an array (hours x elements)
+        """
+        hours = np.atleast_1d(hours)
+        if self._year is not None and year != self._year:
+            self.flush()
+        self._year = year
+        for quantity, values_quantity in values.items():
+            values_quantity = np.asarray(values_quantity, dtype=float).reshape(len(hours), -1)
+            n_elements = len(self.store.get_elements(quantity))
+            if values_quantity.shape[1] != n_elements:
+                raise ValueError('Expected ' + str(n_elements) + ' values of ' + quantity + ' per hour, got ' + str(values_quantity.shape[1]))
+            self._values.setdefault(quantity, []).append(values_quantity)
+        self._hours.append(hours)
+        if sum(len(h) for h in self._hours) >= self.n_rows_chunk:
+            self.flush()
+
+    def flush(self):
+        """ Write the buffered results as a chunk for each quantity """
+        if len(self._hours) == 0:
+            return
+        hours = np.concatenate(self._hours)
+        with instr.stage('results_store.write_chunk', rows=len(hours)):
+            for quantity, values_list in self._values.items():
+                values = np.concatenate(values_list)
+                if values.shape[0] != len(hours):
+                    raise ValueError('Values of ' + quantity + ' were not given for all hours appended')
+                folder = os.path.join(self.store.path, quantity)
+                os.makedirs(folder, exist_ok=True)
+                filename = os.path.join(folder, 'year' + str(self._year) + '_' + self.writer_id + '_' + '%05d' % self.n_chunks + '.npz')
+                _write_npz(filename, values=values.astype(self.dtype), hours=hours, year=np.array(self._year),
+                    **_calc_summary(values, hours))
+        self.n_chunks += 1
+        self._hours = []
+        self._values = {}
+
+    def close(self):
+        self.flush()
+
+
+class results_store(object):
+
+    def __init__(self, path:str, elements=None):
+        """
+        Initialization of results store object (a folder with the results)
+
+        Inputs:
+            path: Path of the folder of the store (created if it does not exist)
+            elements: Dictionary with the element IDs for each element type ('bus' and 'line'), e.g.
+                from get_elements_from_net; must be given when the store is created, and if given
+                for an existing store, they must be the same as when it was created (optional)
+        """
+        self.path = path
+        filename_meta_fullpath = os.path.join(path, filename_meta)
+        if elements is not None:
+            meta = {'elements': {element_type: np.asarray(IDs).tolist() for element_type, IDs in elements.items()}}
+            if os.path.isfile(filename_meta_fullpath):
+                with open(filename_meta_fullpath) as f:
+                    if json.load(f)['elements'] != meta['elements']:
+                        raise ValueError('The elements differ from those of the existing results store in ' + path)
+            else:
+                os.makedirs(path, exist_ok=True)
+                filename_tmp = filename_meta_fullpath + '.' + uuid.uuid4().hex + '.tmp'
+                with open(filename_tmp, 'w') as f:
+                    json.dump(meta, f)
+                os.replace(filename_tmp, filename_meta_fullpath)
+        if not os.path.isfile(filename_meta_fullpath):
+            raise FileNotFoundError('No results store in ' + path + ' (give the elements to create one)')
+        with open(filename_meta_fullpath) as f:
+            meta = json.load(f)
+        self.elements = {element_type: pd.Index(IDs) for element_type, IDs in meta['elements'].items()}
+        self._index = {}
+        self._lock = threading.Lock()
+
+    def get_writer(self, writer_id=None, n_rows_chunk=744, dtype=np.float32):
+        """ Get a writer for appending results to the store (see results_writer) """
+        return results_writer(self, writer_id=writer_id, n_rows_chunk=n_rows_chunk, dtype=dtype)
+
+    def get_elements(self, quantity:str):
+        """ Element IDs (bus or line IDs) of a quantity """
+        return self.elements[quantities[quantity][0]]
+
+    def get_quantities(self):
+        """ Quantities with results in the store """
+        return sorted(q for q in quantities if os.path.isdir(os.path.join(self.path, q)))
+
+    def clear(self):
+        """ Remove all results (the chunk files and the index of each quantity) from the store """
+        with self._lock:
+            for quantity in quantities:
+                folder = os.path.join(self.path, quantity)
+                if os.path.isdir(folder):
+                    shutil.rmtree(folder)
+            self._index = {}
+
+    def _list_chunks(self, quantity):
+        folder = os.path.join(self.path, quantity)
+        if not os.path.isdir(folder):
+            raise KeyError('No results of ' + quantity + ' in the store')
+        chunks = {}
+        for entry in os.scandir(folder):
+            if entry.name.endswith('.npz') and not entry.name.startswith(('.', '_')):
+                chunks[entry.name] = entry.stat().st_mtime_ns
+        return chunks
+
+    def _get_index(self, quantity):
+        """ Get the index (summaries of all chunks) of a quantity, updating it with chunks that have
+            been written (or rewritten) since it was last updated """
+        chunks = self._list_chunks(quantity)
+        with self._lock:
+            index = self._index.get(quantity)
+            filename_index_fullpath = os.path.join(self.path, quantity, filename_index)
+            if index is None and os.path.isfile(filename_index_fullpath):
+                with np.load(filename_index_fullpath) as f:
+                    index = {key: f[key] for key in f.files}
+            if index is not None and dict(zip(index['names'].tolist(), index['mtimes'].tolist())) == chunks:
+                self._index[quantity] = index
+                return index
+
+            with instr.stage('results_store.update_index') as st:
+                # Keep the summaries of the chunks that are unchanged and read the summaries of the others
+                entries = {}
+                if index is not None:
+                    offsets = np.concatenate([[0], np.cumsum(index['n_hours'])])
+                    for i, (name, mtime) in enumerate(zip(index['names'].tolist(), index['mtimes'].tolist())):
+                        if chunks.get(name) == mtime:
+                            sl = slice(offsets[i], offsets[i + 1])
+                            entries[name] = dict({key: index[key][i] for key in _keys_element},
+                                year=index['years'][i], hours=index['hours'][sl], **{key: index[key][sl] for key in _keys_hour})
+                names_new = [name for name in chunks if name not in entries]
+                for name in names_new:
+                    with np.load(os.path.join(self.path, quantity, name)) as f:
+                        # Only the small arrays are read (the values are not decompressed)
+                        entries[name] = {key: f[key] for key in _keys_element + _keys_hour + ['hours']}
+                        entries[name]['year'] = f['year'][()]
+                st.set_rows(len(names_new))
+
+                names = sorted(entries)
+                n_elements = len(self.get_elements(quantity))
+                index = {'names': np.array(names, dtype=str), 'mtimes': np.array([chunks[name] for name in names], dtype=np.int64),
+                    'years': np.array([entries[name]['year'] for name in names]),
+                    'n_hours': np.array([len(entries[name]['hours']) for name in names], dtype=np.int64),
+                    'hours': np.concatenate([entries[name]['hours'] for name in names] + [np.zeros(0, dtype=np.int64)])}
+                for key in _keys_element:
+                    index[key] = np.array([entries[name][key] for name in names]).reshape(len(names), n_elements)
+                for key in _keys_hour:
+                    index[key] = np.concatenate([entries[name][key] for name in names] + [np.zeros(0)])
+                _write_npz(filename_index_fullpath, **index)
+            self._index[quantity] = index
+            return index
+
+    def _select_chunks(self, index, years):
+        if years is None:
+            return np.ones(len(index['names']), dtype=bool)
+        return np.isin(index['years'], np.atleast_1d(years))
+
+    def get_element_summary(self, quantity:str, years=None):
+        """ Minimum and maximum value of a quantity for each element, and the year and hour they occur
+            (from the index; the results themselves are not read)
+
+            Inputs:
+                quantity: Quantity (e.g., 'vm_pu' or 'loading_percent')
+                years: Year or list of years to summarize (optional; default: all years)
+
+            Outputs:
+                summary: DataFrame indexed by element ID with columns 'min', 'year_min', 'hour_min',
+                    'max', 'year_max' and 'hour_max'
+        """
+        index = self._get_index(quantity)
+        sel = self._select_chunks(index, years)
+        columns = ['min', 'year_min', 'hour_min', 'max', 'year_max', 'hour_max']
+        if not sel.any():
+            return pd.DataFrame(columns=columns, index=self.get_elements(quantity))
+        el_min = index['el_min'][sel]
+        el_max = index['el_max'][sel]
+        pos_min = _argmin_argmax(el_min)[0]
+        pos_max = _argmin_argmax(el_max)[1]
+        i_el = np.arange(el_min.shape[1])
+        summary = pd.DataFrame({'min': el_min[pos_min, i_el], 'year_min': index['years'][sel][pos_min],
+            'hour_min': index['el_argmin'][sel][pos_min, i_el], 'max': el_max[pos_max, i_el],
+            'year_max': index['years'][sel][pos_max], 'hour_max': index['el_argmax'][sel][pos_max, i_el]},
+            index=self.get_elements(quantity), columns=columns)
+        return summary
+
+    def get_hour_summary(self, quantity:str, years=None):
+        """ Minimum and maximum value of a quantity for each hour, and the elements they occur for
+            (from the index; the results themselves are not read)
+
+            Inputs:
+                quantity: Quantity (e.g., 'vm_pu' or 'loading_percent')
+                years: Year or list of years (optional; default: all years)
+
+            Outputs:
+                summary: DataFrame indexed by year and hour with columns 'min', 'element_min', 'max'
+                    and 'element_max'
+        """
+        index = self._get_index(quantity)
+        sel_hours = np.repeat(self._select_chunks(index, years), index['n_hours'])
+        elements = self.get_elements(quantity)
+        summary = pd.DataFrame({'year': np.repeat(index['years'], index['n_hours'])[sel_hours],
+            'hour': index['hours'][sel_hours], 'min': index['hour_min'][sel_hours],
+            'element_min': elements[index['hour_argmin'][sel_hours].astype(int)],
+            'max': index['hour_max'][sel_hours], 'element_max': elements[index['hour_argmax'][sel_hours].astype(int)]})
+        return summary.set_index(['year', 'hour']).sort_index()
+
+    def get_hours_above(self, quantity:str, limit, years=None):
+        """ Year and hour of the hours where the value of a quantity for any element is above a limit
+            (e.g., hours with any line loaded above 100 %) """
+        summary = self.get_hour_summary(quantity, years)
+        return summary.index[summary['max'] > limit]
+
+    def get_hours_below(self, quantity:str, limit, years=None):
+        """ Year and hour of the hours where the value of a quantity for any element is below a limit
+            (e.g., hours with any bus voltage below 0.95 p.u.) """
+        summary = self.get_hour_summary(quantity, years)
+        return summary.index[summary['min'] < limit]
+
+    def read(self, quantity:str, years=None, hours=None, elements=None):
+        """ Read results of a quantity (only the chunks with the years and hours asked for are read)
+
+            Inputs:
+                quantity: Quantity (e.g., 'vm_pu' or 'loading_percent')
+                years: Year or list of years (optional; default: all years)
+                hours: List of hours of the year (optional; default: all hours)
+                elements: List of element IDs (optional; default: all elements)
+
+            Outputs:
+                results: DataFrame indexed by year and hour, with one column per element
+        """
+        index = self._get_index(quantity)
+        sel = self._select_chunks(index, years)
+        offsets = np.concatenate([[0], np.cumsum(index['n_hours'])])
+        elements_all = self.get_elements(quantity)
+        pos_elements = slice(None) if elements is None else elements_all.get_indexer(elements)
+        if elements is not None and (pos_elements < 0).any():
+            raise KeyError('Elements not in the results store: ' + str(list(pd.Index(elements)[pos_elements < 0])))
+
+        with instr.stage('results_store.read') as st:
+            values_list = []
+            index_list = []
+            for i in np.flatnonzero(sel):
+                hours_chunk = index['hours'][offsets[i]:offsets[i + 1]]
+                rows = np.ones(len(hours_chunk), dtype=bool) if hours is None else np.isin(hours_chunk, hours)
+                if not rows.any():
+                    continue
+                with np.load(os.path.join(self.path, quantity, index['names'][i])) as f:
+                    values_list.append(f['values'][rows][:, pos_elements])
+                index_list.append(pd.MultiIndex.from_arrays([np.full(rows.sum(), index['years'][i]), hours_chunk[rows]], names=['year', 'hour']))
+            columns = elements_all if elements is None else pd.Index(elements)
+            if len(values_list) == 0:
+                return pd.DataFrame(columns=columns, index=pd.MultiIndex.from_arrays([[], []], names=['year', 'hour']))
+            results = pd.DataFrame(np.concatenate(values_list), index=index_list[0].append(index_list[1:]), columns=columns)
+            st.set_rows(len(results.index))
+        return results.sort_index()
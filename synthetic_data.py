@@ -0,0 +1,361 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 2026-10-19
+
+Module for generating scaled-up versions of the CINELDI MV reference data set (grid data, load data and
+load mapping) for testing and benchmarking the code at larger scale, either by replicating the feeders of
+the reference grid under the HV bus and the load time series, or by generating statistically similar
+grids and load data of arbitrary size by sampling, re-wiring and perturbing feeders and load time series.
+"""
+
+import io
+import os
+import shutil
+import numpy as np
+import pandas as pd
+import radial_topology as rt
+
+# File names in the CINELDI MV reference data set
+filename_bus = 'CINELDI_MV_reference_grid_base_bus.csv'
+filename_branch = 'CINELDI_MV_reference_grid_base_branch.csv'
+filename_branch_extra = 'CINELDI_MV_reference_grid_base_branch_extra.csv'
+filename_bus_extra = 'CINELDI_MV_reference_grid_base_bus_extra.csv'
+filename_load_data = 'load_data_CINELDI_MV_reference_system.csv'
+filename_load_mapping = 'mapping_loads_to_CINELDI_MV_reference_grid.csv'
+filename_share_load = 'share_load_per_customer_type.csv'
+filename_irregular = 'time_series_IDs_irregular.csv'
+filename_residential = 'time_series_IDs_primarily_residential.csv'
+
+# Other files that are copied unchanged if they exist (data for component types, scenarios, etc.)
+filenames_copy = ['distribution_line_types_in_reference_grid.csv', 'reldata_for_component_types.csv',
+    'standard_underground_cable_types.csv', 'scenario_LEC_only.csv']
+
+
+# Number format for writing load data (significant digits are sufficient for normalized load data, and
+# writing with np.savetxt is several times faster than with DataFrame.to_csv for large load data sets)
+fmt_load_data = '%.8g'
+
+
+def _write_load_data(filename, index, columns, values, n_rows_chunk=500):
+    """ Write load data (hours x time series) to .csv file on the format of the CINELDI MV reference data set """
+    with open(filename, 'w') as f:
+        f.write(';'.join([str(index.name)] + [str(col) for col in columns]) + '\n')
+        for i_start in range(0, values.shape[0], n_rows_chunk):
+            buffer = io.StringIO()
+            np.savetxt(buffer, values[i_start:i_start + n_rows_chunk, :], fmt=fmt_load_data, delimiter=';')
+            lines = buffer.getvalue().splitlines()
+            f.writelines(str(label) + ';' + line + '\n' for label, line in zip(index[i_start:i_start + n_rows_chunk], lines))
+
+
+def _read_csv(folder, filename):
+    filename_fullpath = os.path.join(folder, filename)
+    if os.path.isfile(filename_fullpath):
+        return pd.read_csv(filename_fullpath, sep=';')
+    return None
+
+
+def replicate_data_set(path_in, path_out, n_copies, bus_source=1):
+    """ Create a scaled-up data set where all feeders of the reference grid (and the load time series and
+        load points) are replicated n_copies times, with all feeders connected to the same HV bus
+
+        The bus IDs of copy c of bus j (other than the source bus) are j + c * (n_bus - 1), so that the bus
+        IDs remain consecutive, and the time series IDs of copy c of time series k are k + c * n_series.
+
+        Inputs:
+            path_in: Folder with the CINELDI MV reference data set
+            path_out: Folder to write the scaled-up data set to (created if it does not exist)
+            n_copies: Number of copies of the feeders (1 gives a copy of the original data set)
+            bus_source: Bus ID of the source (HV) bus, which is not replicated (optional; default: 1)
+    """
+    os.makedirs(path_out, exist_ok=True)
+
+    bus = _read_csv(path_in, filename_bus)
+    n_bus = len(bus.index)
+    offsets_bus = np.arange(n_copies) * (n_bus - 1)
+
+    def offset_bus_IDs(bus_IDs, offset):
+        bus_IDs = np.asarray(bus_IDs)
+        return np.where(bus_IDs == bus_source, bus_source, bus_IDs + offset)
+
+    # Bus data (the source bus is only included once)
+    bus_copies = [bus]
+    for offset in offsets_bus[1:]:
+        bus_copy = bus.loc[bus['bus_i'] != bus_source].copy()
+        bus_copy['bus_i'] = offset_bus_IDs(bus_copy['bus_i'], offset)
+        bus_copies.append(bus_copy)
+    pd.concat(bus_copies, ignore_index=True).to_csv(os.path.join(path_out, filename_bus), sep=';', index=False)
+
+    # Branch data
+    branch = _read_csv(path_in, filename_branch)
+    branch_copies = []
+    for offset in offsets_bus:
+        branch_copy = branch.copy()
+        branch_copy['f_bus'] = offset_bus_IDs(branch_copy['f_bus'], offset)
+        branch_copy['t_bus'] = offset_bus_IDs(branch_copy['t_bus'], offset)
+        branch_copies.append(branch_copy)
+    pd.concat(branch_copies, ignore_index=True).to_csv(os.path.join(path_out, filename_branch), sep=';', index=False)
+
+    branch_extra = _read_csv(path_in, filename_branch_extra)
+    if branch_extra is not None:
+        pd.concat([branch_extra] * n_copies, ignore_index=True).to_csv(os.path.join(path_out, filename_branch_extra), sep=';', index=False)
+
+    bus_extra = _read_csv(path_in, filename_bus_extra)
+    if bus_extra is not None:
+        bus_extra_copies = [bus_extra.assign(bus_i=offset_bus_IDs(bus_extra['bus_i'], offset)) for offset in offsets_bus]
+        pd.concat(bus_extra_copies, ignore_index=True).to_csv(os.path.join(path_out, filename_bus_extra), sep=';', index=False)
+
+    # Load data, with replicated time series
+    load_data = pd.read_csv(os.path.join(path_in, filename_load_data), sep=';', index_col=0)
+    n_series = len(load_data.columns)
+    offsets_series = np.arange(n_copies) * n_series
+    columns_scaled = [int(col) + offset for offset in offsets_series for col in load_data.columns]
+    _write_load_data(os.path.join(path_out, filename_load_data), load_data.index, columns_scaled,
+        np.tile(load_data.to_numpy(dtype=float), (1, n_copies)))
+
+    # Mapping of load time series to buses, and lists of time series IDs
+    mapping = _read_csv(path_in, filename_load_mapping)
+    mapping_copies = [mapping.assign(bus_i=offset_bus_IDs(mapping['bus_i'], offset_bus), time_series_ID=mapping['time_series_ID'] + offset_series)
+        for offset_bus, offset_series in zip(offsets_bus, offsets_series)]
+    pd.concat(mapping_copies, ignore_index=True).to_csv(os.path.join(path_out, filename_load_mapping), sep=';', index=False)
+
+    for filename in [filename_share_load, filename_irregular, filename_residential]:
+        df = _read_csv(path_in, filename)
+        if df is not None:
+            df_copies = [df.assign(time_series_ID=df['time_series_ID'] + offset) for offset in offsets_series]
+            pd.concat(df_copies, ignore_index=True).to_csv(os.path.join(path_out, filename), sep=';', index=False)
+
+    # Scenarios refer to bus IDs, and new loads are added in all copies of the feeders
+    for filename in filenames_copy:
+        filename_fullpath = os.path.join(path_in, filename)
+        if not os.path.isfile(filename_fullpath):
+            continue
+        if filename.startswith('scenario'):
+            scenario = pd.read_csv(filename_fullpath, sep=';')
+            scenario_copies = [scenario.assign(bus_i=offset_bus_IDs(scenario['bus_i'], offset)) for offset in offsets_bus]
+            pd.concat(scenario_copies, ignore_index=True).to_csv(os.path.join(path_out, filename), sep=';', index=False)
+        else:
+            shutil.copyfile(filename_fullpath, os.path.join(path_out, filename))
+
+
+def _get_subtree(parent, i_root):
+    """ Positions of the buses in the subtree rooted at position i_root, given the position of the parent
+        of each bus (-1 for buses connected directly to the source) """
+    in_subtree = np.zeros(len(parent), dtype=bool)
+    in_subtree[i_root] = True
+    n_subtree = 0
+    while np.count_nonzero(in_subtree) > n_subtree:
+        n_subtree = np.count_nonzero(in_subtree)
+        in_subtree |= (parent >= 0) & in_subtree[np.maximum(parent, 0)]
+    return np.flatnonzero(in_subtree)
+
+
+def _get_bfs_order(parent):
+    """ Order of the buses of a feeder such that each bus comes after its parent (-1 for the feeder head) """
+    depth = np.zeros(len(parent), dtype=int)
+    current = parent.copy()
+    while (current >= 0).any():
+        depth[current >= 0] += 1
+        current = np.where(current >= 0, parent[np.maximum(current, 0)], -1)
+    return np.argsort(depth, kind='stable')
+
+
+def generate_data_set(path_in, path_out, n_bus, seed=None, share_rewired=0.1, sigma_load=0.2, sigma_length=0.2,
+        sigma_hourly=0.05, n_series_max=10000, bus_source=1):
+    """ Generate a grid with (approximately) a given number of buses and corresponding load data that are
+        statistically similar to the CINELDI MV reference data set, on the same file formats
+
+        The grid is built from feeders that are sampled (with replacement) from the feeders of the reference
+        grid and connected to the same HV bus. In each feeder, a share of the branches are re-wired by
+        moving the subtree downstream of the branch to a random other bus of the feeder, the peak loads and
+        line lengths (and impedances) are perturbed, and normally open tie branches are added between
+        random buses of randomly chosen pairs of feeders. The load time series mapped to the load points
+        are sampled from the regular time series of the reference data set, shifted by -1, 0 or 1 weeks,
+        perturbed by hourly noise and scaled back to the peak value of the sampled time series.
+
+        Inputs:
+            path_in: Folder with the CINELDI MV reference data set
+            path_out: Folder to write the generated data set to (created if it does not exist)
+            n_bus: Number of buses of the generated grid (the last sampled feeder may exceed it)
+            seed: Seed of the random number generator (optional; default: None)
+            share_rewired: Share of the branches of each feeder that are re-wired (optional; default: 0.1)
+            sigma_load: Standard deviation of the log-normal perturbation of peak loads (optional; default: 0.2)
+            sigma_length: Standard deviation of the log-normal perturbation of line lengths (optional; default: 0.2)
+            sigma_hourly: Standard deviation of the relative hourly noise of the load time series
+                (optional; default: 0.05)
+            n_series_max: Largest number of load time series to generate; if there are more load points,
+                time series are shared by several load points (optional; default: 10000, i.e. about 0.7 GB of
+                load data in memory)
+            bus_source: Bus ID of the source (HV) bus of the reference grid (optional; default: 1);
+                the buses of the generated grid are numbered 1, 2, ..., with bus 1 as the source bus
+    """
+    rng = np.random.default_rng(seed)
+    os.makedirs(path_out, exist_ok=True)
+
+    bus = _read_csv(path_in, filename_bus)
+    branch = _read_csv(path_in, filename_branch)
+    branch_extra = _read_csv(path_in, filename_branch_extra)
+    bus_extra = _read_csv(path_in, filename_bus_extra)
+    mapping = _read_csv(path_in, filename_load_mapping)
+    share_load = _read_csv(path_in, filename_share_load)
+    irregular = _read_csv(path_in, filename_irregular)
+    residential = _read_csv(path_in, filename_residential)
+    load_data = pd.read_csv(os.path.join(path_in, filename_load_data), sep=';', index_col=0)
+
+    # Identify the feeders of the reference grid, including normally open branches within a feeder
+    topology = rt.radial_topology.from_branch_data(branch, bus_IDs=bus['bus_i'].to_numpy(), bus_source=bus_source)
+    feeders = np.unique(topology.feeder[topology.feeder >= 0])
+    feeder_f = topology.feeder[topology.f_pos]
+    feeder_t = topology.feeder[topology.t_pos]
+    ties = topology.tie_branches
+    ties_intra = ties[(feeder_f[ties] == feeder_t[ties]) & (feeder_f[ties] >= 0)]
+    ties_inter = ties[(feeder_f[ties] != feeder_t[ties]) & (feeder_f[ties] >= 0) & (feeder_t[ties] >= 0)]
+
+    # Sample feeders and re-wire them; the buses of each feeder are numbered in breadth-first order with
+    # branches oriented away from the source, so that the from bus of a branch always has a lower bus ID
+    # than the to bus (as in the reference grid)
+    pos_bus_new = [np.array([topology.pos_source])]
+    i_branch_new = []
+    f_bus_new = []
+    t_bus_new = []
+    feeder_start = []
+    feeder_size = []
+    n_bus_new = 1
+    n_feeders_new = 0
+    while n_bus_new < n_bus:
+        feeder = rng.choice(feeders)
+        pos_feeder = np.flatnonzero(topology.feeder == feeder)
+        local = pd.Index(pos_feeder)
+        parent = local.get_indexer(topology.parent_bus[pos_feeder])
+
+        n_rewired = int(round(share_rewired * (len(pos_feeder) - 1)))
+        for i_bus in rng.choice(np.flatnonzero(parent >= 0), size=n_rewired, replace=False):
+            candidates = np.setdiff1d(np.arange(len(pos_feeder)), _get_subtree(parent, i_bus))
+            parent[i_bus] = rng.choice(candidates)
+
+        order = _get_bfs_order(parent)
+        bus_IDs_local = np.empty(len(order), dtype=int)
+        bus_IDs_local[order] = np.arange(n_bus_new, n_bus_new + len(order)) + 1
+        parent_ID = np.where(parent >= 0, bus_IDs_local[np.maximum(parent, 0)], 1)
+
+        # In-service branches (with the branch data of the original upstream branch of each bus)
+        i_branch_new.append(topology.parent_branch[pos_feeder[order]])
+        f_bus_new.append(parent_ID[order])
+        t_bus_new.append(bus_IDs_local[order])
+
+        # Normally open branches within the feeder
+        ties_feeder = ties_intra[feeder_f[ties_intra] == feeder]
+        f_tie = bus_IDs_local[local.get_indexer(topology.f_pos[ties_feeder])]
+        t_tie = bus_IDs_local[local.get_indexer(topology.t_pos[ties_feeder])]
+        i_branch_new.append(ties_feeder)
+        f_bus_new.append(np.minimum(f_tie, t_tie))
+        t_bus_new.append(np.maximum(f_tie, t_tie))
+
+        pos_bus_new.append(pos_feeder[order])
+        feeder_start.append(n_bus_new + 1)
+        feeder_size.append(len(order))
+        n_bus_new += len(order)
+        n_feeders_new += 1
+
+    pos_bus_new = np.concatenate(pos_bus_new)
+    bus_IDs_new = np.arange(1, n_bus_new + 1)
+    feeder_start = np.array(feeder_start)
+    feeder_size = np.array(feeder_size)
+
+    # Normally open branches between random buses of random pairs of feeders, with as many per feeder as
+    # in the reference grid
+    n_ties_inter = int(round(len(ties_inter) * n_feeders_new / len(feeders))) if n_feeders_new > 1 else 0
+    if n_ties_inter > 0:
+        feeder_1 = rng.integers(0, n_feeders_new, n_ties_inter)
+        feeder_2 = (feeder_1 + rng.integers(1, n_feeders_new, n_ties_inter)) % n_feeders_new
+        f_tie = feeder_start[feeder_1] + rng.integers(0, feeder_size[feeder_1])
+        t_tie = feeder_start[feeder_2] + rng.integers(0, feeder_size[feeder_2])
+        i_branch_new.append(rng.choice(ties_inter, size=n_ties_inter))
+        f_bus_new.append(np.minimum(f_tie, t_tie))
+        t_bus_new.append(np.maximum(f_tie, t_tie))
+
+    i_branch_new = np.concatenate(i_branch_new)
+
+    # Bus data, with perturbed peak loads
+    bus_new = bus.iloc[pos_bus_new].reset_index(drop=True)
+    bus_new['bus_i'] = bus_IDs_new
+    factor_load = rng.lognormal(0, sigma_load, len(bus_new.index))
+    factor_load[0] = 1.0
+    bus_new['Pd'] = bus_new['Pd'] * factor_load
+    bus_new['Qd'] = bus_new['Qd'] * factor_load
+    bus_new.to_csv(os.path.join(path_out, filename_bus), sep=';', index=False)
+
+    # Branch data, with impedances and charging susceptances scaled with the perturbed line lengths
+    branch_new = branch.iloc[i_branch_new].reset_index(drop=True)
+    branch_new['f_bus'] = np.concatenate(f_bus_new)
+    branch_new['t_bus'] = np.concatenate(t_bus_new)
+    factor_length = rng.lognormal(0, sigma_length, len(branch_new.index))
+    for col in ['br_r', 'br_x', 'br_b']:
+        branch_new[col] = branch_new[col] * factor_length
+    branch_new.to_csv(os.path.join(path_out, filename_branch), sep=';', index=False)
+
+    if branch_extra is not None:
+        branch_extra_new = branch_extra.iloc[i_branch_new].reset_index(drop=True)
+        branch_extra_new['length_km'] = branch_extra_new['length_km'] * factor_length
+        branch_extra_new.to_csv(os.path.join(path_out, filename_branch_extra), sep=';', index=False)
+
+    bus_IDs_template = bus['bus_i'].to_numpy()[pos_bus_new]
+    if bus_extra is not None:
+        bus_extra_new = bus_extra.set_index('bus_i').reindex(bus_IDs_template)
+        bus_extra_new.index = pd.Index(bus_IDs_new, name='bus_i')
+        bus_extra_new.dropna(how='all').astype(bus_extra.dtypes.drop('bus_i')).to_csv(os.path.join(path_out, filename_bus_extra), sep=';')
+
+    # Load points: buses that are copies of buses in the load mapping (both existing loads and new loads)
+    mapping_template = mapping.set_index('bus_i').reindex(bus_IDs_template)
+    has_load = mapping_template['time_series_ID'].notna().to_numpy()
+    n_load = np.count_nonzero(has_load)
+    n_series = n_load if n_series_max is None else min(n_load, n_series_max)
+    series_load = np.arange(n_load) if n_series == n_load else rng.integers(0, n_series, n_load)
+
+    # Sample and perturb the load time series
+    IDs_irregular = [] if irregular is None else irregular['time_series_ID'].to_list()
+    IDs_regular = [ID for ID in mapping['time_series_ID'].unique() if ID not in IDs_irregular]
+    IDs_base = rng.choice(IDs_regular, size=n_series)
+    values = load_data.to_numpy(dtype=float)
+    pos_base = load_data.columns.get_indexer([str(ID) for ID in IDs_base])
+    n_hours = values.shape[0]
+    load_data_new = np.empty((n_hours, n_series))
+    n_series_chunk = 1000
+    for i_start in range(0, n_series, n_series_chunk):
+        sl = slice(i_start, min(i_start + n_series_chunk, n_series))
+        shift = rng.integers(-1, 2, sl.stop - sl.start) * 168
+        rows = (np.arange(n_hours)[:, np.newaxis] - shift[np.newaxis, :]) % n_hours
+        chunk = values[rows, pos_base[sl][np.newaxis, :]]
+        peak = chunk.max(axis=0)
+        chunk *= np.maximum(1 + sigma_hourly * rng.standard_normal(chunk.shape), 0)
+        peak_new = chunk.max(axis=0)
+        chunk *= np.divide(peak, peak_new, out=np.zeros_like(peak), where=peak_new > 0)
+        load_data_new[:, sl] = chunk
+    IDs_new = np.arange(1, n_series + 1)
+    _write_load_data(os.path.join(path_out, filename_load_data), load_data.index, IDs_new, load_data_new)
+
+    mapping_new = pd.DataFrame({'bus_i': bus_IDs_new[has_load], 'time_series_ID': IDs_new[series_load],
+        'existing_load': mapping_template['existing_load'].to_numpy()[has_load].astype(bool)})
+    mapping_new.to_csv(os.path.join(path_out, filename_load_mapping), sep=';', index=False)
+
+    if share_load is not None:
+        share_load_new = share_load.set_index('time_series_ID').loc[IDs_base].reset_index(drop=True)
+        share_load_new.insert(0, 'time_series_ID', IDs_new)
+        share_load_new.to_csv(os.path.join(path_out, filename_share_load), sep=';', index=False)
+    pd.DataFrame({'time_series_ID': np.zeros(0, dtype=int)}).to_csv(os.path.join(path_out, filename_irregular), sep=';', index=False)
+    if residential is not None:
+        is_residential = np.isin(IDs_base, residential['time_series_ID'].to_numpy())
+        pd.DataFrame({'time_series_ID': IDs_new[is_residential]}).to_csv(os.path.join(path_out, filename_residential), sep=';', index=False)
+
+    # Scenario data: new loads are added at all copies of the buses in the scenario
+    for filename in filenames_copy:
+        filename_fullpath = os.path.join(path_in, filename)
+        if not os.path.isfile(filename_fullpath):
+            continue
+        if filename.startswith('scenario'):
+            scenario = pd.read_csv(filename_fullpath, sep=';')
+            i_scenario, i_bus = np.nonzero(scenario['bus_i'].to_numpy()[:, np.newaxis] == bus_IDs_template[np.newaxis, :])
+            scenario_new = scenario.iloc[i_scenario].reset_index(drop=True)
+            scenario_new['bus_i'] = bus_IDs_new[i_bus]
+            scenario_new.sort_values(['year_rel', 'bus_i'], kind='stable').to_csv(os.path.join(path_out, filename), sep=';', index=False)
+        else:
+            shutil.copyfile(filename_fullpath, os.path.join(path_out, filename))
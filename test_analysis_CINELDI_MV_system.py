@@ -11,12 +11,10 @@ load time series to the CINELDI MV reference system.
 # %% Dependencies
 
 import pandapower as pp
-import pandapower.plotting as pp_plotting
 import pandas as pd
 import os
 import load_scenarios as ls
-import load_profiles as lp
-import pandapower_read_csv as ppcsv
+import cineldi_dataset as cd
 
 # %% Define input data
 
@@ -37,11 +35,14 @@ filename_scenario_fullpath = os.path.join(path_data_set,filename_scenario)
 
 # %% Read pandapower network
 
-net = ppcsv.read_net_from_csv(path_data_set, baseMVA=10)
+# Data set object that reads each data file once (the files needed are read concurrently)
+data = cd.cineldi_dataset(path_data_set).prefetch('bus', 'branch', 'branch_extra', 'load_data')
+
+net = data.get_net(baseMVA=10)
 
 # %% Read scenario data
 
-scen = ls.read_scenario_from_csv(path_data_set,filename_point_load = filename_scenario)
+scen = data.get_scenario(filename_scenario)
 
 # %% Apply scenario data to network
 
@@ -59,11 +60,13 @@ print('Total load demand in the system assuming a peak load model: ' + str(net.r
 
 # %% Plot results of power flow calculations
 
+# Plotting functions (and plotly) are only imported when plotting
+import pandapower.plotting as pp_plotting
 pp_plotting.pf_res_plotly(net)
 
 # %% Set up hourly normalized load time series for a representative day 
 
-load_profiles = lp.load_profiles(filename_load_data_fullpath)
+load_profiles = data.load_profiles
 
 # List with indices of the days of the year to extract load profiles for (1-indexed; 28 February by default)
 repr_days = [31+28]
@@ -86,5 +89,6 @@ print('Total load demand in the system assuming a time-varying load model with a
 
 # %% Plot power flow solution for time-varying load model
 
+import pandapower.plotting as pp_plotting
 pp_plotting.pf_res_plotly(net)
 # %%
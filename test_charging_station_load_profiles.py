@@ -11,7 +11,6 @@ Test script for mapping load time series to the grid model including additional
 # %% Dependencies
 
 import pandapower as pp
-import pandapower.plotting as pp_plotting
 import pandas as pd
 import os
 import load_scenarios as ls